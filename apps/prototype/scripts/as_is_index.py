@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+AS-IS field index: original copy by KEYNAME, without parsing YAML on every import
+
+Importers that show the original (AS-IS) label, help, type or options next to
+new copy look fields up here instead of loading a schema themselves:
+
+    from as_is_index import as_is_fields
+    original = as_is_fields('non-lux-1-1').get(keyname)   # {'label', 'help', ...} or None
+
+Each source is read once into data/generated/as-is-index.json (source ->
+KEYNAME -> record) together with a sha256 of the files it came from. Later
+runs load that JSON and only rebuild a source whose files have changed, so
+the usual cost is one json.load rather than a YAML parse.
+
+Sources:
+  as-is-journey   data/schemas/as-is-journey/schema.yaml (fields extracted from the KYCP HTML form)
+  as-is-audit     data/generated/as-is-audit/field-mappings.json + extracted-fields.json
+  as-is-curated   data/generated/as-is-audit/curated-fields.json (hand-gathered, used by wicked-problem-areas)
+  non-lux-1-1     data/schemas/non-lux-1-1/schema-kycp.yaml (the AS-IS journey for sprint-2-testing-flow)
+
+Records keep only what the source has: label, help, type, options, required,
+visibility, children (non-lux-1-1 records always carry label and help).
+Values are as the source writes them (options may be strings or
+{value, label}).
+
+Usage:
+  python apps/prototype/scripts/as_is_index.py                 # rebuild stale sources and list them
+  python apps/prototype/scripts/as_is_index.py --rebuild
+  python apps/prototype/scripts/as_is_index.py --show GENFundCurrency
+"""
+from __future__ import annotations
+import argparse, hashlib, json, os, sys, yaml
+from datetime import datetime
+from pathlib import Path
+
+from import_metrics import metrics
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+SCHEMAS_DIR = DATA_DIR / 'schemas'
+AUDIT_DIR = DATA_DIR / 'generated' / 'as-is-audit'
+INDEX_FILE = DATA_DIR / 'generated' / 'as-is-index.json'
+INDEX_VERSION = 1
+
+def _record(**values) -> dict:
+    return {k: v for k, v in values.items() if v not in (None, '', [])}
+
+def legacy_fields(schema_path: Path) -> dict[str, dict]:
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        schema = yaml.safe_load(f) or {}
+    return {item['id']: _record(label=item.get('label'), help=item.get('help'), type=item.get('data_type'),
+                                options=item.get('options'), required=item.get('mandatory'))
+            for item in schema.get('items', []) if item.get('id')}
+
+def audit_fields(mappings_path: Path, extracted_path: Path) -> dict[str, dict]:
+    with open(mappings_path, 'r', encoding='utf-8') as f:
+        mappings = json.load(f).get('mappings', [])
+    with open(extracted_path, 'r', encoding='utf-8') as f:
+        extracted = {e['index']: e for e in json.load(f)}
+    fields = {}
+    for m in mappings:
+        key = m.get('spreadsheet_keyname')
+        if not key:
+            continue
+        html = extracted.get(m.get('html_index'), {})
+        fields[key] = _record(label=m.get('html_question'), help=html.get('help_text'), type=m.get('html_component'),
+                              options=html.get('options'), required=m.get('html_mandatory'))
+    return fields
+
+def curated_fields(path: Path) -> dict[str, dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('fields', {})
+
+def kycp_fields(schema_path: Path) -> dict[str, dict]:
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        schema = yaml.safe_load(f) or {}
+    # label and help are always present here: sprint-2-testing-flow copies them into `original` as-is
+    return {field['key']: {'label': field.get('label', ''), 'help': field.get('help') or field.get('description', ''),
+                           **_record(type=field.get('type'), options=field.get('options'), required=field.get('required'),
+                                     visibility=field.get('visibility'), children=field.get('children'))}
+            for field in schema.get('fields', []) if field.get('key')}
+
+# source -> (files it is built from, builder called with those files)
+SOURCES = {
+    'as-is-journey': ((SCHEMAS_DIR / 'as-is-journey' / 'schema.yaml',), legacy_fields),
+    'as-is-audit': ((AUDIT_DIR / 'field-mappings.json', AUDIT_DIR / 'extracted-fields.json'), audit_fields),
+    'as-is-curated': ((AUDIT_DIR / 'curated-fields.json',), curated_fields),
+    'non-lux-1-1': ((SCHEMAS_DIR / 'non-lux-1-1' / 'schema-kycp.yaml',), kycp_fields),
+}
+
+def fingerprint(paths: tuple[Path, ...]) -> str | None:
+    h = hashlib.sha256()
+    for p in paths:
+        if not p.exists():
+            return None
+        h.update(p.read_bytes())
+    return h.hexdigest()
+
+def _read_index() -> dict:
+    try:
+        with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') == INDEX_VERSION:
+            return index
+    except (OSError, ValueError):
+        pass
+    return {'version': INDEX_VERSION, 'sources': {}, 'fields': {}}
+
+def _write_index(index: dict):
+    index['built'] = datetime.now().isoformat()
+    INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    # Importers may run in parallel (rbsi_import --jobs): write then rename
+    tmp = INDEX_FILE.with_name(f"{INDEX_FILE.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp, INDEX_FILE)
+
+def load_index(sources=None, rebuild: bool = False) -> dict:
+    """The index with the given sources (default: all) current, rebuilding what is stale"""
+    index = _read_index()
+    stale = []
+    for name in sources or SOURCES:
+        paths, build = SOURCES[name]
+        digest = fingerprint(paths)
+        if digest is None:
+            index['sources'].pop(name, None)
+            index['fields'].pop(name, None)
+            continue
+        if rebuild or index['sources'].get(name, {}).get('sha256') != digest:
+            index['fields'][name] = build(*paths)
+            index['sources'][name] = {'files': [p.relative_to(APP_DIR).as_posix() for p in paths], 'sha256': digest,
+                                      'fields': len(index['fields'][name])}
+            stale.append(name)
+    if stale:
+        metrics.count('as_is.index_rebuilds', len(stale))
+        _write_index(index)
+    return index
+
+_loaded: dict[str, dict[str, dict]] = {}
+
+def as_is_fields(source: str) -> dict[str, dict]:
+    """KEYNAME -> AS-IS record for one source ({} when its files are missing)"""
+    if source not in SOURCES:
+        raise KeyError(f"Unknown AS-IS source '{source}' (known: {', '.join(SOURCES)})")
+    if source not in _loaded:
+        _loaded[source] = load_index([source])['fields'].get(source, {})
+    return _loaded[source]
+
+def main():
+    ap = argparse.ArgumentParser(description='Build or inspect the AS-IS field index')
+    ap.add_argument('--rebuild', action='store_true', help='Rebuild every source even if unchanged')
+    ap.add_argument('--show', metavar='KEYNAME', help='Print every source\'s record for a field')
+    args = ap.parse_args()
+
+    index = load_index(rebuild=args.rebuild)
+    if args.show:
+        found = {name: fields[args.show] for name, fields in index['fields'].items() if args.show in fields}
+        if not found:
+            print(f"{args.show}: not in any AS-IS source", file=sys.stderr)
+            return 1
+        print(json.dumps(found, indent=2, ensure_ascii=False))
+        return 0
+    for name, (paths, _) in SOURCES.items():
+        entry = index['sources'].get(name)
+        status = f"{entry['fields']:>5} fields" if entry else '  missing'
+        print(f"{name:<16} {status}  {', '.join(p.relative_to(APP_DIR).as_posix() for p in paths)}")
+    print(f"Index: {INDEX_FILE}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Importer benchmarks
+
+Runs every importer against the committed inputs in data/incoming/ and
+records wall time, peak RSS and a per-stage breakdown:
+
+  unzip              decompressing workbook members (ZipFile.read/open)
+  shared strings     read_shared_strings
+  sheet parse        worksheet/CSV parsing, lookup sheets, pandas.read_excel
+  as-is load         reading AS-IS schemas/field data (Sprint 2, wicked problems)
+  field build        generate_schema/process_field/create_*_field and friends
+  validate           KYCP structural validation
+  yaml dump          yaml.dump / to_yaml
+  conditions report  write_conditions_report
+  main (other)       time in main() not covered above
+
+Stage times are exclusive (a stage called from another stage is not counted
+twice), so they add up to the importer's wall time. Each run is a separate
+process so peak RSS belongs to that importer alone. Outputs go to a temporary
+directory; the committed schemas are never touched.
+
+--scale 10 100 also runs each importer on synthetic inputs with the data rows
+of the mapped sheet (or CSV body) repeated N times, to see how cost grows
+with row count. --input runs a benchmark on another file instead, e.g. a
+synthetic workbook from generate_master_spreadsheet.py. Results are written as JSON (default
+data/generated/benchmarks/importers-<timestamp>.json); --compare prints the
+change against an earlier results file.
+
+Usage:
+  python apps/prototype/scripts/bench_importers.py
+  python apps/prototype/scripts/bench_importers.py non-lux-lp-2-2 --scale 1 10 100 --repeat 3
+  python apps/prototype/scripts/bench_importers.py non-lux-lp-2-2 --input apps/prototype/data/generated/synthetic/non-lux-lp-2-2-20000.xlsx
+  python apps/prototype/scripts/bench_importers.py --compare apps/prototype/data/generated/benchmarks/importers-20251001-090000.json
+"""
+from __future__ import annotations
+import argparse, functools, importlib, importlib.util, io, json, os, platform, re, subprocess, sys, tempfile, time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from xml.etree import ElementTree as ET
+from zipfile import ZipFile, ZIP_DEFLATED
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+SCRIPTS_DIR = APP_DIR / 'scripts'
+REPO_ROOT = APP_DIR.parents[1]
+RESULTS_DIR = DATA_DIR / 'generated' / 'benchmarks'
+
+NS = {'a': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+# header_rows: rows kept once when scaling (everything after them is repeated)
+BENCHMARKS = {
+    'non-lux-1-1': {'script': SCRIPTS_DIR / 'import_non_lux_1_1.py', 'header_rows': 2},
+    'non-lux-lp-2-1': {'script': SCRIPTS_DIR / 'import_non_lux_2_1.py', 'header_rows': 2},
+    'non-lux-lp-2-2': {'script': SCRIPTS_DIR / 'import_non_lux_2_2.py', 'header_rows': 2},
+    'wicked-problem-areas': {'script': SCRIPTS_DIR / 'import_csv_wicked_problem_areas.py', 'header_rows': 1},
+    'sprint-2-testing-flow': {'script': SCRIPTS_DIR / 'import_sprint_2_testing_flow.py', 'header_rows': 1},
+    'zelda': {
+        'script': REPO_ROOT / 'scripts' / 'import_xlsx.py',
+        'mapping': DATA_DIR / 'mappings' / 'zelda.json',
+        'input': DATA_DIR / 'incoming' / '20250909_Zelda_Mapping.xlsx',
+        'header_rows': 1
+    },
+    'zelda-kycp': {
+        'script': REPO_ROOT / 'scripts' / 'import_xlsx_kycp.py',
+        'mapping': DATA_DIR / 'mappings' / 'zelda.json',
+        'input': DATA_DIR / 'incoming' / '20250909_Zelda_Mapping.xlsx',
+        'header_rows': 1
+    },
+}
+
+# Importer functions timed as each stage (whichever exist in the module)
+STAGE_FUNCTIONS = {
+    'shared strings': ('read_shared_strings',),
+    'sheet parse': ('read_sheet_rows', 'parse_worksheet', 'build_table', 'collect_lookup_values',
+                    'process_csv_file', 'load_lookups_from_sheet'),
+    'as-is load': ('load_as_is_data', 'load_as_is_field_data'),
+    'field build': ('generate_schema', 'process_field', 'create_copy_mapping', 'sort_fields_by_paul_order',
+                    'create_field', 'organize_sections', 'create_schema_field', 'create_kycp_field'),
+    'validate': ('check_kycp_schema',),
+    'yaml dump': ('to_yaml',),
+    'conditions report': ('write_conditions_report',),
+}
+STAGES = ('unzip', *STAGE_FUNCTIONS, 'main (other)')
+
+def warn(msg: str):
+    print(f"[warn] {msg}", file=sys.stderr)
+
+def info(msg: str):
+    print(f"[info] {msg}")
+
+def rel(path: Path) -> str:
+    try:
+        return Path(path).resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+def load_module(script: Path):
+    for d in (SCRIPTS_DIR, script.parent):
+        if str(d) not in sys.path:
+            sys.path.insert(0, str(d))
+    if script.parent == SCRIPTS_DIR:
+        return importlib.import_module(script.stem)
+    spec = importlib.util.spec_from_file_location(script.stem, script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def benchmark_inputs(name: str) -> dict:
+    """Input file, its kind and (for workbooks) the sheet that gets scaled"""
+    bench = BENCHMARKS[name]
+    if 'input' in bench:
+        path, mapping = bench['input'], bench['mapping']
+    else:
+        module = load_module(bench['script'])
+        path = getattr(module, 'INCOMING', None) or getattr(module, 'INCOMING_CSV')
+        mapping = getattr(module, 'MAPPING', None)
+    sheet = None
+    if path.suffix == '.xlsx':
+        sheet = json.loads(mapping.read_text(encoding='utf-8'))['sheet']
+    return {'path': path, 'sheet': sheet}
+
+# --- Synthetic scaled inputs ------------------------------------------------------
+
+def sheet_member(z: ZipFile, sheet: str) -> str:
+    # Same sheet resolution as the importers: position in workbook.xml → sheetN.xml
+    root = ET.fromstring(z.read('xl/workbook.xml'))
+    for i, s in enumerate(root.findall('.//a:sheet', NS), 1):
+        if s.get('name') == sheet:
+            return f'xl/worksheets/sheet{i}.xml'
+    raise ValueError(f"Sheet '{sheet}' not found")
+
+def scale_sheet_xml(xml: str, header_rows: int, factor: int) -> tuple[str, int]:
+    """Repeat the data rows of a worksheet `factor` times, renumbering rows and cell refs"""
+    m = re.search(r'<sheetData>(.*?)</sheetData>', xml, re.S)
+    if not m:
+        return xml, 0
+    rows = re.findall(r'<row\b[^>]*?(?:/>|>.*?</row>)', m.group(1), re.S)
+    number = lambda row: int(re.search(r'\br="(\d+)"', row).group(1))
+    head = [r for r in rows if number(r) <= header_rows]
+    body = [re.sub(r'<f\b[^>]*?(?:/>|>.*?</f>)', '', r, flags=re.S) for r in rows if number(r) > header_rows]
+    if not body:
+        return xml, 0
+    span = number(body[-1]) - header_rows
+
+    def shift(row: str, offset: int) -> str:
+        tag_end = row.index('>')
+        tag = re.sub(r'\br="(\d+)"', lambda t: f'r="{int(t.group(1)) + offset}"', row[:tag_end], count=1)
+        cells = re.sub(r'(<c\b[^>]*?\br="[A-Z]+)(\d+)"', lambda c: f'{c.group(1)}{int(c.group(2)) + offset}"', row[tag_end:])
+        return tag + cells
+
+    copies = [shift(r, k * span) for k in range(factor) for r in body]
+    last = header_rows + span * factor
+    out = xml[:m.start(1)] + ''.join(head + copies) + xml[m.end(1):]
+    out = re.sub(r'(<dimension ref="[A-Z]+\d+:[A-Z]+)\d+"', lambda d: f'{d.group(1)}{last}"', out, count=1)
+    return out, len(body) * factor
+
+def scale_workbook(src: Path, dest: Path, sheet: str, header_rows: int, factor: int) -> int:
+    with ZipFile(src) as zin, ZipFile(dest, 'w', ZIP_DEFLATED) as zout:
+        target = sheet_member(zin, sheet)
+        rows = 0
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename == target:
+                xml, rows = scale_sheet_xml(data.decode('utf-8'), header_rows, factor)
+                data = xml.encode('utf-8')
+            zout.writestr(item, data)
+    return rows
+
+def scale_csv(src: Path, dest: Path, header_rows: int, factor: int) -> int:
+    # Repeat the raw body so quirks the importers patch around survive scaling
+    import csv
+    text = src.read_text(encoding='utf-8-sig')
+    lines = text.splitlines(keepends=True)
+    head, body = ''.join(lines[:header_rows]), ''.join(lines[header_rows:])
+    if body and not body.endswith('\n'):
+        body += '\n'
+    dest.write_text(head + body * factor, encoding='utf-8')
+    return sum(1 for _ in csv.reader(io.StringIO(body))) * factor
+
+def prepare_input(name: str, factor: int, work: Path, source: Path | None = None) -> tuple[Path, int | None]:
+    inputs = benchmark_inputs(name)
+    if source:
+        inputs['path'] = source
+    src, header_rows = inputs['path'], BENCHMARKS[name]['header_rows']
+    if factor == 1:
+        return src, None
+    dest = work / f"{name}-x{factor}{src.suffix}"
+    if src.suffix == '.xlsx':
+        rows = scale_workbook(src, dest, inputs['sheet'], header_rows, factor)
+    else:
+        rows = scale_csv(src, dest, header_rows, factor)
+    return dest, rows
+
+# --- Child process: run one importer with stage timers ----------------------------
+
+class StageClock:
+    """Exclusive wall time per stage; nested stage calls are subtracted from their caller"""
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.stack: list[float] = []
+
+    def wrap(self, stage: str, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            self.stack.append(0.0)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                nested = self.stack.pop()
+                elapsed = time.perf_counter() - started
+                self.totals[stage] += elapsed - nested
+                if self.stack:
+                    self.stack[-1] += elapsed
+        return timed
+
+def instrument(module, clock: StageClock):
+    for stage, names in STAGE_FUNCTIONS.items():
+        for n in names:
+            fn = getattr(module, n, None)
+            if callable(fn):
+                setattr(module, n, clock.wrap(stage, fn))
+
+    if hasattr(module, 'ZipFile'):
+        def inflate(z, name, pwd):
+            with ZipFile.open(z, name, 'r', pwd) as f:
+                return f.read()
+        inflate = clock.wrap('unzip', inflate)
+
+        class TimedZipFile(ZipFile):
+            # ZipFile.read goes through open(), so only open() needs timing
+            def open(self, name, mode='r', pwd=None, **kwargs):
+                if mode != 'r':
+                    return super().open(name, mode, pwd, **kwargs)
+                # Decompress up front so parsing time is not charged to unzip
+                return io.BytesIO(inflate(self, name, pwd))
+        module.ZipFile = TimedZipFile
+
+    yaml = sys.modules.get('yaml')
+    if yaml is not None:
+        yaml.dump = clock.wrap('yaml dump', yaml.dump)
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        pd.read_excel = clock.wrap('sheet parse', pd.read_excel)
+
+def run_child(spec: dict) -> dict:
+    """Run one importer in this process against spec['input'], writing into spec['out']"""
+    script, out = Path(spec['script']), Path(spec['out'])
+    module = load_module(script)
+    clock = StageClock()
+    instrument(module, clock)
+
+    # Every importer, the generic ones included (they import these via sys.path),
+    # writes its conditions report and summary/ledger into the run's directory
+    import conditions_report, import_metrics
+    conditions_report.REPORT_DIR = out / 'conditions-reports'
+    import_metrics.SUMMARY_DIR = out / 'importer-cli'
+    if script.parent == SCRIPTS_DIR:
+        for const in ('INCOMING', 'INCOMING_CSV'):
+            if hasattr(module, const):
+                setattr(module, const, Path(spec['input']))
+        module.OUT_DIR = out / module.OUT_DIR.name
+        module.OUT_FILE = module.OUT_DIR / module.OUT_FILE.name
+        if hasattr(module, 'COPY_MAP_FILE'):
+            module.COPY_MAP_FILE = out / module.COPY_MAP_FILE.name
+    else:
+        # Generic importers resolve data/ from the working directory
+        os.chdir(out)
+        sys.argv = [str(script), '--mapping', spec['mapping'], '--input', spec['input'],
+                    '--out', str(out / 'schema.yaml'), '--journey-key', f"bench-{spec['name']}"]
+
+    started = time.perf_counter()
+    try:
+        code = module.main()
+    except SystemExit as e:
+        code = e.code
+    seconds = time.perf_counter() - started
+
+    stages = {s: round(clock.totals.get(s, 0.0), 4) for s in STAGES if s != 'main (other)'}
+    stages['main (other)'] = round(max(seconds - sum(clock.totals.values()), 0.0), 4)
+    peak_rss_mb = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak_rss_mb = round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    # Importers also count rows/exclusions/lookups themselves (import_metrics)
+    recorded = sys.modules.get('import_metrics')
+    counters = dict(sorted(recorded.metrics.counters.items())) if recorded else {}
+    return {'exit': code or 0, 'seconds': round(seconds, 4), 'peak_rss_mb': peak_rss_mb, 'stages': stages, 'counters': counters}
+
+# --- Parent: schedule runs, store and compare results -----------------------------
+
+def run_once(name: str, input_path: Path, work: Path) -> dict:
+    bench = BENCHMARKS[name]
+    out = Path(tempfile.mkdtemp(prefix=f"{name}-", dir=work))
+    result_file = out / 'result.json'
+    spec = {'name': name, 'script': str(bench['script']), 'input': str(input_path), 'out': str(out),
+            'mapping': str(bench.get('mapping', ''))}
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, __file__, '--child', json.dumps(spec), '--result', str(result_file)],
+                          cwd=REPO_ROOT, capture_output=True, text=True)
+    process_seconds = time.perf_counter() - started
+    if proc.returncode != 0 or not result_file.exists():
+        return {'exit': proc.returncode or 1, 'error': (proc.stderr or proc.stdout).strip()[-2000:]}
+    result = json.loads(result_file.read_text(encoding='utf-8'))
+    result['process_seconds'] = round(process_seconds, 4)
+    return result
+
+def run_benchmark(name: str, factor: int, repeat: int, work: Path, source: Path | None = None) -> dict:
+    input_path, rows = prepare_input(name, factor, work, source)
+    attempts = [run_once(name, input_path, work) for _ in range(repeat)]
+    ok = [a for a in attempts if a.get('exit') == 0]
+    # Fastest run is the least disturbed by the rest of the machine
+    best = min(ok, key=lambda a: a['seconds']) if ok else attempts[-1]
+    record = {
+        'benchmark': name,
+        'scale': factor,
+        'input': rel(source or BENCHMARKS[name].get('input') or benchmark_inputs(name)['path']),
+        'input_bytes': input_path.stat().st_size,
+        'data_rows': rows,
+        **best,
+        'attempts': [a.get('seconds') for a in attempts]
+    }
+    return record
+
+def git_commit() -> str | None:
+    try:
+        proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True)
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+def print_run(r: dict):
+    if r.get('exit') != 0:
+        warn(f"{r['benchmark']} x{r['scale']}: importer failed (exit {r.get('exit')})")
+        if r.get('error'):
+            print(r['error'], file=sys.stderr)
+        return
+    top = sorted(((v, k) for k, v in r['stages'].items() if v), reverse=True)[:3]
+    breakdown = ', '.join(f"{k} {v:.2f}s" for v, k in top)
+    rss = f"{r['peak_rss_mb']} MB" if r['peak_rss_mb'] is not None else 'n/a'
+    print(f"{r['benchmark']:<24} x{r['scale']:<4} {r['seconds']:>8.2f}s  peak {rss:>10}  ({breakdown})")
+
+def compare(current: dict, previous_path: Path, threshold: float):
+    previous = json.loads(previous_path.read_text(encoding='utf-8'))
+    before = {(r['benchmark'], r['scale']): r for r in previous.get('runs', []) if r.get('exit') == 0}
+    info(f"Compared with {rel(previous_path)} ({previous.get('commit') or 'unknown commit'})")
+    for r in current['runs']:
+        old = before.get((r['benchmark'], r['scale']))
+        if not old or r.get('exit') != 0:
+            continue
+        change = (r['seconds'] - old['seconds']) / old['seconds'] if old['seconds'] else 0.0
+        rss = ''
+        if r.get('peak_rss_mb') and old.get('peak_rss_mb'):
+            rss = f", peak RSS {r['peak_rss_mb'] - old['peak_rss_mb']:+.1f} MB"
+        line = f"{r['benchmark']} x{r['scale']}: {old['seconds']:.2f}s -> {r['seconds']:.2f}s ({change:+.0%}){rss}"
+        if change > threshold:
+            warn(f"slower: {line}")
+        else:
+            print(f"  {line}")
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark the importers (wall time, peak RSS, per-stage timings)')
+    ap.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    ap.add_argument('--scale', type=int, nargs='+', default=[1], help='Row multipliers; >1 runs on synthetic inputs')
+    ap.add_argument('--repeat', type=int, default=1, help='Runs per benchmark; the fastest is reported')
+    ap.add_argument('--out', help='Results JSON (default: data/generated/benchmarks/importers-<timestamp>.json)')
+    ap.add_argument('--compare', help='Earlier results JSON to compare against')
+    ap.add_argument('--threshold', type=float, default=0.2, help='Slowdown reported as a regression by --compare')
+    ap.add_argument('--input', type=Path, help='Run on this file instead of the benchmark\'s own input')
+    ap.add_argument('--keep-inputs', help='Keep scaled inputs in this directory')
+    ap.add_argument('--child', help=argparse.SUPPRESS)
+    ap.add_argument('--result', help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        result = run_child(json.loads(args.child))
+        Path(args.result).write_text(json.dumps(result), encoding='utf-8')
+        return 0
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"ERROR: unknown benchmark(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    if args.input and len(names) != 1:
+        print('ERROR: --input needs exactly one benchmark', file=sys.stderr)
+        return 2
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='rbsi-bench-') as tmp:
+        work = Path(args.keep_inputs) if args.keep_inputs else Path(tmp)
+        work.mkdir(parents=True, exist_ok=True)
+        for name in names:
+            for factor in args.scale:
+                r = run_benchmark(name, factor, max(1, args.repeat), work, args.input.resolve() if args.input else None)
+                print_run(r)
+                runs.append(r)
+
+    stamp = datetime.now()
+    results = {
+        'created_at': stamp.isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'stages': list(STAGES),
+        'runs': runs
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"importers-{stamp:%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    info(f"Results written to {rel(out)}")
+
+    if args.compare:
+        compare(results, Path(args.compare), args.threshold)
+    return 1 if any(r.get('exit') != 0 for r in runs) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Compiled mappings: a data/mappings/*.json worked out once per import
+
+Importers used to re-read the same mapping settings for every row: the
+yes-values list, the exclude block, each pattern lower-cased again inside
+`any(p.lower() in ...)`. CompiledMapping does that work once:
+- yes_values: frozenset
+- action_excluded / label_excluded / internal_label: one case-insensitive
+  matcher per pattern list (a single regex alternation over the lower-cased
+  patterns)
+- data_types / operators: the normalization tables
+- alias_to_canon: value_aliases flattened to synonym -> canonical (lower-case)
+- column_letters(headers): logical column -> sheet column letter, resolved
+  once per header row
+
+It is still the mapping dict (a dict subclass), so code reading mapping['...']
+keeps working and it pickles into worker processes unchanged.
+
+    from compiled_mapping import load_compiled_mapping
+    mapping = load_compiled_mapping(MAPPING)
+    hit = mapping.exclusion(action, internal, system, label)   # ('action' | 'internal' | 'system' | 'label', matched) or None
+
+Usage:
+  python apps/prototype/scripts/compiled_mapping.py non-lux-lp-2-2     # print what a mapping compiles to
+"""
+from __future__ import annotations
+import json, re, sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+MAPPINGS_DIR = APP_DIR / 'data' / 'mappings'
+
+DEFAULT_YES_VALUES = ('Y', 'Yes', 'YES', 'a', 'A')
+
+class PatternSet:
+    """Case-insensitive 'contains any of these patterns' test"""
+    __slots__ = ('patterns', 'regex')
+
+    def __init__(self, patterns):
+        self.patterns = tuple(p.lower() for p in (patterns or []))
+        self.regex = re.compile('|'.join(re.escape(p) for p in self.patterns)) if self.patterns else None
+
+    def __getstate__(self):
+        return self.patterns
+
+    def __setstate__(self, patterns):
+        self.__init__(patterns)
+
+    def find(self, text: str | None) -> str | None:
+        """The pattern found in text, if any"""
+        m = self.regex.search((text or '').lower()) if self.regex is not None else None
+        return m.group(0) if m else None
+
+    def matches(self, text: str | None) -> bool:
+        return self.find(text) is not None
+
+class CompiledMapping(dict):
+    def __init__(self, raw: dict, source: Path | None = None):
+        super().__init__(raw)
+        self.source = source
+        norm = raw.get('normalization') or {}
+        self.yes_values = frozenset(norm.get('yes_values') or DEFAULT_YES_VALUES)
+        self.data_types = dict(norm.get('data_type') or {})
+        self.operators = dict(norm.get('operators') or {})
+        exclude = raw.get('exclude') or {}
+        self.action_excluded = PatternSet(exclude.get('action_contains'))
+        self.label_excluded = PatternSet(exclude.get('label_contains'))
+        self.internal_label = PatternSet(raw.get('internal_label_contains'))
+        self.label_overrides = dict(raw.get('label_overrides') or {})
+        self.alias_to_canon: dict[str, str] = {}
+        for canon, syns in (raw.get('value_aliases') or {}).items():
+            c = (canon or '').strip().lower()
+            self.alias_to_canon[c] = c
+            for s in (syns or []):
+                self.alias_to_canon[(s or '').strip().lower()] = c
+        self._letters: dict[tuple, dict[str, str]] = {}
+
+    def column_letters(self, headers: dict[str, str]) -> dict[str, str]:
+        """Logical column -> column letter for a header row {letter: header text}; first match wins"""
+        key = tuple(headers.items())
+        letters = self._letters.get(key)
+        if letters is None:
+            by_header: dict[str, str] = {}
+            for letter, header in headers.items():
+                by_header.setdefault(header, letter)
+            letters = {k: by_header[name] for k, name in (self.get('columns') or {}).items() if name in by_header}
+            self._letters[key] = letters
+        return letters
+
+    def exclusion(self, action: str, internal: str, system: str, label: str) -> tuple[str, str] | None:
+        """First exclusion rule a row trips, in the order the importers apply them: (rule, what matched)"""
+        found = self.action_excluded.find(action)
+        if found is not None:
+            return 'action', found
+        if internal in self.yes_values:
+            return 'internal', internal
+        if system in self.yes_values:
+            return 'system', system
+        found = self.label_excluded.find(label)
+        if found is not None:
+            return 'label', found
+        return None
+
+def compile_mapping(mapping: dict) -> CompiledMapping:
+    return mapping if isinstance(mapping, CompiledMapping) else CompiledMapping(mapping)
+
+_cache: dict[Path, tuple[int, CompiledMapping]] = {}
+
+def load_compiled_mapping(path: Path) -> CompiledMapping:
+    """Read and compile a mapping file; reused until the file changes"""
+    path = Path(path).resolve()
+    mtime = path.stat().st_mtime_ns
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = _cache[path] = (mtime, CompiledMapping(json.load(f), source=path))
+    return cached[1]
+
+def main():
+    for name in sys.argv[1:] or sorted(p.stem for p in MAPPINGS_DIR.glob('*.json')):
+        path = Path(name) if Path(name).exists() else MAPPINGS_DIR / f"{name.removesuffix('.json')}.json"
+        m = load_compiled_mapping(path)
+        print(f"{path.stem}:")
+        print(f"  yes values       {sorted(m.yes_values)}")
+        print(f"  data types       {m.data_types}")
+        print(f"  operators        {m.operators}")
+        print(f"  action excluded  {list(m.action_excluded.patterns)}")
+        print(f"  label excluded   {list(m.label_excluded.patterns)}")
+        print(f"  internal label   {list(m.internal_label.patterns)}")
+        print(f"  value aliases    {len(m.alias_to_canon)} spellings")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
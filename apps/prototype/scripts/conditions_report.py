@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Conditions report, built at import time
+
+Importers call write_conditions_report() right after writing the schema, so
+the report describes exactly the visibility rules their own parser produced.
+The API (server/api/conditions-report/[journey].get.ts) only reads the JSON
+artifact from data/generated/conditions-reports/<journey>.json.
+
+Report contents:
+- per-field rule summaries (readable rules and the controllers they read),
+- unresolved condition sourceKeys with the fields that use them,
+- option mismatches (condition values no option of a lookup/enum controller
+  produces, with basic aliasing for Yes/No and UK/US variants),
+- lints per field (parse_error, unresolved_key, option_mismatch,
+  suspicious_numeric_value) and dependency cycles between controllers.
+
+Legacy schema.yaml journeys (items[] with visibility.all expressions) are
+parsed with the v2.2 importer's parse_visibility.
+
+Usage:
+  python apps/prototype/scripts/conditions_report.py              # every journey with a schema
+  python apps/prototype/scripts/conditions_report.py non-lux-1-1 zelda
+"""
+from __future__ import annotations
+import argparse, json, os, re, sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+REPORT_DIR = DATA_DIR / 'generated' / 'conditions-reports'
+
+VALUE_ALIASES = {
+    'uk': ['united kingdom', 'u.k.', 'great britain', 'gb', 'united kingdom (uk)'],
+    'united kingdom': ['uk', 'u.k.', 'great britain', 'gb', 'united kingdom (uk)'],
+    'united states': ['usa', 'u.s.', 'u.s.a.', 'us', 'united states of america', 'united states (usa)', 'united states of america (usa)'],
+    'usa': ['united states', 'u.s.', 'u.s.a.', 'us', 'united states of america', 'united states (usa)', 'united states of america (usa)'],
+    'yes': ['y', 'true'],
+    'no': ['n', 'false']
+}
+BOOLEAN_TEXT = {'y': 'yes', 'yes': 'yes', 'true': 'yes', 'n': 'no', 'no': 'no', 'false': 'no'}
+OPTION_TYPES = ('lookup', 'enum')
+COMPARISON_OPS = {'eq': '==', '==': '==', 'neq': '!=', '!=': '!='}
+NUMERIC_RE = re.compile(r'^\d+(?:\.\d+)?$')
+
+def warn(msg: str):
+    print(f"[warn] {msg}", file=sys.stderr)
+
+def info(msg: str):
+    print(f"[info] {msg}")
+
+def option_set(field: dict) -> set[str]:
+    values = set()
+    for o in field.get('options') or []:
+        value, label = o.get('value'), o.get('label')
+        values.add(str(value if value is not None else (label or '')).lower())
+        values.add(str(label if label is not None else (value or '')).lower())
+    return values
+
+def rule_text(rule: dict) -> str:
+    joiner = ' AND ' if rule.get('allConditionsMustMatch', True) else ' OR '
+    parts = []
+    for c in rule.get('conditions') or []:
+        op = COMPARISON_OPS.get(c.get('operator'), c.get('operator'))
+        parts.append(f"{c.get('sourceKey')} {op} {c.get('value')}")
+    return joiner.join(parts)
+
+def legacy_fields(schema: dict) -> list[dict]:
+    """KYCP-shaped fields for a legacy items[] schema, parsed like the importers do"""
+    from import_non_lux_2_2 import parse_visibility
+    op_map = {'=': '==', '<>': '!='}
+    fields = []
+    for item in schema.get('items') or []:
+        rules = []
+        for expr in (item.get('visibility') or {}).get('all') or []:
+            parsed = parse_visibility(str(expr), op_map)
+            if not parsed:
+                continue
+            # visibility.all is a conjunction of OR-of-AND expressions: distribute,
+            # every rule so far AND every rule of this expression
+            rules = [{**r, 'conditions': r['conditions'] + p['conditions']} for r in rules for p in parsed] if rules else parsed
+        fields.append({
+            'key': item.get('id'),
+            'label': item.get('label'),
+            'type': item.get('control') or item.get('data_type'),
+            'options': [{'value': str(v), 'label': str(v)} for v in item.get('options') or []],
+            'visibility': rules
+        })
+    return fields
+
+def find_cycles(edges: list[tuple[str, str]]) -> list[list[str]]:
+    graph: dict[str, list[str]] = {}
+    for a, b in edges:
+        graph.setdefault(a, []).append(b)
+    cycles, done, on_stack = [], set(), set()
+    for root in graph:
+        if root in done:
+            continue
+        path = [root]
+        on_stack.add(root)
+        stack = [iter(graph.get(root, ()))]
+        while stack:
+            nxt = next(stack[-1], None)
+            if nxt is None:
+                stack.pop()
+                node = path.pop()
+                on_stack.discard(node)
+                done.add(node)
+            elif nxt in on_stack:
+                cycles.append(path[path.index(nxt):] + [nxt])
+            elif nxt not in done:
+                path.append(nxt)
+                on_stack.add(nxt)
+                stack.append(iter(graph.get(nxt, ())))
+    return cycles
+
+def build_conditions_report(schema: dict, journey: str, parser: str) -> dict:
+    """Conditions report for a KYCP schema (fields[]) or legacy schema (items[])"""
+    is_kycp = 'fields' in schema
+    fields = (schema.get('fields') or []) if is_kycp else legacy_fields(schema)
+    by_key = {}
+    for f in fields:
+        by_key.setdefault(f.get('key'), f)
+    options_by_key: dict[str, set[str]] = {}
+
+    summaries, lints, edges = [], [], []
+    unresolved: dict[str, list[str]] = {}
+    mismatches = []
+    for f in fields:
+        rules = f.get('visibility') or []
+        if not rules:
+            continue
+        key = f.get('key')
+        sources = []
+        issues = []
+        for rule in rules:
+            for c in rule.get('conditions') or []:
+                src, op = c.get('sourceKey'), c.get('operator')
+                raw = '' if c.get('value') is None else str(c.get('value'))
+                if src not in sources:
+                    sources.append(src)
+                if '||' in raw or '&&' in raw:
+                    issues.append({'type': 'parse_error', 'message': f"Operator tokens found inside value '{raw}'"})
+                source = by_key.get(src)
+                if source is None:
+                    issues.append({'type': 'unresolved_key', 'message': f"Unknown controller '{src}'"})
+                    users = unresolved.setdefault(src, [])
+                    if key not in users:
+                        users.append(key)
+                else:
+                    edges.append((src, key))
+                    if op in COMPARISON_OPS and source.get('type') in OPTION_TYPES:
+                        if src not in options_by_key:
+                            options_by_key[src] = option_set(source)
+                        options = options_by_key[src]
+                        value = BOOLEAN_TEXT.get(raw.strip().lower(), raw).lower()
+                        if value not in options and not any(a in options for a in VALUE_ALIASES.get(value, ())):
+                            issues.append({
+                                'type': 'option_mismatch',
+                                'message': f"Value '{raw}' not found in options of '{src}'",
+                                'options': sorted(options)
+                            })
+                            mismatches.append({'key': key, 'sourceKey': src, 'value': raw, 'options': sorted(options)})
+                if NUMERIC_RE.match(raw):
+                    issues.append({'type': 'suspicious_numeric_value', 'message': f"Numeric value '{raw}' in condition may be a group index"})
+        summaries.append({
+            'key': key,
+            'label': f.get('label'),
+            'rules': [rule_text(r) for r in rules],
+            'sources': sources
+        })
+        if issues:
+            lints.append({'key': key, 'label': f.get('label'), 'issues': issues})
+
+    cycles = find_cycles(edges)
+    return {
+        'journey': journey,
+        'isKycp': is_kycp,
+        'parser': parser,
+        'totals': {
+            'fields': len(fields),
+            'withVisibility': len(summaries),
+            'lints': len(lints),
+            'edges': len(edges),
+            'cycles': len(cycles),
+            'unresolvedKeys': len(unresolved),
+            'optionMismatches': len(mismatches)
+        },
+        'fields': summaries,
+        'unresolved': [{'sourceKey': k, 'fields': v} for k, v in unresolved.items()],
+        'optionMismatches': mismatches,
+        'lints': lints,
+        'cycles': cycles
+    }
+
+def write_conditions_report(schema: dict, journey: str, parser: str, out_dir: Path | None = None) -> Path:
+    """Build the report and write it atomically to data/generated/conditions-reports/<journey>.json
+
+    With out_dir it goes to <out_dir>/conditions-report.json instead, outside
+    what the conditions-report API serves.
+    """
+    report = build_conditions_report(schema, journey, parser)
+    out = Path(out_dir) / 'conditions-report.json' if out_dir else REPORT_DIR / f"{journey}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp, out)
+    t = report['totals']
+    info(f"Conditions report written to: {out} ({t['lints']} fields with lints, "
+         f"{t['unresolvedKeys']} unresolved keys, {t['optionMismatches']} option mismatches)")
+    return out
+
+def main():
+    import yaml
+    ap = argparse.ArgumentParser(description='Rebuild conditions reports from the schemas on disk')
+    ap.add_argument('journeys', nargs='*', help='Journey keys (default: every journey with a schema)')
+    args = ap.parse_args()
+
+    schemas_dir = DATA_DIR / 'schemas'
+    journeys = args.journeys or sorted(p.name for p in schemas_dir.iterdir() if p.is_dir())
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    failed = 0
+    for journey in journeys:
+        for name in ('schema-kycp.yaml', 'schema.yaml'):
+            path = schemas_dir / journey / name
+            if path.exists():
+                break
+        else:
+            warn(f"No schema for {journey}")
+            failed += 1
+            continue
+        with path.open('r', encoding='utf-8') as f:
+            schema = yaml.load(f, Loader=loader) or {}
+        write_conditions_report(schema, journey, parser=f"conditions_report.py ({name})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
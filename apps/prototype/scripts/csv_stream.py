@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Streaming CSV ingestion for the CSV journeys (sprint-2-testing-flow, wicked-problem-areas)
+
+Rows come off the csv reader one at a time and are handed straight to field
+construction, so an export of any size is read in constant memory:
+
+    from csv_stream import stream_rows
+    for row_num, row in stream_rows(INCOMING, mapping):
+        field = create_field(row, ...)
+
+Every row is cleaned the same way before it is yielded:
+- header names and cells stripped, missing cells read as ''
+- fully blank rows skipped (recorded as 'blank' in the exclusion ledger)
+- the mapping's `csv_repairs` rules applied, in order
+- the mapping's `row_overrides` for the row's id column value applied, e.g.
+  {"Description-new-application": {"Helper": ""}}
+
+A repair rule is {"repair": <name>, ...}, optionally limited with
+"where": {<column>: <value>}. Built in:
+  replace     {"column": c, "old": s, "new": s}    substring replace in one cell
+  join_lines  {"column": c, "separator": ", "}     fold a multi-line cell onto one line
+Register more with @repair('<name>') on a function (row, rule) that edits the
+row in place. Rules are checked when the stream opens, so a typo in the
+mapping fails before any row is read.
+
+Usage:
+  python apps/prototype/scripts/csv_stream.py sprint-2-testing-flow      # print cleaned rows as JSON lines
+"""
+from __future__ import annotations
+import csv, importlib, json, sys
+from pathlib import Path
+from typing import Callable, Iterator
+
+from compiled_mapping import load_compiled_mapping
+from exclusion_ledger import exclusions
+from import_metrics import metrics
+
+# Journeys main() can print, and the importer whose MAPPING/input it reads
+IMPORTERS = {
+    'sprint-2-testing-flow': 'import_sprint_2_testing_flow',
+    'wicked-problem-areas': 'import_csv_wicked_problem_areas',
+}
+
+REPAIRS: dict[str, Callable[[dict, dict], None]] = {}
+
+def repair(name: str):
+    """Register a row-repair rule usable from a mapping's csv_repairs"""
+    def register(fn):
+        REPAIRS[name] = fn
+        return fn
+    return register
+
+@repair('replace')
+def repair_replace(row: dict, rule: dict):
+    col = rule['column']
+    row[col] = row.get(col, '').replace(rule['old'], rule.get('new', ''))
+
+@repair('join_lines')
+def repair_join_lines(row: dict, rule: dict):
+    col = rule['column']
+    lines = [line.strip() for line in row.get(col, '').splitlines()]
+    row[col] = rule.get('separator', ' ').join(line for line in lines if line)
+
+def compile_repairs(rules: list[dict]) -> list[tuple[Callable, dict, dict]]:
+    compiled = []
+    for rule in rules or []:
+        fn = REPAIRS.get(rule.get('repair'))
+        if fn is None:
+            raise ValueError(f"Unknown csv repair '{rule.get('repair')}' (known: {', '.join(sorted(REPAIRS))})")
+        compiled.append((fn, rule, rule.get('where') or {}))
+    return compiled
+
+def stream_rows(csv_path: Path, mapping: dict) -> Iterator[tuple[int, dict]]:
+    """Yield (row number, cleaned row) for each non-blank data row"""
+    repairs = compile_repairs(mapping.get('csv_repairs'))
+    overrides = mapping.get('row_overrides') or {}
+    id_col = (mapping.get('columns') or {}).get('id')
+    first_row = mapping.get('header_row', 1) + 1
+    # Universal newlines: line breaks inside cells read as '\n' whatever the export used
+    with open(csv_path, 'r', encoding=mapping.get('encoding', 'utf-8-sig')) as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        for row_num, cells in enumerate(reader, start=first_row):
+            metrics.count('rows.read')
+            row = {h: (cells[i].strip() if i < len(cells) else '') for i, h in enumerate(header)}
+            if not any(row.values()):
+                exclusions.record('blank', row_num)
+                continue
+            for fn, rule, where in repairs:
+                if all(row.get(c) == v for c, v in where.items()):
+                    fn(row, rule)
+                    metrics.count(f"csv.repairs.{rule['repair']}")
+            override = overrides.get(row.get(id_col)) if id_col else None
+            if override:
+                row.update(override)
+                metrics.count('csv.overrides')
+            yield row_num, row
+
+def main():
+    key = sys.argv[1] if len(sys.argv) > 1 else 'sprint-2-testing-flow'
+    if key not in IMPORTERS:
+        print(f"ERROR: unknown CSV journey '{key}' (known: {', '.join(IMPORTERS)})", file=sys.stderr)
+        return 2
+    module = importlib.import_module(IMPORTERS[key])
+    mapping = load_compiled_mapping(module.MAPPING)
+    source = getattr(module, 'INCOMING_CSV', None) or module.INCOMING
+    for row_num, row in stream_rows(source, mapping):
+        print(json.dumps({'row': row_num, **row}, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Exclusion ledger: which rule dropped each sheet row
+
+Importers record every row they leave out, with the rule that fired, instead
+of a bare `continue`:
+
+    from exclusion_ledger import exclusions
+    exclusions.start()
+    ...
+    exclusions.record('internal', row_num, keyname, label, detail='a')
+
+record() also bumps the rows.excluded.<rule> counter in import_metrics, so
+the summary counts and the ledger always agree. Entries are appended to one
+list per column (row, key, label, rule, detail); nothing else is built until
+the ledger is written.
+
+write() puts exclusions.csv next to the importer summary
+(data/generated/importer-cli/<journey>/), plus exclusions.parquet when pyarrow
+is installed. Rows outside the mapping's PROGRAMME/ENTITY filters belong to
+other journeys and are only counted (rows.excluded.filters), not listed.
+
+Usage:
+  python apps/prototype/scripts/exclusion_ledger.py non-lux-lp-2-2                 # rows excluded per rule
+  python apps/prototype/scripts/exclusion_ledger.py non-lux-lp-2-2 --rule label    # list the rows one rule dropped
+"""
+from __future__ import annotations
+import argparse, csv, sys
+from collections import Counter
+from pathlib import Path
+
+import import_metrics
+from import_metrics import metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+COLUMNS = ('row', 'key', 'label', 'rule', 'detail')
+
+class ExclusionLedger:
+    def __init__(self):
+        self.start()
+
+    def start(self):
+        """Begin a new import; drops whatever an earlier run in this process recorded"""
+        self.columns: dict[str, list] = {c: [] for c in COLUMNS}
+
+    def record(self, rule: str, row: int | None, key: str = '', label: str = '', detail: str = ''):
+        metrics.count(f'rows.excluded.{rule}')
+        cols = self.columns
+        cols['row'].append(row)
+        cols['key'].append(key or '')
+        cols['label'].append(label or '')
+        cols['rule'].append(rule)
+        cols['detail'].append(detail or '')
+
+    def __len__(self) -> int:
+        return len(self.columns['rule'])
+
+    def counts(self) -> dict[str, int]:
+        """Rows per rule, in the order the rules first fired"""
+        return dict(Counter(self.columns['rule']))
+
+    def write(self, journey: str, out_dir: Path | None = None) -> Path:
+        """Write exclusions.csv (and exclusions.parquet with pyarrow); returns the CSV path"""
+        # import_metrics.SUMMARY_DIR is read here, not at import, so redirecting it (bench_importers) applies
+        out_dir = Path(out_dir) if out_dir else import_metrics.SUMMARY_DIR / journey
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out = out_dir / 'exclusions.csv'
+        with metrics.span('exclusion ledger'):
+            with open(out, 'w', encoding='utf-8', newline='') as f:
+                w = csv.writer(f)
+                w.writerow(COLUMNS)
+                w.writerows(zip(*(self.columns[c] for c in COLUMNS)))
+            if pa is not None:
+                pq.write_table(pa.table(self.columns), out_dir / 'exclusions.parquet')
+        return out
+
+exclusions = ExclusionLedger()
+
+def main():
+    ap = argparse.ArgumentParser(description='Summarise or list the rows an importer excluded')
+    ap.add_argument('journey', help='Journey key (directory under data/generated/importer-cli)')
+    ap.add_argument('--rule', help='List the rows this rule excluded')
+    args = ap.parse_args()
+
+    path = import_metrics.SUMMARY_DIR / args.journey / 'exclusions.csv'
+    if not path.exists():
+        print(f"ERROR: No exclusion ledger at {path}; run the importer first", file=sys.stderr)
+        return 1
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        entries = list(csv.DictReader(f))
+    if args.rule:
+        for e in entries:
+            if e['rule'] == args.rule:
+                print(f"{e['row']:>6}  {e['key']:<40} {e['detail']:<24} {e['label'][:60]}")
+        return 0
+    print(f"{args.journey}: {len(entries)} rows excluded")
+    for rule, n in Counter(e['rule'] for e in entries).most_common():
+        print(f"  {rule:<24} {n:>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Fan-out import: one journey per PROGRAMME/ENTITY combination, one workbook read
+
+The 2.x mappings pin a single `filters` pair (PROGRAMME/ENTITY). Fan-out keeps
+the mapping's layout but ignores the pinned values: the sheet and the Lookup
+Values sheet are parsed once, rows are grouped by the mapping's filter columns
+in a single pass, and a schema is built for every combination (or the ones
+asked for) with the importer's own generate_schema. Journeys build in parallel
+worker processes; each worker gets only its group's rows.
+
+A blank filter cell, or one starting with "All" ("All", "All Non Lux"), is not
+a combination of its own: the row is shared by every combination it covers,
+in sheet order. "All <words>" covers a value containing those words in order,
+each as a word prefix ("All Non Lux" covers "... - Non Luxembourg"), and a
+scope without "Non" never covers a "Non ..." value.
+
+Each journey is written to data/generated/fan-out/<importer>/<journey>/
+(schema-kycp.yaml, copy-map.json, exclusions.csv, conditions-report.json,
+summary.json), so committed schemas and the conditions reports the prototype
+serves are never touched. An index.json in the fan-out directory lists every
+combination, its row count and where its schema went. Journey keys are the
+importer key plus the slugified filter values.
+
+--check builds the combination the mapping pins and compares it, byte for
+byte, with what the importer writes for the same workbook (schema YAML and
+copy map); it only holds for a workbook of that one combination, such as the
+importer's own INCOMING.
+
+Usage:
+  python apps/prototype/scripts/fan_out_import.py --list
+  python apps/prototype/scripts/fan_out_import.py --check
+  python apps/prototype/scripts/fan_out_import.py --input data/generated/synthetic/non-lux-lp-2-2-20000.xlsx --jobs 4
+  python apps/prototype/scripts/fan_out_import.py non-lux-lp-2-1 --only non-lux-lp-2-1-account-is-for-a-fund-cis-non-luxembourg-limited-partnership
+"""
+from __future__ import annotations
+import argparse, importlib, json, os, sys, time, yaml
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from zipfile import ZipFile
+
+from conditions_report import write_conditions_report
+from exclusion_ledger import exclusions
+from identifiers import slugify
+from import_metrics import metrics, write_import_summary
+from validate_kycp_schema import check_kycp_schema
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+FAN_OUT_DIR = DATA_DIR / 'generated' / 'fan-out'
+
+# Importers whose parse_worksheet/collect_lookup_values/generate_schema fan-out reuses
+IMPORTERS = {
+    'non-lux-lp-2-1': 'import_non_lux_2_1',
+    'non-lux-lp-2-2': 'import_non_lux_2_2',
+}
+
+def warn(msg: str):
+    print(f"[warn] {msg}", file=sys.stderr)
+
+def info(msg: str):
+    print(f"[info] {msg}")
+
+def is_wildcard(value: str) -> bool:
+    return not value or slugify(value, '').split('-')[0] == 'all'
+
+def covers(value: str, concrete: str) -> bool:
+    """Whether a row with this filter value belongs to the `concrete` combination value"""
+    if not is_wildcard(value):
+        return value == concrete
+    scope = slugify(value, '').split('-')[1:]
+    target = slugify(concrete, '').split('-')
+    if not scope:
+        return True
+    for i in range(len(target) - len(scope) + 1):
+        if all(target[i + j].startswith(w) for j, w in enumerate(scope)):
+            # "All Lux" must not cover "Non Luxembourg"
+            if scope[0] != 'non' and i and target[i - 1] == 'non':
+                continue
+            return True
+    return False
+
+def group_rows(rows: dict, mapping: dict) -> tuple[list[str], dict[tuple, list[int]], int]:
+    """Index data rows by their filter-column values: (values) -> row numbers, in sheet order
+
+    Rows with a blank or "All ..." filter value are added to every combination
+    they cover; the third value is how many such rows covered none.
+    """
+    header_row = mapping.get('header_row', 2)
+    headers = rows.get(header_row) or {}
+    filter_cols = list(mapping.get('filters') or {})
+    letters = []
+    for name in filter_cols:
+        letter = next((l for l, h in headers.items() if h == name), None)
+        if letter is None:
+            raise ValueError(f"Filter column '{name}' not found in header row {header_row}")
+        letters.append(letter)
+    groups: dict[tuple, list[int]] = {}
+    shared: dict[tuple, list[int]] = {}
+    for num, row in rows.items():
+        if num <= header_row:
+            continue
+        values = tuple((row.get(l) or '').strip() for l in letters)
+        target = shared if any(is_wildcard(v) for v in values) else groups
+        target.setdefault(values, []).append(num)
+    unmatched = 0
+    for values, nums in shared.items():
+        combos = [c for c in groups if all(covers(v, cv) for v, cv in zip(values, c))]
+        for combo in combos:
+            groups[combo] = sorted(groups[combo] + nums)
+        unmatched += 0 if combos else len(nums)
+    return filter_cols, groups, unmatched
+
+def build_journey(module_name: str, key: str, filters: dict, rows: dict, mapping: dict, lookups: dict, out_dir: str) -> dict:
+    """Worker: build, validate and write one combination's schema"""
+    module = importlib.import_module(module_name)
+    started = time.perf_counter()
+    metrics.start(key)
+    exclusions.start()
+    with metrics.span('field build'):
+        schema, copy_map = module.generate_schema(rows, mapping, lookups)
+    schema['key'] = key
+    schema['name'] = f"{schema['name']} — {' / '.join(filters.values())}"
+    metrics.count('fields.written', len(schema['fields']))
+    with metrics.span('validate'):
+        valid = check_kycp_schema(schema)
+    result = {'journey': key, 'filters': filters, 'rows': len(rows) - 1, 'fields': len(schema['fields']),
+              'excluded': exclusions.counts(), 'valid': valid}
+    if not valid:
+        return result
+    out = Path(out_dir) / key
+    out.mkdir(parents=True, exist_ok=True)
+    with metrics.span('yaml dump'), open(out / 'schema-kycp.yaml', 'w', encoding='utf-8') as f:
+        yaml.dump(schema, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    (out / 'copy-map.json').write_text(json.dumps(copy_map, indent=2, ensure_ascii=False), encoding='utf-8')
+    exclusions.write(key, out)
+    with metrics.span('conditions report'):
+        write_conditions_report(schema, key, parser='fan_out_import.py', out_dir=out)
+    write_import_summary(key, {'input_file': mapping.get('_input_file'), 'sheet': mapping['sheet'], 'filters': filters,
+                               'fields_created': len(schema['fields']), 'fields_excluded': len(exclusions)}, out_dir=out)
+    result.update({'schema': str(out / 'schema-kycp.yaml'), 'seconds': round(time.perf_counter() - started, 3)})
+    return result
+
+def importer_output(module, rows: dict, mapping: dict, lookups: dict) -> tuple[str, str]:
+    """Schema YAML and copy-map JSON exactly as the importer's main() writes them"""
+    schema, copy_map = module.generate_schema(rows, mapping, lookups)
+    return (yaml.dump(schema, default_flow_style=False, allow_unicode=True, sort_keys=False),
+            json.dumps(copy_map, indent=2, ensure_ascii=False))
+
+def check_pinned(module, rows: dict, groups: dict, mapping: dict, lookups: dict) -> bool:
+    """The pinned combination's build equals the importer's build of the whole workbook"""
+    pinned = tuple(str(v).strip() for v in (mapping.get('filters') or {}).values())
+    if pinned not in groups:
+        print(f"ERROR: no rows for the mapping's filters {' / '.join(pinned)}", file=sys.stderr)
+        return False
+    header_row = mapping.get('header_row', 2)
+    subset = {header_row: rows[header_row], **{n: rows[n] for n in groups[pinned]}}
+    same = True
+    for what, ours, theirs in zip(('schema', 'copy map'), importer_output(module, subset, mapping, lookups),
+                                  importer_output(module, rows, mapping, lookups)):
+        if ours == theirs:
+            info(f"{what}: identical to the importer's ({len(ours)} bytes)")
+        else:
+            same = False
+            print(f"ERROR: {what} differs from the importer's ({len(ours)} vs {len(theirs)} bytes)", file=sys.stderr)
+    return same
+
+def main():
+    ap = argparse.ArgumentParser(description='Build one journey per PROGRAMME/ENTITY combination from a single workbook read')
+    ap.add_argument('importer', nargs='?', default='non-lux-lp-2-2', choices=sorted(IMPORTERS), help='Importer whose mapping and schema builder to use')
+    ap.add_argument('--input', type=Path, help="Workbook to read (default: the importer's INCOMING)")
+    ap.add_argument('--only', action='append', default=[], help='Journey key to build (repeatable; default: every combination)')
+    ap.add_argument('--min-rows', type=int, default=1, help='Skip combinations with fewer data rows')
+    ap.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, help='Journeys to build in parallel')
+    ap.add_argument('--out-dir', type=Path, help='Output directory (default: data/generated/fan-out/<importer>)')
+    ap.add_argument('--list', action='store_true', help='Print the combinations found and exit')
+    ap.add_argument('--check', action='store_true', help="Check the mapping's own combination builds exactly as the importer does, and exit")
+    args = ap.parse_args()
+
+    module_name = IMPORTERS[args.importer]
+    module = importlib.import_module(module_name)
+    source = args.input or module.INCOMING
+    if not source.exists():
+        print(f"ERROR: Input file not found: {source}", file=sys.stderr)
+        return 1
+    mapping = module.load_mapping()
+    mapping['_input_file'] = source.name
+    header_row = mapping.get('header_row', 2)
+
+    started = time.perf_counter()
+    with ZipFile(source) as z:
+        rows = module.parse_worksheet(z, mapping['sheet'], mapping)
+        lookups = module.collect_lookup_values(z, mapping)
+    try:
+        filter_cols, groups, unmatched = group_rows(rows, mapping)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    read_seconds = round(time.perf_counter() - started, 3)
+    info(f"Read {len(rows) - 1} rows and {len(lookups)} lookup types in {read_seconds}s; "
+         f"{len(groups)} {'/'.join(filter_cols)} combinations")
+    if unmatched:
+        warn(f"{unmatched} rows with a blank or 'All ...' filter value match no combination; left out")
+    if args.check:
+        return 0 if check_pinned(module, rows, groups, mapping, lookups) else 1
+
+    # Journey key: importer key plus the slugified filter values
+    keyed = {slugify(' '.join((args.importer,) + values)): values for values in groups}
+    if args.list:
+        for key, values in keyed.items():
+            print(f"{len(groups[values]):>6} rows  {key}")
+            for col, value in zip(filter_cols, values):
+                print(f"          {col}: {value}")
+        return 0
+
+    unknown = [k for k in args.only if k not in keyed]
+    if unknown:
+        print(f"ERROR: no rows for: {', '.join(unknown)} (see --list)", file=sys.stderr)
+        return 2
+    wanted = [k for k in keyed if (not args.only or k in args.only) and len(groups[keyed[k]]) >= args.min_rows]
+    out_dir = args.out_dir or FAN_OUT_DIR / args.importer
+
+    jobs = []
+    for key in wanted:
+        values = keyed[key]
+        subset = {header_row: rows[header_row], **{n: rows[n] for n in groups[values]}}
+        jobs.append((module_name, key, dict(zip(filter_cols, values)), subset, mapping, lookups, str(out_dir)))
+
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(jobs))) as pool:
+            results = list(pool.map(build_journey, *zip(*jobs)))
+    else:
+        results = [build_journey(*job) for job in jobs]
+
+    for r in results:
+        if r['valid']:
+            info(f"{r['journey']}: {r['fields']} fields from {r['rows']} rows in {r['seconds']}s")
+        else:
+            warn(f"{r['journey']}: schema failed KYCP validation; not written")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    index = {
+        'timestamp': datetime.now().isoformat(),
+        'importer': args.importer,
+        'input_file': str(source),
+        'read_seconds': read_seconds,
+        'seconds': round(time.perf_counter() - started, 3),
+        'journeys': results
+    }
+    (out_dir / 'index.json').write_text(json.dumps(index, indent=2, ensure_ascii=False), encoding='utf-8')
+    info(f"Built {sum(r['valid'] for r in results)} of {len(results)} journeys in {index['seconds']}s; index: {out_dir / 'index.json'}")
+    return 0 if all(r['valid'] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
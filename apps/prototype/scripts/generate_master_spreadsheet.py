@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Synthetic master spreadsheets for stressing the importers
+
+Writes a workbook (or CSV) in the column layout a mapping expects, filled with
+made-up but realistic rows:
+- KEYNAMEs in the GEN/SPE CamelCase style, unique per journey,
+- a Lookup Values sheet with the mapping's fallback lookups (Country and the
+  industry list point at a "separate list sheet", as in the real workbook)
+  plus generated lookup types,
+- PAUL Question Order / Section Suggestion strings built from the mapping's
+  paul_sections ("31 - B4.1", "B4.1 - ..."),
+- visibility expressions that only reference lookups from earlier rows, using
+  the spreadsheet syntax (`=`, `<>`, AND/OR on separate lines, the odd
+  upper-case or aliased value) with a chosen distribution of chain depths,
+- data types, INTERNAL/SYSTEM flags and "(internal)" actions at roughly the
+  rates of the 2.1 master spreadsheet, so every exclusion rule fires.
+
+Workbook layouts (header_row 2, e.g. non-lux-lp-2-2) get the full 2.x column
+set. CSV layouts (source_format csv, e.g. wicked-problem-areas) get the
+mapping's columns; they carry no visibility column, so --depth is ignored.
+
+--programmes/--entities repeat the question bank for several PROGRAMME/ENTITY
+combinations; the mapping's own filters are always the first combination.
+The workbook is written with the standard library only (shared strings, no
+styles), the same parts the importers read.
+
+Usage:
+  python apps/prototype/scripts/generate_master_spreadsheet.py non-lux-lp-2-2 --rows 20000
+  python apps/prototype/scripts/generate_master_spreadsheet.py non-lux-lp-2-2 --rows 5000 --depth 0:50,1:25,2:15,4:10 --seed 7
+  python apps/prototype/scripts/generate_master_spreadsheet.py non-lux-lp-2-2 --programmes 3 --entities 4 --out /tmp/multi.xlsx
+  python apps/prototype/scripts/generate_master_spreadsheet.py wicked-problem-areas --rows 10000
+"""
+from __future__ import annotations
+import argparse, csv, json, random, sys
+from pathlib import Path
+from xml.sax.saxutils import escape
+from zipfile import ZipFile, ZIP_DEFLATED
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+MAPPINGS_DIR = DATA_DIR / 'mappings'
+OUT_DIR = DATA_DIR / 'generated' / 'synthetic'
+
+# Header row of the 2.x master spreadsheet (LP Proposal), in sheet order
+WORKBOOK_HEADERS = [
+    'REF', 'PROGRAMME', 'ENTITY', 'KEYNAME', 'FIELD NAME', 'DESCRIPTION', 'Used for', 'CRM Mapping Info', 'Asked?',
+    'Action', 'Reworded?', 'Nile Suggested Field Name', 'Nile Suggested Description', 'Nile Suggested Section',
+    'VISIBILITY CONDITION/GROUP NAME', 'Live Question Order', 'PAUL Question Order', 'PAUL Section Suggestion',
+    'DATA TYPE', 'LOOKUP', 'COMPLEX', 'SHARED', 'IDENTIFICATION', 'CRITICAL', 'INTERNAL', 'SYSTEM', 'SEARCH',
+    'MANDATORY', 'FIELD TYPE', 'SCREENING FIELDS', 'COMPLEX IDENTIFIER', 'STAGE', 'PRE-INCORP\nPRE-POPULATED WITH…',
+    'FA \nPRE-POPULATED WITH…', 'NEWNEW\nPRE-POPULATED WITH…', 'FIELD LENGTH', 'REGEX', 'IPB \nPRE-POPULATION',
+    'SCRIPT', 'KYCP', 'COT'
+]
+LOOKUP_HEADERS = ['LOOKUP TYPE', 'LOOKUP VALUE', 'Project Stealth Notes', 'EXTERNAL REFERENCE', 'DEFAULT']
+SEPARATE_LIST_SHEETS = ('Country', 'Industry description incl SIC code')
+
+# DATA TYPE frequencies in the 2.1 master spreadsheet
+DATA_TYPES = {
+    'Lookup': 381, 'Free Text': 126, 'String': 96, 'Title': 58, 'Statement': 34, 'Complex': 19,
+    'Repeated Lookup': 16, 'Date & Time': 12, 'Decimal': 11, 'Free text': 10, 'Integer': 8, 'Repeated String': 6
+}
+CONTROLLER_TYPES = ('Lookup', 'Repeated Lookup')
+CSV_FIELD_TYPES = {'Lookup': 45, 'Free Text': 30, 'String': 10, 'Number': 6, 'Date': 5, 'Decimal': 4}
+
+# Share of rows carrying each flag/value in the 2.1 master spreadsheet
+RATES = {
+    'internal': 0.39, 'system': 0.18, 'internal_action': 0.095, 'mandatory': 0.5, 'no_keyname': 0.005,
+    'no_paul_order': 0.1, 'duplicate_paul_order': 0.03, 'reworded': 0.25, 'nile_label': 0.1, 'help': 0.45,
+    'upper_case_value': 0.1, 'neq': 0.15, 'or_branch': 0.08, 'dangling_source': 0.01, 'unknown_lookup': 0.01,
+    'yes_no_lookup': 0.4, 'fallback_lookup': 0.2, 'field_type': 0.02, 'complex_member': 0.2, 'internal_label': 0.02
+}
+ACTIONS = ['DA', 'Nile - Rename section/s and questions to be considered', 'Keep']
+INTERNAL_ACTIONS = ['SM (internal)', 'LG (internal)', 'LD (internal)']
+FIELD_TYPE_FLAGS = ['IsName', 'IsEmail', 'IsSanction']
+
+PROGRAMMES = [
+    'Account is for - a Fund (CIS) - Luxembourg',
+    'Account is for - a Fund Related Entity - Non Luxembourg',
+    'Account is for - a Fund Related Entity - Luxembourg',
+    'Account is for - a Trust Company Business',
+    'Account is for - a Corporate'
+]
+ENTITIES = ['Limited Company', 'Unit Trust', 'Protected Cell Company', 'Foundation', 'Limited Liability Partnership']
+
+PREFIXES = {'GEN': 70, 'SPE': 15, 'FUN': 8, 'KYC': 7}
+TOPICS = ['IndicativeAppetite', 'Bank', 'CashMngtAcc', 'CurrentAcc', 'Fund', 'Tax', 'Introducer', 'Ownership',
+          'Purpose', 'Regulatory', 'Applicant', 'PEP', 'Product']
+NOUNS = ['Fund', 'Administrator', 'Domicile', 'Manager', 'Investor', 'Custodian', 'Account', 'Jurisdiction',
+         'Regulator', 'Licence', 'Turnover', 'Currency', 'Source', 'Wealth', 'Trust', 'Partner', 'Director',
+         'Signatory', 'Residency', 'Classification', 'Entity', 'Activity', 'Payment', 'Country', 'Registration',
+         'Contact', 'Channel', 'Share', 'Objective', 'Cashflow', 'Relationship', 'Statement', 'Frequency', 'Address',
+         'Adviser', 'Promoter', 'Auditor', 'Exchange', 'Listing', 'Structure', 'Deposit', 'Income', 'Asset']
+ADJECTIVES = ['primary', 'expected', 'registered', 'principal', 'previous', 'annual', 'main', 'regulated', 'ultimate']
+SECTIONS = ['Start a New Application', 'Business Appetite', 'Banking Requirements', 'About the Fund',
+            'Tax Classification', 'Controlling Parties', 'Source of Funds', 'Account Activity']
+REGEXES = ['^[A-NP-Z0-9]{6}[.][A-NP-Z0-9]{5}[.][A-NP-Z]{2}[.][0-9]{3}$', r'^(\d{0,2}(\.\d{1,2})?|100(\.00?)?)$']
+FIELD_LENGTHS = {'0.0': 86, '30.0': 3, '100.0': 2, '2000.0': 2, '300.0': 1}
+
+def warn(msg: str):
+    print(f"[warn] {msg}", file=sys.stderr)
+
+def info(msg: str):
+    print(f"[info] {msg}")
+
+def weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+def parse_depths(spec: str) -> dict[int, float]:
+    """'0:60,1:25,2:10,3:5' -> {depth: weight}"""
+    out = {}
+    for part in spec.split(','):
+        depth, _, weight = part.partition(':')
+        out[int(depth)] = float(weight or 1)
+    if not out or any(d < 0 for d in out) or sum(out.values()) <= 0:
+        raise argparse.ArgumentTypeError(f"invalid depth distribution: {spec}")
+    return out
+
+class Generator:
+    def __init__(self, mapping: dict, seed: int, depths: dict[int, float]):
+        self.mapping = mapping
+        self.rng = random.Random(seed)
+        self.depths = depths
+        self.keys: set[str] = set()
+        self.lookups: dict[str, list[str]] = {}
+        self.aliases = {canon.lower(): alias for canon, alias in (mapping.get('value_aliases') or {}).items() if alias}
+        self.build_lookups()
+
+    def build_lookups(self):
+        rng = self.rng
+        for name, values in (self.mapping.get('fallback_lookups') or {}).items():
+            self.lookups[name] = list(values)
+        self.lookups.setdefault('Yes/No', ['Yes', 'No'])
+        for i in range(40):
+            noun = rng.choice(NOUNS)
+            name = f"Type of {noun.lower()}" if i % 2 else f"What is the {rng.choice(ADJECTIVES)} {noun.lower()}?"
+            if name in self.lookups:
+                name = f"{name} ({i})"
+            count = rng.choice([2, 3, 3, 4, 5, 6, 8, 12])
+            self.lookups[name] = [f"{rng.choice(ADJECTIVES).capitalize()} {rng.choice(NOUNS).lower()} {j + 1}" for j in range(count)]
+
+    def keyname(self) -> str:
+        rng = self.rng
+        base = weighted(rng, PREFIXES) + rng.choice(TOPICS) + ''.join(rng.sample(NOUNS, rng.choice([1, 2, 2, 3])))
+        key, n = base, 1
+        while key in self.keys:
+            n += 1
+            key = f"{base}{n}"
+        self.keys.add(key)
+        return key
+
+    def label(self, data_type: str, nouns: list[str]) -> str:
+        rng = self.rng
+        phrase = f"{rng.choice(ADJECTIVES)} {' '.join(n.lower() for n in nouns)}"
+        if data_type == 'Title':
+            return ' '.join(nouns) + ' Details'
+        if data_type == 'Statement':
+            return f"Please tell us about the {phrase} so we can assess your application."
+        if data_type in CONTROLLER_TYPES:
+            return rng.choice([f"Does the entity have a {phrase}?", f"What is the {phrase}?", f"Select the {phrase}"])
+        if data_type in ('Decimal', 'Integer'):
+            return f"How many {nouns[-1].lower()}s does the {phrase} have?"
+        if data_type == 'Date & Time':
+            return f"What is the {phrase} date?"
+        return rng.choice([f"Please provide the {phrase}", f"What is the {phrase}?", f"Name of the {phrase}"])
+
+    def pick_lookup(self) -> str:
+        rng = self.rng
+        roll = rng.random()
+        if roll < RATES['unknown_lookup']:
+            return f"Missing list {rng.randint(1, 99)}"
+        if roll < RATES['yes_no_lookup']:
+            return 'Yes/No'
+        fallbacks = list(self.mapping.get('fallback_lookups') or {})
+        if fallbacks and roll < RATES['yes_no_lookup'] + RATES['fallback_lookup']:
+            return rng.choice(fallbacks)
+        return rng.choice(list(self.lookups))
+
+    def condition(self, controller: dict) -> str:
+        rng = self.rng
+        value = rng.choice(controller['options'])
+        if value.lower() in self.aliases and rng.random() < 0.5:
+            value = rng.choice(self.aliases[value.lower()]).upper()
+        elif rng.random() < RATES['upper_case_value']:
+            value = value.upper()
+        op = '<>' if rng.random() < RATES['neq'] else '='
+        return f"{controller['key']} {op} {value}"
+
+    def visibility(self, controllers: dict[int, list[dict]]) -> tuple[str, int]:
+        """Expression whose longest chain of controllers is the drawn depth (or the deepest available)"""
+        rng = self.rng
+        depth = weighted(rng, self.depths)
+        if depth == 0:
+            return '', 0
+        depth = min(depth, max((d + 1 for d, pool in controllers.items() if pool), default=0))
+        if depth == 0:
+            return '', 0
+        if rng.random() < RATES['dangling_source']:
+            return f"{weighted(rng, PREFIXES)}Removed{rng.choice(NOUNS)} = Yes", depth
+        main = rng.choice(controllers[depth - 1])
+        parts = [self.condition(main)]
+        roll = rng.random()
+        if roll < RATES['or_branch'] and len(main['options']) > 1:
+            other = rng.choice(main['options'])
+            return f"{parts[0]} OR {main['key']} = {other}", depth
+        if roll < 0.35:
+            shallower = [c for d in range(depth) for c in controllers.get(d, []) if c is not main]
+            if shallower:
+                parts.append(self.condition(rng.choice(shallower)))
+        return '\nAND\n'.join(parts), depth
+
+    def question_bank(self, count: int) -> list[dict]:
+        """Rows of one journey in sheet order; visibility only points back at earlier lookups"""
+        rng = self.rng
+        sections = list(self.mapping.get('paul_sections') or {}) or ['B1']
+        next_order = {code: i * max(1, count // len(sections)) + 1 for i, code in enumerate(sections)}
+        controllers: dict[int, list[dict]] = {}
+        complexes: list[str] = []
+        rows = []
+        section = sections[0]
+        for i in range(count):
+            if rng.random() < 0.15:
+                section = rng.choice(sections)
+            data_type = weighted(rng, DATA_TYPES)
+            nouns = rng.sample(NOUNS, 2)
+            key = '' if rng.random() < RATES['no_keyname'] else self.keyname()
+            row = {
+                'REF': '2.0', 'KEYNAME': key, 'FIELD NAME': self.label(data_type, nouns), 'DATA TYPE': data_type,
+                'Live Question Order': str(i + 1), 'FIELD LENGTH': weighted(rng, FIELD_LENGTHS),
+                'SHARED': rng.choice(['a', 'a', 'r', ''])
+            }
+            roll = rng.random()
+            if roll < RATES['internal_label'] / 2:
+                row['FIELD NAME'] = f"Internal analysis - {row['FIELD NAME']}"
+            elif roll < RATES['internal_label']:
+                row['FIELD NAME'] += ' (OBT to complete)'
+            if rng.random() < RATES['help']:
+                row['DESCRIPTION'] = f"For example: the {' and '.join(n.lower() for n in nouns)} recorded with your {rng.choice(NOUNS).lower()}."
+            if rng.random() >= RATES['no_paul_order']:
+                order = next_order[section]
+                if rng.random() >= RATES['duplicate_paul_order']:
+                    next_order[section] += 1
+                row['PAUL Question Order'] = f"{order} - {section}"
+                if rng.random() < 0.5:
+                    row['PAUL Section Suggestion'] = f"{section} - {self.mapping['paul_sections'][section]}" \
+                        if self.mapping.get('paul_sections') else ''
+            if data_type in CONTROLLER_TYPES:
+                row['LOOKUP'] = self.pick_lookup()
+            if data_type == 'Complex':
+                complexes.append(key)
+            elif complexes and rng.random() < RATES['complex_member']:
+                row['COMPLEX'] = rng.choice(complexes)
+            if rng.random() < RATES['mandatory']:
+                row['MANDATORY'] = 'a'
+            if rng.random() < RATES['internal']:
+                row['INTERNAL'] = 'a'
+            if rng.random() < RATES['system']:
+                row['SYSTEM'] = 'a'
+            row['Action'] = rng.choice(INTERNAL_ACTIONS) if rng.random() < RATES['internal_action'] \
+                else (rng.choice(ACTIONS) if rng.random() < 0.3 else '')
+            if rng.random() < RATES['reworded']:
+                row['Reworded?'] = rng.choice(['Y', 'Y', 'N', '?'])
+            if rng.random() < RATES['nile_label']:
+                row['Nile Suggested Field Name'] = row['FIELD NAME'].replace('Please provide', 'Tell us')
+            if rng.random() < RATES['field_type']:
+                row['FIELD TYPE'] = rng.choice(FIELD_TYPE_FLAGS)
+                if row['FIELD TYPE'] == 'IsName' and rng.random() < 0.5:
+                    row['REGEX'] = rng.choice(REGEXES)
+            if data_type not in ('Title',):
+                expr, depth = self.visibility(controllers)
+                row['VISIBILITY CONDITION/GROUP NAME'] = expr
+            else:
+                depth = 0
+            options = self.lookups.get(row.get('LOOKUP', ''))
+            if key and options and data_type in CONTROLLER_TYPES:
+                controllers.setdefault(depth, []).append({'key': key, 'options': options})
+            rows.append(row)
+        return rows
+
+    def csv_rows(self, count: int) -> list[dict]:
+        rng = self.rng
+        cols = self.mapping['columns']
+        areas = self.mapping.get('wicked_area_sections') or {'General': 'G - General'}
+        numbers: dict[str, int] = {}
+        fallbacks = list(self.mapping.get('fallback_lookups') or {})
+        rows = []
+        for _ in range(count):
+            area = rng.choice(list(areas))
+            letter = areas[area].split(' - ', 1)[0].strip() or area[0]
+            numbers[letter] = numbers.get(letter, 0) + 1
+            field_type = weighted(rng, CSV_FIELD_TYPES)
+            nouns = rng.sample(NOUNS, 2)
+            roll = rng.random()
+            if roll < RATES['no_keyname']:
+                key = ''
+            elif roll < 2 * RATES['no_keyname']:
+                key = f"[Application type {numbers[letter]}]"
+            else:
+                key = self.keyname()
+            lookup = ''
+            if field_type == 'Lookup':
+                roll = rng.random()
+                if roll < 0.6:
+                    lookup = ' | '.join(self.lookups[rng.choice(list(self.lookups))])
+                elif roll < 0.85 and fallbacks:
+                    lookup = rng.choice(fallbacks)
+            row = {
+                'wicked_area': area,
+                'q_number': f"{letter}{numbers[letter]}",
+                'id': key,
+                'label': self.label('Lookup' if field_type == 'Lookup' else 'Free Text', nouns),
+                'help': f"This is your {rng.choice(ADJECTIVES)} {nouns[0].lower()} for legal and tax purposes" if rng.random() < RATES['help'] else '',
+                'section': rng.choice(SECTIONS),
+                'field_type': field_type,
+                'lookup_values_inline': lookup
+            }
+            rows.append({cols[k]: v for k, v in row.items() if k in cols})
+        return rows
+
+    def lookup_rows(self) -> list[list[str]]:
+        rng = self.rng
+        rows = [LOOKUP_HEADERS]
+        for name in SEPARATE_LIST_SHEETS:
+            rows.append([name, f"Refer to separate {name.split()[0]} list sheet"])
+        for name, values in self.lookups.items():
+            if name in SEPARATE_LIST_SHEETS:
+                continue
+            for value in values:
+                rows.append([name, value, '', f"{rng.getrandbits(32):08x}-14c0-e811-80cb-005056a34623", ''])
+        return rows
+
+def column_letter(n: int) -> str:
+    out = ''
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        out = chr(65 + rem) + out
+    return out
+
+class SharedStrings:
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.count = 0
+
+    def ref(self, text: str) -> int:
+        self.count += 1
+        i = self.index.get(text)
+        if i is None:
+            i = self.index[text] = len(self.index)
+        return i
+
+    def xml(self) -> str:
+        items = ''.join(f'<si><t xml:space="preserve">{escape(s)}</t></si>' for s in self.index)
+        return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{self.count}" '
+                f'uniqueCount="{len(self.index)}">{items}</sst>')
+
+def sheet_xml(rows: list[tuple[int, list[str]]], sst: SharedStrings) -> str:
+    """rows: (row number, cell texts from column A); empty cells are left out"""
+    out = []
+    width = 1
+    for num, cells in rows:
+        width = max(width, len(cells))
+        parts = [f'<c r="{column_letter(i)}{num}" t="s"><v>{sst.ref(text)}</v></c>'
+                 for i, text in enumerate(cells, start=1) if text]
+        out.append(f'<row r="{num}">{"".join(parts)}</row>')
+    last = rows[-1][0] if rows else 1
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            f'<dimension ref="A1:{column_letter(width)}{last}"/><sheetData>{"".join(out)}</sheetData></worksheet>')
+
+def write_workbook(path: Path, sheets: list[tuple[str, list[tuple[int, list[str]]]]]):
+    sst = SharedStrings()
+    worksheets = [sheet_xml(rows, sst) for _, rows in sheets]
+    ns = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    content_types = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(sheets) + 1))
+    parts = {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            f'{content_types}</Types>'),
+        '_rels/.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{ns}/officeDocument" Target="xl/workbook.xml"/></Relationships>'),
+        'xl/workbook.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="{ns}"><sheets>'
+            + ''.join(f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>' for i, (name, _) in enumerate(sheets, start=1))
+            + '</sheets></workbook>'),
+        'xl/_rels/workbook.xml.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(f'<Relationship Id="rId{i}" Type="{ns}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in range(1, len(sheets) + 1))
+            + f'<Relationship Id="rId{len(sheets) + 1}" Type="{ns}/sharedStrings" Target="sharedStrings.xml"/>'
+            '</Relationships>'),
+    }
+    for i, xml in enumerate(worksheets, start=1):
+        parts[f'xl/worksheets/sheet{i}.xml'] = xml
+    parts['xl/sharedStrings.xml'] = sst.xml()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with ZipFile(path, 'w', ZIP_DEFLATED) as z:
+        for name, xml in parts.items():
+            z.writestr(name, xml)
+
+def combinations(mapping: dict, programmes: int, entities: int) -> list[tuple[str, str]]:
+    filters = mapping.get('filters') or {}
+    progs = [filters.get('PROGRAMME')] if filters.get('PROGRAMME') else []
+    ents = [filters.get('ENTITY')] if filters.get('ENTITY') else []
+    progs += [p for p in PROGRAMMES if p not in progs]
+    ents += [e for e in ENTITIES if e not in ents]
+    return [(p, e) for p in progs[:programmes] for e in ents[:entities]]
+
+def generate_workbook(gen: Generator, mapping: dict, rows: int, programmes: int, entities: int, out: Path) -> int:
+    headers = list(WORKBOOK_HEADERS)
+    for col in mapping['columns'].values():
+        if col not in headers and not col.startswith('---'):
+            headers.append(col)
+    header_row = int(mapping.get('header_row', 2))
+    combos = combinations(mapping, programmes, entities)
+    bank = gen.question_bank(max(1, rows // len(combos)))
+    sheet = [(header_row - 1, [''] * (headers.index('KYCP')) + ['GROUPS'])] if header_row > 1 else []
+    sheet.append((header_row, headers))
+    num = header_row
+    for i, (programme, entity) in enumerate(combos):
+        for row in bank:
+            num += 1
+            row = dict(row, PROGRAMME=programme, ENTITY=entity)
+            # Later combinations drop a few questions so the journeys differ
+            if i and gen.rng.random() < 0.1:
+                row['INTERNAL'] = 'a'
+            sheet.append((num, [row.get(h, '') for h in headers]))
+    lookups = list(enumerate(gen.lookup_rows(), start=1))
+    write_workbook(out, [(mapping.get('sheet', 'Sheet1'), sheet), (mapping.get('lookups_sheet', 'Lookup Values'), lookups)])
+    return num - header_row
+
+def generate_csv(gen: Generator, mapping: dict, rows: int, out: Path) -> int:
+    data = gen.csv_rows(rows)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open('w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(mapping['columns'].values()))
+        writer.writeheader()
+        writer.writerows(data)
+    return len(data)
+
+def main():
+    ap = argparse.ArgumentParser(description='Write a synthetic master spreadsheet in the layout of a mapping')
+    ap.add_argument('mapping', help='Mapping name in data/mappings (e.g. non-lux-lp-2-2) or a path to one')
+    ap.add_argument('--rows', type=int, default=1000, help='Data rows to write (split across programme/entity combinations)')
+    ap.add_argument('--depth', type=parse_depths, default=parse_depths('0:60,1:25,2:10,3:5'),
+                    help='Visibility chain depth distribution as depth:weight pairs')
+    ap.add_argument('--programmes', type=int, default=1, help='PROGRAMME values to repeat the question bank for')
+    ap.add_argument('--entities', type=int, default=1, help='ENTITY values to repeat the question bank for')
+    ap.add_argument('--seed', type=int, default=1, help='Random seed (same seed, same file)')
+    ap.add_argument('--out', type=Path, help='Output file (default: data/generated/synthetic/<mapping>-<rows>.xlsx|csv)')
+    args = ap.parse_args()
+
+    path = Path(args.mapping)
+    if not path.exists():
+        path = MAPPINGS_DIR / f"{args.mapping.removesuffix('.json')}.json"
+    if not path.exists():
+        print(f"ERROR: mapping not found: {args.mapping}", file=sys.stderr)
+        return 2
+    with path.open('r', encoding='utf-8') as f:
+        mapping = json.load(f)
+    if args.rows < 1:
+        print('ERROR: --rows must be at least 1', file=sys.stderr)
+        return 2
+
+    is_csv = mapping.get('source_format') == 'csv'
+    out = args.out or OUT_DIR / f"{path.stem}-{args.rows}.{'csv' if is_csv else 'xlsx'}"
+    gen = Generator(mapping, args.seed, args.depth)
+    if is_csv:
+        if args.programmes > 1 or args.entities > 1:
+            warn('CSV layouts have no PROGRAMME/ENTITY columns; --programmes/--entities ignored')
+        written = generate_csv(gen, mapping, args.rows, out)
+    else:
+        written = generate_workbook(gen, mapping, args.rows, max(1, args.programmes), max(1, args.entities), out)
+    info(f"Wrote {written} rows ({len(gen.keys)} KEYNAMEs, {len(gen.lookups)} lookup types) to {out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Identifiers: slugs and field IDs, one implementation for every importer
+
+slugify() follows the preview page's slugify() (pages/preview-kycp/[journey].vue)
+step for step, so accordion and section keys written by an importer are the
+slugs the frontend works out from the same titles:
+- NFKD-normalise, '&' -> ' and ', drop apostrophes/backticks, en/em dash -> '-'
+- every run of characters outside [a-zA-Z0-9] -> one '-', trim '-', lower-case
+- empty result -> fallback ('item'; the frontend uses 'legacy-content')
+
+sanitize_id() is the import_xlsx*.py field ID rule: whitespace runs -> '_',
+then anything outside [A-Za-z0-9_] dropped.
+
+Both use precompiled patterns and are memoized: section names, accordion
+titles and IDs repeat across thousands of rows.
+
+identifiers_golden.json pins the expected output for every title the importers
+slugify today plus edge cases (the slugify cases were produced by running the
+frontend function itself). Run --check after touching either function or the
+frontend's slugify.
+
+Usage:
+  python apps/prototype/scripts/identifiers.py --check          # compare against identifiers_golden.json
+  python apps/prototype/scripts/identifiers.py "Tax & Compliance"
+"""
+from __future__ import annotations
+import argparse, json, re, sys, unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+GOLDEN = Path(__file__).resolve().parent / 'identifiers_golden.json'
+
+_APOSTROPHES = re.compile(r"[’'`]")
+_DASHES = re.compile(r'[–—]')
+_NON_ALNUM = re.compile(r'[^a-zA-Z0-9]+')
+_SPACES = re.compile(r'\s+')
+_NON_ID = re.compile(r'[^A-Za-z0-9_]')
+
+@lru_cache(maxsize=8192)
+def slugify(s: str, fallback: str = 'item') -> str:
+    s = unicodedata.normalize('NFKD', s or '').replace('&', ' and ')
+    s = _DASHES.sub('-', _APOSTROPHES.sub('', s))
+    return _NON_ALNUM.sub('-', s).strip('-').lower() or fallback
+
+@lru_cache(maxsize=8192)
+def sanitize_id(raw: str) -> str:
+    """Create valid field ID from raw string"""
+    if not raw:
+        return ""
+    return _NON_ID.sub('', _SPACES.sub('_', raw.strip()))
+
+def check(golden: Path = GOLDEN) -> list[str]:
+    """Golden cases whose output has changed"""
+    cases = json.loads(golden.read_text(encoding='utf-8'))
+    fallback = cases['slugify']['fallback']
+    failures = []
+    for text, expected in cases['slugify']['cases'].items():
+        got = slugify(text, fallback)
+        if got != expected:
+            failures.append(f"slugify({text!r}) = {got!r}, expected {expected!r}")
+    for raw, expected in cases['sanitize_id']['cases'].items():
+        got = sanitize_id(raw)
+        if got != expected:
+            failures.append(f"sanitize_id({raw!r}) = {got!r}, expected {expected!r}")
+    return failures
+
+def main():
+    ap = argparse.ArgumentParser(description='Slugify text the way importers and the preview page do')
+    ap.add_argument('text', nargs='*', help='Text to slugify')
+    ap.add_argument('--check', action='store_true', help=f'Compare against {GOLDEN.name}')
+    args = ap.parse_args()
+
+    if args.check:
+        failures = check()
+        for f in failures:
+            print(f"[fail] {f}", file=sys.stderr)
+        if failures:
+            return 1
+        print(f"[ok] identifiers match {GOLDEN.name}")
+        return 0
+    for text in args.text:
+        print(f"{slugify(text)}\t{sanitize_id(text)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
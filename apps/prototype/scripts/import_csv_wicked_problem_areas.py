@@ -3,7 +3,7 @@
 Importer for CSV wicked problem areas → KYCP schema YAML
 
 Reads mapping from apps/prototype/data/mappings/wicked-problem-areas.json
-Parses the CSV and outputs:
+Streams the CSV (row repairs and overrides from the mapping) and outputs:
   apps/prototype/data/schemas/wicked-problem-areas/schema.yaml
 
 Features:
@@ -13,13 +13,23 @@ Features:
 - Audit trail with source row references
 """
 from __future__ import annotations
-import json, re, sys, yaml, csv
+import re, sys, yaml
 from pathlib import Path
+from typing import Iterator
+from as_is_index import as_is_fields
+from compiled_mapping import CompiledMapping, load_compiled_mapping
+from conditions_report import write_conditions_report
+from csv_stream import stream_rows
+from exclusion_ledger import exclusions
+from identifiers import slugify
+from import_metrics import metrics, write_import_summary
+from validate_kycp_schema import check_kycp_schema
 
 APP_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = APP_DIR / 'data'
 INCOMING = DATA_DIR / 'incoming' / 'P2140 - RBSI Onboarding wicked-problem-area-questions-sprint-2-testing-flow.csv'
 MAPPING = DATA_DIR / 'mappings' / 'wicked-problem-areas.json'
+AS_IS_FIELDS_PATH = DATA_DIR / 'generated' / 'as-is-audit' / 'curated-fields.json'
 OUT_DIR = DATA_DIR / 'schemas' / 'wicked-problem-areas'
 OUT_FILE = OUT_DIR / 'schema-kycp.yaml'
 
@@ -29,22 +39,6 @@ def warn(msg: str):
 def info(msg: str):
     print(f"[info] {msg}")
 
-def slugify(s: str) -> str:
-    s = (s or '').strip().lower()
-    s = s.replace('&', ' and ')
-    out = []
-    for ch in s:
-        if ch.isalnum():
-            out.append(ch)
-        elif ch in [' ', '-', '_']:
-            out.append('-')
-        else:
-            out.append('-')
-
-    result = ''.join(out)
-    result = re.sub(r'-+', '-', result).strip('-')
-    return result or 'untitled'
-
 def parse_lookup_values(value_str: str) -> list[str]:
     """Parse inline lookup values like 'Yes | No | Don't know yet'"""
     if not value_str or value_str.strip() == '':
@@ -54,160 +48,35 @@ def parse_lookup_values(value_str: str) -> list[str]:
     values = [v.strip() for v in value_str.split('|')]
     return [v for v in values if v]
 
-def normalize_field_type(field_type: str, mapping: dict) -> str:
+def normalize_field_type(field_type: str, mapping: CompiledMapping) -> str:
     """Convert field type using normalization rules"""
     if not field_type:
         return 'freeText'
 
-    normalization = mapping.get('normalization', {}).get('data_type', {})
-    return normalization.get(field_type, 'freeText')
-
-def process_csv_file(csv_path: Path, mapping: dict) -> list[dict]:
-    """Read and process CSV file according to mapping"""
-    rows = []
-
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-
-        for row_num, row in enumerate(reader, start=2):  # Start at 2 since header is row 1
-            # Skip empty rows
-            keyname = row.get(mapping['columns']['id'], '').strip()
-            question = row.get(mapping['columns']['label'], '').strip()
-
-            if not keyname or not question:
-                continue
-
-            # Extract field data
-            field_data = {
-                'source_row': row_num,
-                'keyname': keyname,
-                'question': question,
-                'helper': row.get(mapping['columns']['help'], '').strip(),
-                'section': row.get(mapping['columns']['section'], '').strip(),
-                'field_type': row.get(mapping['columns']['field_type'], '').strip(),
-                'lookup_values_inline': row.get(mapping['columns']['lookup_values_inline'], '').strip(),
-                'wicked_area': row.get(mapping['columns']['wicked_area'], '').strip(),
-                'q_number': row.get(mapping['columns']['q_number'], '').strip()
-            }
-
-            rows.append(field_data)
-
-    info(f"Processed {len(rows)} valid rows from CSV")
-    return rows
-
-def load_as_is_field_data() -> dict:
-    """Load AS-IS field definitions from existing schemas for reference"""
-    as_is_fields = {}
-
-    # Key AS-IS field data found from existing schemas
-    as_is_fields['GENCashMngtAccPurpose'] = {
-        'type': 'freeText',
-        'as_is_label': 'Please advise what the account is to be used for. For example, a combination of the following: payments of professional fees, dividend receipts/payments, rental income, expenses, trading income, purchases of wholesale goods, cash elements of an investment portfolio.',
-        'required': True,
-        'visibility': "GENcashmngtaccount == 'YES'"
-    }
-
-    as_is_fields['GENIndicativeAppetiteCountryRegistration'] = {
-        'type': 'lookup',
-        'as_is_label': 'In relation to the Incorporation of the entity requiring a bank account, can you please specify the Country of registration/formation/Establishment?',
-        'options': ['United Kingdom', 'United States', 'Jersey', 'Guernsey', 'Isle of Man', 'Gibraltar', 'France', 'Germany', 'Luxembourg', 'Ireland'],
-        'required': True
-    }
-
-    as_is_fields['GENFundInvestments'] = {
-        'type': 'freeText',
-        'as_is_label': 'What are the type of investments including details of asset classes and sectors?',
-        'required': True
-    }
-
-    as_is_fields['GENFundCurrency'] = {
-        'type': 'lookup',
-        'as_is_label': 'What is the currency denomination of the fund?',
-        'options': ['GBP', 'USD', 'EUR', 'CHF', 'JPY']
-    }
-
-    as_is_fields['GENFundClosed'] = {
-        'type': 'lookup',
-        'as_is_label': 'Has the fund had a final close?',
-        'options': ['Yes', 'No'],
-        'visibility': 'conditional'
-    }
-
-    as_is_fields['GENFundSize'] = {
-        'type': 'lookup',
-        'as_is_label': 'What is the fund size in the selected currency denomination?',
-        'options': ['< 50m', '50m - 250m', '250m - 500m', '500m - 750m', '750m - 1bn', '1bn - 2bn', '2bn - 5bn', '5bn - 10bn', '10bn - 20bn', '20bn +'],
-        'visibility': "GENFundClosed == 'Yes'"
-    }
-
-    as_is_fields['GENindustrysector'] = {
-        'type': 'lookup',
-        'as_is_label': 'Industry description incl SIC code',
-        'options': ['Agriculture', 'Manufacturing', 'Financial Services', 'Technology', 'Healthcare', 'Real Estate', 'Other']
-    }
-
-    as_is_fields['GENInvestorCountryComplex'] = {
-        'type': 'complex',
-        'as_is_label': 'Please provide details of the typical investors the fund is targeted at, e.g. institutional, private client, retail etc and where the investors are likely to be based. Please also include the percentage of each type of investor, e.g. 50% institutional, 50% private client.',
-        'children': ['GENInvestorType', 'GENInvestorTypeOther', 'GENInvestorCountry', 'GENInvestorTypePerc']
-    }
-
-    as_is_fields['GENAccountType'] = {
-        'type': 'lookup',
-        'as_is_label': 'Please specify the type of account you require.',
-        'options': ['Business Current Account', 'Business Treasury Cash Management Account']
-    }
-
-    as_is_fields['GENCashMngtAccTransCreditMonth'] = {
-        'type': 'number',
-        'as_is_label': '# of transactions per month',
-        'visibility': "GENCashMngtAccTransCreditIdenty == 'Yes'"
-    }
-
-    as_is_fields['GENcountryregistration'] = {
-        'type': 'lookup',
-        'as_is_label': 'Country of registration/formation',
-        'options': ['United Kingdom', 'United States', 'Jersey', 'Guernsey', 'Isle of Man', 'Gibraltar', 'France', 'Germany', 'Luxembourg', 'Ireland']
-    }
-
-    as_is_fields['GENIndicativeAppetiteRiskadverse'] = {
-        'type': 'lookup',
-        'as_is_label': 'Are there any Reputational, Environmental, Social and Ethical (ESE) or tax risks associated with the application?',
-        'options': ['Yes', 'No']
-    }
-
-    as_is_fields['GENtaxcountry'] = {
-        'type': 'lookup',
-        'as_is_label': 'Country',
-        'options': ['United Kingdom', 'United States', 'Jersey', 'Guernsey', 'Isle of Man', 'Gibraltar', 'France', 'Germany', 'Luxembourg', 'Ireland']
-    }
-
-    as_is_fields['GENknowtin'] = {
-        'type': 'lookup',
-        'as_is_label': 'Do you know the Tax identification number?',
-        'options': ['Yes', 'No']
-    }
-
-    as_is_fields['GENtin'] = {
-        'type': 'freeText',
-        'as_is_label': 'Provide Tax identification number or an equivalent',
-        'visibility': "GENknowtin == 'Yes'"
-    }
-
-    as_is_fields['GENincorpUSA'] = {
-        'type': 'lookup',
-        'as_is_label': 'Is the entity/organisation incorporated/organised in the USA?',
-        'options': ['Specified US Person', 'Other US Person', 'No']
-    }
-
-    as_is_fields['GENffi'] = {
-        'type': 'lookup',
-        'as_is_label': 'Is the entity/organisation a Financial Foreign Institution (FFI)?',
-        'options': ['Reporting FFI', 'Sponsored FFI', 'Other FFI', 'No', 'Trustee Documented Trust'],
-        'visibility': "GENincorpUSA != 'Specified US Person' && GENincorpUSA != 'Other US Person'"
-    }
-
-    return as_is_fields
+    return mapping.data_types.get(field_type, 'freeText')
+
+def process_csv_file(csv_path: Path, mapping: dict) -> Iterator[dict]:
+    """Stream CSV rows according to mapping"""
+    cols = mapping['columns']
+    for row_num, row in stream_rows(csv_path, mapping):
+        keyname = row.get(cols['id'], '')
+        question = row.get(cols['label'], '')
+        if not keyname or not question:
+            exclusions.record('no_keyname_or_question', row_num, keyname, question)
+            continue
+
+        # Extract field data
+        yield {
+            'source_row': row_num,
+            'keyname': keyname,
+            'question': question,
+            'helper': row.get(cols['help'], ''),
+            'section': row.get(cols['section'], ''),
+            'field_type': row.get(cols['field_type'], ''),
+            'lookup_values_inline': row.get(cols['lookup_values_inline'], ''),
+            'wicked_area': row.get(cols['wicked_area'], ''),
+            'q_number': row.get(cols['q_number'], '')
+        }
 
 def create_field(field_data: dict, mapping: dict, as_is_data: dict) -> dict:
     """Create a schema field merging CSV data (new Nile) with AS-IS field definitions"""
@@ -226,6 +95,7 @@ def create_field(field_data: dict, mapping: dict, as_is_data: dict) -> dict:
         field['help'] = field_data['helper']
 
     # Merge with AS-IS data if available
+    metrics.count('as_is.matched' if keyname in as_is_data else 'as_is.missing')
     if keyname in as_is_data:
         as_is = as_is_data[keyname]
 
@@ -263,6 +133,9 @@ def create_field(field_data: dict, mapping: dict, as_is_data: dict) -> dict:
             if 'Yes' in field_data['question'] or 'Do you' in field_data['question']:
                 field['options'] = ['Yes', 'No']
 
+    if field['type'] == 'lookup':
+        metrics.count('lookups.resolved' if field.get('options') else 'lookups.unresolved')
+
     # Add comprehensive metadata for audit trail
     field['meta'] = {
         'source_row_ref': f"ROW:{field_data['source_row']}|KEY:{keyname}",
@@ -274,8 +147,8 @@ def create_field(field_data: dict, mapping: dict, as_is_data: dict) -> dict:
     }
 
     # Add AS-IS label for comparison/audit
-    if keyname in as_is_data and 'as_is_label' in as_is_data[keyname]:
-        field['meta']['as_is_label'] = as_is_data[keyname]['as_is_label']
+    if keyname in as_is_data and 'label' in as_is_data[keyname]:
+        field['meta']['as_is_label'] = as_is_data[keyname]['label']
 
     return field
 
@@ -290,7 +163,7 @@ def organize_sections(fields: list[dict], mapping: dict) -> dict:
 
         if section_name not in sections:
             sections[section_name] = {
-                'id': slugify(section_name),
+                'id': slugify(section_name, fallback='untitled'),
                 'label': section_name,
                 'fields': []
             }
@@ -301,38 +174,35 @@ def organize_sections(fields: list[dict], mapping: dict) -> dict:
 
 def main():
     info("Starting CSV import for wicked problem areas...")
+    metrics.start(OUT_DIR.name)
+    exclusions.start()
 
     # Load mapping
     if not MAPPING.exists():
         print(f"[error] Mapping file not found: {MAPPING}", file=sys.stderr)
         sys.exit(1)
 
-    with open(MAPPING, 'r') as f:
-        mapping = json.load(f)
+    mapping = load_compiled_mapping(MAPPING)
 
     # Check CSV file
     if not INCOMING.exists():
         print(f"[error] CSV file not found: {INCOMING}", file=sys.stderr)
         sys.exit(1)
 
-    # Process CSV
+    # Load AS-IS field data for merging (curated records in AS_IS_FIELDS_PATH, via the AS-IS index)
+    info("Loading AS-IS field definitions...")
+    metrics.stage('as-is load')
+    as_is_data = as_is_fields('as-is-curated')
+
+    # Stream CSV rows straight into fields, merging CSV with AS-IS data
     info(f"Reading CSV: {INCOMING}")
-    csv_rows = process_csv_file(INCOMING, mapping)
+    metrics.stage('field build')
+    fields = [create_field(row_data, mapping, as_is_data) for row_data in process_csv_file(INCOMING, mapping)]
 
-    if not csv_rows:
+    if not fields:
         print("[error] No valid rows found in CSV", file=sys.stderr)
         sys.exit(1)
 
-    # Load AS-IS field data for merging
-    info("Loading AS-IS field definitions...")
-    as_is_data = load_as_is_field_data()
-
-    # Create fields merging CSV with AS-IS data
-    fields = []
-    for row_data in csv_rows:
-        field = create_field(row_data, mapping, as_is_data)
-        fields.append(field)
-
     info(f"Created {len(fields)} fields")
 
     # Organize into sections
@@ -352,7 +222,7 @@ def main():
 
         for field in section['fields']:
             wicked_area = field['meta']['wicked_area']
-            accordion_key = slugify(wicked_area)
+            accordion_key = slugify(wicked_area, fallback='untitled')
 
             # Sanitize field key (keep original ID where possible)
             field_key = field['id']
@@ -431,14 +301,29 @@ def main():
         'accordions': accordions
     }
 
+    metrics.count('fields.written', len(kycp_fields))
+    metrics.stage('validate')
+    if not check_kycp_schema(schema):
+        sys.exit(1)
+
     # Create output directory
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
     # Write schema file
+    metrics.stage('yaml dump')
     with open(OUT_FILE, 'w') as f:
         yaml.dump(schema, f, default_flow_style=False, allow_unicode=True)
 
     info(f"Schema written to: {OUT_FILE}")
+    metrics.stage('conditions report')
+    write_conditions_report(schema, OUT_DIR.name, parser='import_csv_wicked_problem_areas.py')
+    exclusions.write(OUT_DIR.name)
+    summary_file = write_import_summary(OUT_DIR.name, {
+        'input_file': INCOMING.name,
+        'fields_created': len(kycp_fields),
+        'fields_excluded': len(exclusions)
+    })
+    info(f"Summary written to: {summary_file}")
 
     # Summary
     total_fields = sum(len(section['fields']) for section in sections.values())
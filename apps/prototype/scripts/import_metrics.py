@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Importer instrumentation: stage spans and counters
+
+Importers time their stages with spans and bump counters as they go:
+
+    from import_metrics import metrics
+    metrics.start('non-lux-lp-2-2')
+    with metrics.span('sheet parse'):
+        rows = parse_worksheet(z, mapping['sheet'], mapping)
+    metrics.count('rows.read', len(rows))
+    metrics.count('rows.excluded.internal')
+
+Importers whose main() is one long block mark sequential stages instead;
+each stage() call closes the previous one:
+
+    metrics.stage('field build')
+    ...
+    metrics.stage('validate')
+
+metrics.summary() is stored under "metrics" in the importer summary
+(data/generated/importer-cli/<journey>/summary.json, or summary-kycp.json for
+import_xlsx_kycp.py). When RBSI_IMPORT_TRACE names a directory, a Chrome trace
+(<journey>.trace.json; open in chrome://tracing or ui.perfetto.dev) is written
+there as well.
+
+Recording is on by default. RBSI_IMPORT_METRICS=0 turns it off: span() then
+hands back one shared no-op context manager and count() returns immediately.
+
+Usage:
+  RBSI_IMPORT_TRACE=/tmp/traces python apps/prototype/scripts/import_non_lux_2_2.py
+  python apps/prototype/scripts/import_metrics.py non-lux-lp-2-2     # print recorded stages and counters
+"""
+from __future__ import annotations
+import json, os, sys, threading, time
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+SUMMARY_DIR = DATA_DIR / 'generated' / 'importer-cli'
+
+_NO_SPAN = nullcontext()
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.spans.append((self.name, self.started, time.perf_counter(), threading.get_ident()))
+        return False
+
+class Metrics:
+    def __init__(self):
+        self.enabled = os.environ.get('RBSI_IMPORT_METRICS', '1') != '0'
+        self.start(None)
+
+    def start(self, journey: str | None):
+        """Begin a new import; drops whatever an earlier run in this process recorded"""
+        self.journey = journey
+        self.spans: list[tuple[str, float, float, int]] = []
+        self.counters: defaultdict[str, int] = defaultdict(int)
+        self.started = time.perf_counter()
+        self._stage: _Span | None = None
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name)
+
+    def stage(self, name: str | None):
+        """Close the current sequential stage (if any) and open `name`"""
+        if not self.enabled:
+            return
+        if self._stage is not None:
+            self._stage.__exit__(None, None, None)
+            self._stage = None
+        if name:
+            self._stage = _Span(self, name).__enter__()
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def summary(self) -> dict:
+        """Seconds per stage (spans with the same name are summed) and every counter"""
+        if not self.enabled:
+            return {'enabled': False}
+        self.stage(None)
+        stages: dict[str, float] = {}
+        for name, started, ended, _ in self.spans:
+            stages[name] = stages.get(name, 0.0) + (ended - started)
+        return {
+            'seconds': round(time.perf_counter() - self.started, 4),
+            'stages': {k: round(v, 4) for k, v in stages.items()},
+            'counters': dict(sorted(self.counters.items()))
+        }
+
+    def chrome_trace(self) -> dict:
+        pid = os.getpid()
+        micros = lambda t: round((t - self.started) * 1e6, 1)
+        events = [{'name': name, 'cat': 'import', 'ph': 'X', 'ts': micros(started), 'dur': round((ended - started) * 1e6, 1),
+                   'pid': pid, 'tid': tid} for name, started, ended, tid in self.spans]
+        if self.counters:
+            events.append({'name': 'counters', 'ph': 'C', 'ts': micros(time.perf_counter()), 'pid': pid, 'tid': 0,
+                           'args': dict(self.counters)})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'journey': self.journey}}
+
+    def write_trace(self, journey: str | None = None) -> Path | None:
+        """Write a Chrome trace when RBSI_IMPORT_TRACE is set"""
+        trace_dir = os.environ.get('RBSI_IMPORT_TRACE')
+        if not trace_dir or not self.enabled:
+            return None
+        out = Path(trace_dir) / f"{journey or self.journey or 'import'}.trace.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(self.chrome_trace()), encoding='utf-8')
+        print(f"[info] Trace written to: {out}")
+        return out
+
+metrics = Metrics()
+
+def write_import_summary(journey: str, summary: dict, name: str = 'summary.json', out_dir: Path | None = None) -> Path:
+    """Write data/generated/importer-cli/<journey>/<name> (or <out_dir>/<name>) with the run's metrics attached"""
+    out = (Path(out_dir) if out_dir else SUMMARY_DIR / journey) / name
+    out.parent.mkdir(parents=True, exist_ok=True)
+    payload = {'timestamp': datetime.now().isoformat(), 'journey': journey, **summary, 'metrics': metrics.summary()}
+    out.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding='utf-8')
+    metrics.write_trace(journey)
+    return out
+
+def main():
+    # Print the metrics block of an importer summary
+    for key in sys.argv[1:] or sorted(p.name for p in SUMMARY_DIR.iterdir() if p.is_dir()):
+        for name in ('summary.json', 'summary-kycp.json'):
+            path = SUMMARY_DIR / key / name
+            if not path.exists():
+                continue
+            block = json.loads(path.read_text(encoding='utf-8')).get('metrics')
+            if not block or not block.get('stages'):
+                continue
+            print(f"{key} ({name}): {block['seconds']}s")
+            for stage, seconds in sorted(block['stages'].items(), key=lambda kv: -kv[1]):
+                print(f"  {stage:<24} {seconds:>8.3f}s")
+            for counter, n in block['counters'].items():
+                print(f"  {counter:<24} {n:>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,10 +9,16 @@ Parses the XLSX via zipfile + XML (no external dependencies) and outputs:
 Dry-run summary is printed to stdout.
 """
 from __future__ import annotations
-import json, re, sys
+import copy, re, sys
 from pathlib import Path
 from zipfile import ZipFile
 from xml.etree import ElementTree as ET
+from compiled_mapping import load_compiled_mapping
+from conditions_report import write_conditions_report
+from exclusion_ledger import exclusions
+from identifiers import slugify
+from import_metrics import metrics, write_import_summary
+from validate_kycp_schema import check_kycp_schema
 
 APP_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = APP_DIR / 'data'
@@ -23,29 +29,20 @@ OUT_FILE = OUT_DIR / 'schema-kycp.yaml'
 
 NS = {'a': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
 
+# How each exclusion rule is described in the console summary
+EXCLUSION_NOTES = {
+    'action': 'action internal',
+    'internal': 'INTERNAL=Y',
+    'system': 'SYSTEM=Y',
+    'label': 'label contains internal analysis',
+    'missing_id_label': 'missing id/label',
+}
+
 def warn(msg: str):
     print(f"[warn] {msg}", file=sys.stderr)
 
-def slugify(s: str) -> str:
-    s = (s or '').strip().lower()
-    out = []
-    for ch in s:
-        if ch.isalnum():
-            out.append(ch)
-        elif ch in [' ', '-', '_']:
-            out.append('-')
-        else:
-            # skip other punctuation/symbols
-            out.append('-')
-    # collapse dashes
-    slug = ''.join(out)
-    while '--' in slug:
-        slug = slug.replace('--', '-')
-    return slug.strip('-') or 'item'
-
 def load_mapping():
-    with open(MAPPING, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return load_compiled_mapping(MAPPING)
 
 def read_shared_strings(z: ZipFile):
     try:
@@ -120,10 +117,11 @@ def build_table(rows):
     header_map = {c: h for c, h in header_cells}
     # Build rows using column letters alignment
     table = []
-    for (_, cells) in rows[header_idx+1:]:
+    for (row_num, cells) in rows[header_idx+1:]:
         by_col = {col_letter(ref): (txt or '').strip() for ref, txt in cells}
         row = {header_map[c]: by_col.get(c, '') for c in header_order}
         if any(v for v in row.values()):
+            row['_row'] = row_num
             table.append(row)
     return table
 
@@ -245,6 +243,20 @@ def parse_visibility(expr: str, op_map: dict[str, str]):
                 })
     return rules
 
+_visibility_cache: dict[tuple, list] = {}
+
+def cached_visibility(expr: str, op_map: dict[str, str]):
+    """parse_visibility memoized per expression (many rows share one); callers get their own copy"""
+    if not expr or not expr.strip():
+        return []
+    key = (expr, tuple(sorted(op_map.items())))
+    rules = _visibility_cache.get(key)
+    if rules is None:
+        rules = _visibility_cache[key] = parse_visibility(expr, op_map)
+    else:
+        metrics.count('visibility.cache_hits')
+    return copy.deepcopy(rules)
+
 def decide_type(row, mapping):
     dt_raw = (row.get(mapping['columns']['data_type']) or '').strip()
     dt = mapping['normalization']['data_type'].get(dt_raw, dt_raw).lower()
@@ -375,29 +387,27 @@ def to_yaml(data) -> str:
     return dump(data) + "\n"
 
 def main():
+    metrics.start(OUT_DIR.name)
+    exclusions.start()
     mapping = load_mapping()
-    value_aliases = mapping.get('value_aliases') or {}
-    # Build synonym->canonical map (lowercased)
-    alias_to_canon: dict[str,str] = {}
-    for canon, syns in value_aliases.items():
-        c = (canon or '').strip().lower()
-        alias_to_canon[c] = c
-        for s in (syns or []):
-            alias_to_canon[(s or '').strip().lower()] = c
+    # Synonym -> canonical map (lowercased)
+    alias_to_canon = mapping.alias_to_canon
     with ZipFile(INCOMING, 'r') as z:
+        metrics.stage('sheet parse')
         sst = read_shared_strings(z)
         idx = sheet_index_by_name(z, mapping['sheet'])
         rows = read_sheet_rows(z, idx, sst)
         table = build_table(rows)
+        metrics.stage('lookups')
         lookups = collect_lookup_values(z, mapping)
+    metrics.stage('field build')
     fallback = {k: [{'value': v, 'label': v} for v in vals] for k, vals in (mapping.get('fallback_lookups') or {}).items()}
 
     cols = mapping['columns']
-    label_overrides = mapping.get('label_overrides') or {}
+    label_overrides = mapping.label_overrides
     vis_overrides = mapping.get('visibility_overrides') or {}
-    internal_label_contains = [s.lower() for s in (mapping.get('internal_label_contains') or [])]
-    yes_vals = mapping['normalization']['yes_values']
-    op_map = mapping['normalization']['operators']
+    yes_vals = mapping.yes_values
+    op_map = mapping.operators
     sec_map = {k.lower(): v for k,v in mapping.get('sections_by_label', {}).items()}
 
     # Apply filters
@@ -408,9 +418,10 @@ def main():
         return True
 
     filtered = [r for r in table if row_matches_filters(r)]
+    metrics.count('rows.read', len(table))
+    metrics.count('rows.excluded.filters', len(table) - len(filtered))
 
     included = []
-    excluded = []
     ids_seen = set()
     groups = {}
 
@@ -420,20 +431,10 @@ def main():
         if idv in label_overrides:
             label = label_overrides[idv]
         # Exclusions: internal/system/action/label patterns
-        action = (r.get(cols['action']) or '').lower()
-        internal = (r.get(cols['internal']) or '').strip()
-        system = (r.get(cols['system']) or '').strip()
-        if any(p in action for p in [s.lower() for s in mapping['exclude']['action_contains']]):
-            excluded.append((idv, label, 'action internal'))
-            continue
-        if internal in yes_vals:
-            excluded.append((idv, label, 'INTERNAL=Y'))
-            continue
-        if system in yes_vals:
-            excluded.append((idv, label, 'SYSTEM=Y'))
-            continue
-        if any(p in label.lower() for p in [s.lower() for s in mapping['exclude']['label_contains']]):
-            excluded.append((idv, label, 'label contains internal analysis'))
+        hit = mapping.exclusion(r.get(cols['action']), (r.get(cols['internal']) or '').strip(),
+                                (r.get(cols['system']) or '').strip(), label)
+        if hit:
+            exclusions.record(hit[0], r['_row'], idv, label, detail=hit[1])
             continue
 
         # Determine style by field type hints or data type (some sheets put Title in Data Type)
@@ -459,7 +460,7 @@ def main():
 
         # If still missing id or label for fields, exclude
         if style == 'field' and (not idv or not label):
-            excluded.append((idv, label, 'missing id/label'))
+            exclusions.record('missing_id_label', r['_row'], idv, label)
             continue
 
         # Build field
@@ -478,13 +479,13 @@ def main():
             'label': label,
             'style': style,
             'entity': mapping['defaults']['entity'],
-            'visibility': parse_visibility(r.get(cols['visibility']) or '', op_map),
+            'visibility': cached_visibility(r.get(cols['visibility']) or '', op_map),
             'scriptId': f"ROW:{(r.get(cols['ref']) or '').strip()}|KEY:{idv}",
             '_section': mapping['defaults']['section'],
             '_stage': (r.get(cols['stage']) or '').strip()
         }
         # Mark internal by label keywords (e.g., OBT TO COMPLETE)
-        if any(tok in label.lower() for tok in internal_label_contains):
+        if mapping.internal_label.matches(label):
             field['internal'] = True
         if style == 'field':
             field['type'] = ky_type
@@ -507,17 +508,21 @@ def main():
                 lt_norm = lt_raw
                 if lt_norm and lt_norm in lookups:
                     opts = lookups[lt_norm]
+                    metrics.count('lookups.resolved')
                 elif lt_norm in fallback:
                     opts = fallback[lt_norm]
+                    metrics.count('lookups.fallback')
                 else:
                     # robust yes/no detection
                     yn = lt_raw.lower().replace(' ', '')
                     yn = yn.replace('-', '/').replace('\\', '/')
                     if yn in ['yes/no','yesno']:
                         opts = [{'value':'Yes','label':'Yes'},{'value':'No','label':'No'}]
+                        metrics.count('lookups.yes_no')
             if not opts and ky_type == 'lookup':
                 # Final fallback option when no items provided
                 opts = [{'value': 'Lookup items not provided', 'label': 'Lookup items not provided'}]
+                metrics.count('lookups.unresolved')
             if opts:
                 field['options'] = opts
 
@@ -536,7 +541,7 @@ def main():
         if idv in vis_overrides:
             extra_exprs = vis_overrides[idv]
             for expr in extra_exprs:
-                extra_rules = parse_visibility(expr, op_map)
+                extra_rules = cached_visibility(expr, op_map)
                 if extra_rules:
                     # merge conditions into first rule as AND
                     if field.get('visibility'):
@@ -636,25 +641,39 @@ def main():
         # informational metadata; preview-kycp does not consume yet
         schema['groups'] = list(groups.values())
 
+    metrics.count('fields.written', len(included))
+    metrics.stage('validate')
+    if not check_kycp_schema(schema):
+        sys.exit(1)
+    metrics.stage('yaml dump')
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     with open(OUT_FILE, 'w', encoding='utf-8') as f:
         f.write(to_yaml(schema))
+    metrics.stage('conditions report')
+    write_conditions_report(schema, OUT_DIR.name, parser='import_non_lux_1_1.py')
+    metrics.stage(None)
+    ledger_file = exclusions.write(OUT_DIR.name)
+    summary_file = write_import_summary(OUT_DIR.name, {
+        'input_file': INCOMING.name,
+        'sheet': mapping['sheet'],
+        'fields_created': len(included),
+        'fields_excluded': len(exclusions)
+    })
 
     # Summary
     print('[import] non-lux-1-1')
     print(f"  included: {len(included)}")
-    print(f"  excluded: {len(excluded)}")
-    if excluded:
-        # show top 10 reasons
-        reasons = {}
-        for _,_,why in excluded:
-            reasons[why] = reasons.get(why,0)+1
+    print(f"  excluded: {len(exclusions)}")
+    if len(exclusions):
+        reasons = {EXCLUSION_NOTES[rule]: n for rule, n in exclusions.counts().items()}
         print('  exclusion summary:', reasons)
+        print(f"  exclusion ledger: {ledger_file}")
     unresolved = [f for f in included if f.get('type')=='lookup' and not f.get('options')]
     if unresolved:
         print(f"  unresolved lookups: {len(unresolved)}")
         ex = unresolved[:5]
         print("   e.g.", ', '.join(x['key'] for x in ex))
+    print(f"  summary: {summary_file}")
 
 if __name__ == '__main__':
     try:
@@ -15,10 +15,17 @@ Features:
 - Handles unordered fields systematically
 """
 from __future__ import annotations
-import json, re, sys, yaml
+import copy, json, re, sys, yaml
 from pathlib import Path
 from zipfile import ZipFile
 from xml.etree import ElementTree as ET
+from compiled_mapping import compile_mapping, load_compiled_mapping
+from conditions_report import write_conditions_report
+from exclusion_ledger import exclusions
+from identifiers import slugify
+from import_metrics import metrics, write_import_summary
+from parallel_fields import map_rows
+from validate_kycp_schema import check_kycp_schema
 
 APP_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = APP_DIR / 'data'
@@ -36,23 +43,6 @@ def warn(msg: str):
 def info(msg: str):
     print(f"[info] {msg}")
 
-def slugify(s: str) -> str:
-    s = (s or '').strip().lower()
-    # Replace & with 'and' to match frontend slugify behavior
-    s = s.replace('&', ' and ')
-    out = []
-    for ch in s:
-        if ch.isalnum():
-            out.append(ch)
-        elif ch in [' ', '-', '_']:
-            out.append('-')
-        else:
-            out.append('-')
-    slug = ''.join(out)
-    while '--' in slug:
-        slug = slug.replace('--', '-')
-    return slug.strip('-') or 'item'
-
 def parse_visibility(expr: str, op_map: dict[str, str]):
     """Parse a legacy visibility expression into KYCP visibility rules.
     
@@ -168,9 +158,20 @@ def parse_visibility(expr: str, op_map: dict[str, str]):
                 })
     return rules
 
+_visibility_cache: dict[tuple, list] = {}
+
+def cached_visibility(expr: str, op_map: dict[str, str]):
+    """parse_visibility memoized per expression (many rows share one); callers get their own copy"""
+    key = (expr, tuple(sorted(op_map.items())))
+    rules = _visibility_cache.get(key)
+    if rules is None:
+        rules = _visibility_cache[key] = parse_visibility(expr, op_map)
+    else:
+        metrics.count('visibility.cache_hits')
+    return copy.deepcopy(rules)
+
 def load_mapping():
-    with open(MAPPING, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return load_compiled_mapping(MAPPING)
 
 def read_shared_strings(z: ZipFile):
     strings = []
@@ -349,16 +350,8 @@ def create_copy_mapping(rows: dict, mapping: dict, copy_map: list):
     
     headers = rows[header_row_num]
     
-    # Get column mappings
-    cols = mapping['columns']
-    
     # Find column letters for key fields
-    col_letters = {}
-    for key, col_name in cols.items():
-        for letter, header in headers.items():
-            if header == col_name:
-                col_letters[key] = letter
-                break
+    col_letters = compile_mapping(mapping).column_letters(headers)
     
     info(f"Column mappings: {len(col_letters)} found")
     
@@ -468,7 +461,7 @@ def process_field(field_data: dict, mapping: dict, lookups: dict) -> dict:
     
     # Data type normalization
     data_type = field_data.get('data_type', '').strip()
-    norm_data_type = mapping['normalization']['data_type'].get(data_type, 'string')
+    norm_data_type = mapping.data_types.get(data_type, 'string')
     
     if norm_data_type == 'lookup':
         field['type'] = 'lookup'
@@ -477,15 +470,18 @@ def process_field(field_data: dict, mapping: dict, lookups: dict) -> dict:
         if lookup_type in lookups:
             # Use dynamic lookups from Lookup Values sheet
             field['options'] = lookups[lookup_type]
+            metrics.count('lookups.resolved')
         elif lookup_type in mapping.get('fallback_lookups', {}):
             # Use fallback lookups from mapping
             field['options'] = [
                 {'value': opt, 'label': opt} 
                 for opt in mapping['fallback_lookups'][lookup_type]
             ]
+            metrics.count('lookups.fallback')
         else:
             # No options found - this will create a broken field
             warn(f"No lookup options found for type: {lookup_type}")
+            metrics.count('lookups.unresolved')
             field['options'] = []
     elif norm_data_type == 'complex':
         field['type'] = 'complex'
@@ -535,7 +531,7 @@ def process_field(field_data: dict, mapping: dict, lookups: dict) -> dict:
     # Visibility conditions (using proper parser)
     visibility = field_data.get('visibility', '').strip()
     if visibility:
-        field['visibility'] = parse_visibility(visibility, mapping['normalization']['operators'])
+        field['visibility'] = cached_visibility(visibility, mapping.operators)
     
     # Metadata for change tracking (Paul structural changes)
     field['_metadata'] = {
@@ -579,25 +575,21 @@ def sort_fields_by_paul_order(fields: list) -> list:
 
 def generate_schema(rows: dict, mapping: dict, lookups: dict) -> dict:
     """Generate the complete schema"""
+    mapping = compile_mapping(mapping)
     header_row_num = mapping.get('header_row', 2)
     headers = rows[header_row_num]
     
     # Get column mappings
-    cols = mapping['columns']
-    col_letters = {}
-    for key, col_name in cols.items():
-        for letter, header in headers.items():
-            if header == col_name:
-                col_letters[key] = letter
-                break
+    col_letters = mapping.column_letters(headers)
     
     # Process fields
-    fields = []
+    included = []
     copy_map = []
     
     for row_num, row_data in rows.items():
         if row_num <= header_row_num:
             continue
+        metrics.count('rows.read')
             
         # Extract field data
         field_data = {'_row_num': row_num}
@@ -606,43 +598,26 @@ def generate_schema(rows: dict, mapping: dict, lookups: dict) -> dict:
                 field_data[key] = row_data[letter]
         
         if not field_data.get('id'):
+            exclusions.record('no_keyname', row_num, label=field_data.get('label', ''))
             continue
             
-        # Comprehensive exclusion logic (adapted from v1.1)
-        yes_vals = mapping.get('normalization', {}).get('yes_values', ['Y', 'Yes', 'YES', 'a', 'A'])
-        label = field_data.get('label', '').strip()
-        action = (field_data.get('action', '') or '').lower()
-        internal = (field_data.get('internal', '') or '').strip()
-        system = (field_data.get('system', '') or '').strip()
-        
-        # Apply label overrides
-        field_id = field_data.get('id', '')
-        label_overrides = mapping.get('label_overrides', {})
-        if field_id in label_overrides:
-            label = label_overrides[field_id]
-        
-        # 1. Skip fields with internal action patterns
-        exclude_config = mapping.get('exclude', {})
-        action_patterns = exclude_config.get('action_contains', [])
-        if any(p.lower() in action for p in action_patterns):
+        # Comprehensive exclusion logic (adapted from v1.1): internal action patterns,
+        # INTERNAL/SYSTEM flags, internal label patterns (label overrides applied first)
+        label = mapping.label_overrides.get(field_data['id'], field_data.get('label', '').strip())
+        hit = mapping.exclusion(field_data.get('action', ''), (field_data.get('internal', '') or '').strip(),
+                                (field_data.get('system', '') or '').strip(), label)
+        if hit:
+            exclusions.record(hit[0], row_num, field_data['id'], label, detail=hit[1])
             continue
             
-        # 2. Skip fields marked as internal
-        if internal in yes_vals:
-            continue
-            
-        # 3. Skip fields marked as system  
-        if system in yes_vals:
-            continue
-            
-        # 4. Skip fields with internal label patterns
-        label_patterns = exclude_config.get('label_contains', [])
-        if any(p.lower() in label.lower() for p in label_patterns):
-            continue
-            
-        # Process field
-        field = process_field(field_data, mapping, lookups)
-        fields.append(field)
+        included.append(field_data)
+
+    # Build fields (in a process pool when RBSI_IMPORT_WORKERS is set)
+    fields = map_rows(process_field, included, mapping, lookups)
+    # Workers return copies: share each lookup's option list again, as a sequential build does
+    for field, field_data in zip(fields, included):
+        if field.get('options') and field_data.get('lookup_type') in lookups:
+            field['options'] = lookups[field_data['lookup_type']]
     
     # Sort fields by Paul's ordering within sections
     fields = sort_fields_by_paul_order(fields)
@@ -651,13 +626,7 @@ def generate_schema(rows: dict, mapping: dict, lookups: dict) -> dict:
     create_copy_mapping(rows, mapping, copy_map)
     
     # Canonicalize condition values to match controller options using alias map
-    value_aliases = mapping.get('value_aliases', {})
-    alias_to_canon = {}
-    for canon, syns in value_aliases.items():
-        c = (canon or '').strip().lower()
-        alias_to_canon[c] = c
-        for s in (syns or []):
-            alias_to_canon[(s or '').strip().lower()] = c
+    alias_to_canon = mapping.alias_to_canon
     
     field_by_key = {f['key']: f for f in fields}
     
@@ -842,40 +811,63 @@ def main():
         print(f"ERROR: Mapping file not found: {MAPPING}", file=sys.stderr)
         return 1
     
+    metrics.start(OUT_DIR.name)
+    exclusions.start()
+
     # Load mapping
     mapping = load_mapping()
     info(f"Loaded mapping for sheet: {mapping['sheet']}")
     
     # Parse Excel file
     with ZipFile(INCOMING) as z:
-        rows = parse_worksheet(z, mapping['sheet'], mapping)
+        with metrics.span('sheet parse'):
+            rows = parse_worksheet(z, mapping['sheet'], mapping)
         info(f"Parsed {len(rows)} rows")
         
         # Collect lookup values from Lookup Values sheet
-        lookups = collect_lookup_values(z, mapping)
+        with metrics.span('lookups'):
+            lookups = collect_lookup_values(z, mapping)
         info(f"Collected {len(lookups)} lookup types with {sum(len(vals) for vals in lookups.values())} total values")
     
     # Generate schema and copy map
-    schema, copy_map = generate_schema(rows, mapping, lookups)
+    with metrics.span('field build'):
+        schema, copy_map = generate_schema(rows, mapping, lookups)
+    metrics.count('fields.written', len(schema['fields']))
     
     info(f"Generated schema with {len(schema['fields'])} fields")
     info(f"Generated copy map with {len(copy_map)} entries")
     
+    with metrics.span('validate'):
+        valid = check_kycp_schema(schema)
+    if not valid:
+        return 1
+
     # Ensure output directories exist
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     COPY_MAP_FILE.parent.mkdir(parents=True, exist_ok=True)
     
     # Write schema YAML
-    with open(OUT_FILE, 'w', encoding='utf-8') as f:
+    with metrics.span('yaml dump'), open(OUT_FILE, 'w', encoding='utf-8') as f:
         yaml.dump(schema, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
     
     info(f"Schema written to: {OUT_FILE}")
+    with metrics.span('conditions report'):
+        write_conditions_report(schema, OUT_DIR.name, parser='import_non_lux_2_2.py')
     
     # Write copy map JSON
     with open(COPY_MAP_FILE, 'w', encoding='utf-8') as f:
         json.dump(copy_map, f, indent=2, ensure_ascii=False)
     
     info(f"Copy map written to: {COPY_MAP_FILE}")
+    ledger_file = exclusions.write(OUT_DIR.name)
+    info(f"Exclusion ledger written to: {ledger_file}")
+    summary_file = write_import_summary(OUT_DIR.name, {
+        'input_file': INCOMING.name,
+        'sheet': mapping['sheet'],
+        'fields_created': len(schema['fields']),
+        'fields_excluded': len(exclusions)
+    })
+    info(f"Summary written to: {summary_file}")
     
     # Summary statistics
     paul_structural_changes = sum(1 for entry in copy_map if entry.get('has_paul_structural_changes', False))
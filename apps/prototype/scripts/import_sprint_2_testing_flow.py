@@ -2,14 +2,23 @@
 """
 Importer for "Sprint 2 Testing Flow" CSV → KYCP schema YAML
 
-Parses the CSV and outputs:
+Streams the CSV (columns, row repairs and overrides from
+data/mappings/sprint-2-testing-flow.json) and outputs:
   apps/prototype/data/schemas/sprint-2-testing-flow/schema-kycp.yaml
 
 """
 from __future__ import annotations
-import json, re, sys, yaml, csv
-import io
+import sys, yaml
 from pathlib import Path
+from typing import Iterator
+from as_is_index import as_is_fields
+from compiled_mapping import load_compiled_mapping
+from conditions_report import write_conditions_report
+from csv_stream import stream_rows
+from exclusion_ledger import exclusions
+from identifiers import slugify
+from import_metrics import metrics, write_import_summary
+from validate_kycp_schema import check_kycp_schema
 
 # --- Configuration ---
 APP_DIR = Path(__file__).resolve().parents[1]
@@ -17,6 +26,7 @@ DATA_DIR = APP_DIR / 'data'
 JOURNEY_KEY = 'sprint-2-testing-flow'
 AS_IS_JOURNEY_KEY = 'non-lux-1-1'
 INCOMING_CSV = DATA_DIR / 'incoming' / 'RBSI Onboarding Sprint 2 Testing Flow v3.2.csv'
+MAPPING = DATA_DIR / 'mappings' / f'{JOURNEY_KEY}.json'
 AS_IS_SCHEMA_PATH = DATA_DIR / 'schemas' / AS_IS_JOURNEY_KEY / 'schema-kycp.yaml'
 OUT_DIR = DATA_DIR / 'schemas' / JOURNEY_KEY
 OUT_FILE = OUT_DIR / 'schema-kycp.yaml'
@@ -29,18 +39,6 @@ def warn(msg: str):
 def info(msg: str):
     print(f"[info] {msg}")
 
-def slugify(s: str) -> str:
-    s = (s or '').strip().lower()
-    s = s.replace('&', ' and ')
-    out = []
-    for ch in s:
-        if ch.isalnum():
-            out.append(ch)
-        elif ch in [' ', '-', '_']:
-            out.append('-')
-    result = ''.join(out).strip('-')
-    return re.sub(r'-+', '-', result) or 'untitled'
-
 def parse_lookup_values(value_str: str) -> list[dict[str, str]]:
     """Parse inline lookup values like 'Yes | No' into [{'value': 'Yes', 'label': 'Yes'}]"""
     if not value_str or not value_str.strip():
@@ -71,81 +69,32 @@ def normalize_field_type(field_type_str: str) -> tuple[str, str | None]:
 # --- Core Logic ---
 
 def load_as_is_data(path: Path) -> dict[str, dict]:
-    """Loads the as-is schema and returns a map of key -> {label, help}."""
-    as_is_map = {}
+    """Map of key -> {label, help} for the as-is journey, from the shared AS-IS field index"""
     if not path.exists():
         warn(f"As-is schema not found at {path}, cannot populate original copy.")
-        return as_is_map
-
-    with open(path, 'r', encoding='utf-8') as f:
-        schema = yaml.safe_load(f)
-    
-    for field in schema.get('fields', []):
-        key = field.get('key')
-        if key:
-            as_is_map[key] = {
-                'label': field.get('label', ''),
-                'help': field.get('help') or field.get('description', ''),
-            }
-            
+        return {}
+    as_is_map = as_is_fields(AS_IS_JOURNEY_KEY)
     info(f"Loaded {len(as_is_map)} fields from as-is journey '{AS_IS_JOURNEY_KEY}'.")
     return as_is_map
 
-def process_csv_file(csv_path: Path) -> list[dict]:
-    """Read and process the input CSV file, handling potential formatting errors."""
-    rows = []
-    if not csv_path.exists():
-        warn(f"CSV file not found at {csv_path}")
-        return rows
-
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        # Read raw content and fix known issues before parsing
-        content = f.read()
-        # This is a brittle fix for a specific known issue in the CSV on line 8.
-        # A better long-term solution would be to enforce CSV quality upstream.
-        content = content.replace(''',"Before you start:
-
-Think about what your business does and who your main clients/customers are
-    Have your annual turnover figure ready
-    Know how long you've been trading"''', ''',"Before you start: Think about what your business does and who your main clients/customers are, Have your annual turnover figure ready, Know how long you've been trading"''')
-        
-        reader = csv.DictReader(io.StringIO(content))
-        for row_num, row in enumerate(reader, start=2):
-            if not any(row.values()): # Skip completely blank rows
-                continue
-
-            # Clean up potential leading/trailing quotes and spaces from keys and values
-            cleaned_row = {}
-            for k, v in row.items():
-                key = k.strip() if isinstance(k, str) else k
-                value = v.strip() if isinstance(v, str) else v
-                cleaned_row[key] = value
-
-            keyname = (cleaned_row.get('Keyname') or '').strip()
-            question = (cleaned_row.get('Question') or '').strip()
-
-            if not keyname and not question: # Skip rows without key identifiers
-                continue
-
-            rows.append({
-                'source_row': row_num,
-                'keyname': keyname,
-                'label': question,
-                'help': (cleaned_row.get('Helper') or '').strip(),
-                'section_title': (cleaned_row.get('Section') or '').strip(),
-                'field_type_raw': (cleaned_row.get('FIELD TYPE') or '').strip(),
-                'lookup_values_raw': (cleaned_row.get('Lookup Values') or '').strip(),
-            })
-            
-    # After processing, programmatically remove the helper text from the description field
-    for row_data in rows:
-        if row_data['keyname'] == 'Description-new-application':
-            row_data['help'] = ''
-            info("Cleaned up duplicated helper text from 'Description-new-application'.")
-            break
-
-    info(f"Processed {len(rows)} valid rows from {csv_path.name}")
-    return rows
+def process_csv_file(csv_path: Path, mapping: dict) -> Iterator[dict]:
+    """Stream the input CSV as importer rows; repairs and overrides come from the mapping"""
+    cols = mapping['columns']
+    for row_num, row in stream_rows(csv_path, mapping):
+        keyname = row.get(cols['id'], '')
+        question = row.get(cols['label'], '')
+        if not keyname and not question: # Skip rows without key identifiers
+            exclusions.record('no_keyname', row_num)
+            continue
+        yield {
+            'source_row': row_num,
+            'keyname': keyname,
+            'label': question,
+            'help': row.get(cols['help'], ''),
+            'section_title': row.get(cols['section'], ''),
+            'field_type_raw': row.get(cols['field_type'], ''),
+            'lookup_values_raw': row.get(cols['lookup_values_inline'], ''),
+        }
 
 def create_schema_field(row: dict, as_is_data: dict[str, dict]) -> dict | None:
     """Create a single field dictionary for the YAML schema, or None if this should be accordion metadata."""
@@ -160,6 +109,7 @@ def create_schema_field(row: dict, as_is_data: dict[str, dict]) -> dict | None:
 
     # Skip title fields that are meant to be accordion headers - they'll be handled in accordion generation
     if style == 'divider' and row['field_type_raw'].lower() in ['title']:
+        exclusions.record('title', row['source_row'], keyname, row['label'], detail='accordion header')
         return None
     
     # Infer section for Description fields with empty sections based on keyname patterns
@@ -177,6 +127,7 @@ def create_schema_field(row: dict, as_is_data: dict[str, dict]) -> dict | None:
     
     # Find original copy from as-is data
     original_copy = as_is_data.get(keyname)
+    metrics.count('as_is.matched' if original_copy else 'as_is.missing')
     
     field = {
         'key': keyname,
@@ -205,72 +156,89 @@ def create_schema_field(row: dict, as_is_data: dict[str, dict]) -> dict | None:
         options = parse_lookup_values(row['lookup_values_raw'])
         if options:
             field['options'] = options
+            metrics.count('lookups.resolved')
         else:
+            metrics.count('lookups.unresolved')
             warn(f"Field '{row['keyname']}' is type 'lookup' but has no lookup values.")
 
     return field
 
+def title_accordion(row: dict) -> dict | None:
+    """Accordion (with its description text) for a title row, or None for any other row"""
+    style, _ = normalize_field_type(row['field_type_raw'])
+    if not (style == 'divider' and row['field_type_raw'].lower() in ['title']):
+        return None
+    section_title = row['section_title']
+
+    # Infer section for Title fields with empty sections based on keyname patterns
+    if not section_title and row['keyname'].startswith('Title-'):
+        keyname_suffix = row['keyname'].replace('Title-', '')
+        if keyname_suffix == 'intermediary':
+            section_title = 'Applying as an intermediary'
+        elif keyname_suffix == 'PurposeOfBusiness':
+            section_title = 'Purpose of Business'
+        elif keyname_suffix == 'tax':
+            section_title = 'Tax'
+        elif keyname_suffix == 'fund':
+            section_title = 'Purpose of Fund'
+        elif keyname_suffix == 'HowYouBank':
+            section_title = 'How you bank with us'
+
+    if not section_title:  # Only create accordion if we have a valid section title
+        return None
+    # Clean up helper text by normalizing whitespace and line breaks
+    description = None
+    if row['help']:
+        description = ' '.join(row['help'].strip().split())
+    return {
+        'key': slugify(section_title, fallback='untitled'),
+        'title': section_title,
+        'description': description,  # Use cleaned helper text as description
+    }
+
 def main():
     info(f"Starting import for '{JOURNEY_KEY}'...")
-    
-    csv_rows = process_csv_file(INCOMING_CSV)
-    if not csv_rows:
-        warn("No data processed from CSV. Exiting.")
+    metrics.start(JOURNEY_KEY)
+    exclusions.start()
+    if not INCOMING_CSV.exists():
+        warn(f"CSV file not found at {INCOMING_CSV}")
         return
+    mapping = load_compiled_mapping(MAPPING)
 
+    metrics.stage('as-is load')
     as_is_data = load_as_is_data(AS_IS_SCHEMA_PATH)
     
-    # Create fields, filtering out None returns (title rows)
-    all_field_results = [create_schema_field(row, as_is_data) for row in csv_rows]
-    fields = [f for f in all_field_results if f is not None]
+    # CSV rows stream straight into field construction; title rows give the accordions
+    # (first title row per section wins) and are not fields themselves
+    metrics.stage('field build')
+    fields = []
+    accordion_map = {}
+    rows_used = 0
+    for row in process_csv_file(INCOMING_CSV, mapping):
+        rows_used += 1
+        field = create_schema_field(row, as_is_data)
+        if field is not None:
+            fields.append(field)
+        accordion = title_accordion(row)
+        if accordion and accordion['key'] not in accordion_map:
+            accordion_map[accordion['key']] = accordion
+    if not rows_used:
+        warn("No data processed from CSV. Exiting.")
+        return
 
+    info(f"Processed {rows_used} valid rows from {INCOMING_CSV.name}")
     info(f"Generated {len(fields)} fields from CSV data.")
 
     # --- Accordion Generation with Description Text ---
-    accordions = []
-    accordion_map = {}
-    
-    # First pass: collect accordion structure and descriptions from title rows
-    for row in csv_rows:
-        style, _ = normalize_field_type(row['field_type_raw'])
-        if style == 'divider' and row['field_type_raw'].lower() in ['title']:
-            section_title = row['section_title']
-            
-            # Infer section for Title fields with empty sections based on keyname patterns
-            if not section_title and row['keyname'].startswith('Title-'):
-                keyname_suffix = row['keyname'].replace('Title-', '')
-                if keyname_suffix == 'intermediary':
-                    section_title = 'Applying as an intermediary'
-                elif keyname_suffix == 'PurposeOfBusiness':
-                    section_title = 'Purpose of Business'
-                elif keyname_suffix == 'tax':
-                    section_title = 'Tax'
-                elif keyname_suffix == 'fund':
-                    section_title = 'Purpose of Fund'
-                elif keyname_suffix == 'HowYouBank':
-                    section_title = 'How you bank with us'
-            
-            if section_title:  # Only create accordion if we have a valid section title
-                accordion_key = slugify(section_title)
-                if accordion_key not in accordion_map:
-                    # Clean up helper text by normalizing whitespace and line breaks
-                    description = None
-                    if row['help']:
-                        description = ' '.join(row['help'].strip().split())
-                    
-                    accordion_map[accordion_key] = {
-                        'key': accordion_key,
-                        'title': section_title,
-                        'description': description,  # Use cleaned helper text as description
-                    }
+    metrics.stage('accordions')
     
-    # Second pass: ensure all field sections have accordions (even without explicit title rows)
+    # Ensure all field sections have accordions (even without explicit title rows)
     for field in fields:
         section_title = field.get('_section')
         if not section_title:
             continue
         
-        accordion_key = slugify(section_title)
+        accordion_key = slugify(section_title, fallback='untitled')
         if accordion_key not in accordion_map:
             accordion_map[accordion_key] = {
                 'key': accordion_key,
@@ -291,11 +259,26 @@ def main():
     }
 
     # --- File Output ---
+    metrics.count('fields.written', len(fields))
+    metrics.stage('validate')
+    if not check_kycp_schema(schema):
+        sys.exit(1)
+    metrics.stage('yaml dump')
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     with open(OUT_FILE, 'w') as f:
         yaml.dump(schema, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
 
     info(f"Schema successfully written to: {OUT_FILE}")
+    metrics.stage('conditions report')
+    write_conditions_report(schema, JOURNEY_KEY, parser='import_sprint_2_testing_flow.py')
+    exclusions.write(JOURNEY_KEY)
+    summary_file = write_import_summary(JOURNEY_KEY, {
+        'input_file': INCOMING_CSV.name,
+        'as_is_schema': AS_IS_SCHEMA_PATH.relative_to(DATA_DIR).as_posix(),
+        'fields_created': len(fields),
+        'fields_excluded': len(exclusions)
+    })
+    info(f"Summary written to: {summary_file}")
     info("Import complete.")
 
 if __name__ == '__main__':
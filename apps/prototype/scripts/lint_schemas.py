@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Schema lint engine
+
+Walks each schema once and hands every field to all registered field rules
+and collectors; schema rules run after the walk on what was collected (keys,
+condition references, sections). Results are written as SARIF 2.1.0 and/or
+plain JSON. Schemas are linted in parallel, one per worker process.
+
+Rules:
+  duplicate-key               error    two fields share a key
+  lookup-without-options      error    lookup field with no options (or only the importer placeholder)
+  duplicate-option-value      warning  option value repeated within a field
+  unresolved-condition-key    error    condition sourceKey is not a field of the schema
+  accordion-unknown-field     error    accordion lists a field key the schema does not have
+  accordion-without-fields    warning  accordion no field is placed in (orphaned accordion key)
+  field-without-accordion     note     field whose section matches no accordion (shown under "Additional Questions")
+
+Legacy schema.yaml journeys are linted through conditions_report.legacy_fields.
+
+Usage:
+  python apps/prototype/scripts/lint_schemas.py                       # every schema under data/schemas/
+  python apps/prototype/scripts/lint_schemas.py non-lux-lp-2-2 --sarif lint.sarif --json lint.json
+  python apps/prototype/scripts/lint_schemas.py --quiet $(git diff --cached --name-only -- 'apps/prototype/data/schemas/*/schema*.yaml')   # pre-commit hook
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from identifiers import slugify
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+SCHEMAS_DIR = DATA_DIR / 'schemas'
+REPO_ROOT = APP_DIR.parents[1]
+
+LEVELS = ('note', 'warning', 'error')
+LOOKUP_PLACEHOLDER = 'Lookup items not provided'
+LEGACY_ACCORDION = 'legacy-content'
+
+FIELD_RULES: list[dict] = []
+SCHEMA_RULES: list[dict] = []
+COLLECTORS: list = []
+
+def warn(msg: str):
+    print(f"[warn] {msg}", file=sys.stderr)
+
+def info(msg: str):
+    print(f"[info] {msg}")
+
+def rule(rule_id: str, level: str, description: str, scope: str = 'field'):
+    """Register a rule. Field rules get (field, index, ctx), schema rules get (schema, ctx);
+    both yield (message, index or None)."""
+    def register(fn):
+        (FIELD_RULES if scope == 'field' else SCHEMA_RULES).append({
+            'id': rule_id, 'level': level, 'description': description, 'check': fn
+        })
+        return fn
+    return register
+
+def collector(fn):
+    """Register a per-field hook that only gathers context for schema rules"""
+    COLLECTORS.append(fn)
+    return fn
+
+def section_slug(value: str) -> str:
+    """Accordion key for a section title (the preview page's slug)"""
+    return slugify(str(value or ''), LEGACY_ACCORDION)
+
+# --- Field rules ---------------------------------------------------------------
+
+@rule('duplicate-key', 'error', 'Two fields share a key')
+def check_duplicate_key(field, index, ctx):
+    key = field.get('key')
+    first = ctx['keys'].setdefault(key, index)
+    if first != index:
+        yield f"Duplicate key '{key}' (first defined at index {first})", index
+
+@rule('lookup-without-options', 'error', 'Lookup field has no options')
+def check_lookup_options(field, index, ctx):
+    if field.get('type') != 'lookup':
+        return
+    options = field.get('options') or []
+    if not options:
+        yield f"Lookup '{field.get('key')}' has no options", index
+    elif len(options) == 1 and options[0].get('value') == LOOKUP_PLACEHOLDER:
+        yield f"Lookup '{field.get('key')}' only has the '{LOOKUP_PLACEHOLDER}' placeholder", index
+
+@rule('duplicate-option-value', 'warning', 'Option value repeated within a field')
+def check_duplicate_options(field, index, ctx):
+    seen = set()
+    for o in field.get('options') or []:
+        value = str(o.get('value')).strip().lower()
+        if value in seen:
+            yield f"Option '{o.get('value')}' repeated in '{field.get('key')}'", index
+        seen.add(value)
+
+@collector
+def collect_condition_refs(field, index, ctx):
+    # Keys defined later in the schema are still valid, so resolve after the walk
+    for r in field.get('visibility') or []:
+        for c in r.get('conditions') or []:
+            ctx['refs'].append((index, field.get('key'), c.get('sourceKey')))
+
+@collector
+def collect_sections(field, index, ctx):
+    section = field.get('_section')
+    key = field.get('accordionKey') or (section_slug(section) if isinstance(section, str) and section else LEGACY_ACCORDION)
+    ctx['sections'].setdefault(key, index)
+
+# --- Schema rules (after the walk) --------------------------------------------
+
+@rule('unresolved-condition-key', 'error', 'Condition sourceKey is not a field of the schema', scope='schema')
+def check_condition_refs(schema, ctx):
+    keys = ctx['keys']
+    reported = set()
+    for index, key, src in ctx['refs']:
+        if src not in keys and (key, src) not in reported:
+            reported.add((key, src))
+            yield f"'{key}' depends on unknown field '{src}'", index
+
+@rule('accordion-unknown-field', 'error', 'Accordion lists a field the schema does not have', scope='schema')
+def check_accordion_fields(schema, ctx):
+    for a in schema.get('accordions') or []:
+        for key in a.get('fields') or []:
+            if key not in ctx['keys']:
+                yield f"Accordion '{a.get('key')}' lists unknown field '{key}'", None
+
+@rule('accordion-without-fields', 'warning', 'No field is placed in this accordion', scope='schema')
+def check_orphan_accordions(schema, ctx):
+    for a in schema.get('accordions') or []:
+        key = a.get('key') or section_slug(a.get('title') or '')
+        if key not in ctx['sections']:
+            yield f"Accordion '{key}' has no fields (no field section maps to it)", None
+
+@rule('field-without-accordion', 'note', 'Field section matches no accordion', scope='schema')
+def check_unplaced_sections(schema, ctx):
+    accordions = schema.get('accordions') or []
+    if not accordions:
+        return
+    known = {a.get('key') or section_slug(a.get('title') or '') for a in accordions}
+    for key, index in ctx['sections'].items():
+        if key not in known and key != LEGACY_ACCORDION:
+            yield f"Section '{key}' matches no accordion; its fields fall under Additional Questions", index
+
+# --- Engine --------------------------------------------------------------------
+
+def lint_schema(schema: dict) -> list[dict]:
+    """Run every rule over one schema in a single pass over its fields"""
+    container = 'fields' if 'fields' in schema else 'items'
+    if container == 'fields':
+        fields = schema.get('fields') or []
+    else:
+        from conditions_report import legacy_fields
+        fields = legacy_fields(schema)
+    ctx = {'keys': {}, 'refs': [], 'sections': {}}
+    results = []
+    checks = [(r, r['check']) for r in FIELD_RULES]
+    for index, field in enumerate(fields):
+        if not isinstance(field, dict):
+            continue
+        for collect in COLLECTORS:
+            collect(field, index, ctx)
+        for r, check in checks:
+            for message, at in check(field, index, ctx):
+                results.append({'rule': r['id'], 'level': r['level'], 'message': message, 'location': f"{container}[{at}]", 'key': field.get('key')})
+    for r in SCHEMA_RULES:
+        for message, at in r['check'](schema, ctx):
+            key = fields[at].get('key') if at is not None else None
+            location = f"{container}[{at}]" if at is not None else None
+            results.append({'rule': r['id'], 'level': r['level'], 'message': message, 'location': location, 'key': key})
+    return results
+
+def lint_file(path: str) -> dict:
+    """Worker: load and lint one schema file"""
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    started = time.perf_counter()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            schema = yaml.load(f, Loader=loader) or {}
+        results = lint_schema(schema)
+    except Exception as e:
+        results = [{'rule': 'schema-load', 'level': 'error', 'message': f"Could not lint schema: {e}", 'location': None, 'key': None}]
+    return {'path': path, 'results': results, 'seconds': round(time.perf_counter() - started, 4)}
+
+def schema_files(targets: list[str]) -> list[Path]:
+    """Schema files for journey keys or paths (pre-commit passes staged file paths)"""
+    files = [Path(t) for t in targets if Path(t).is_file()]
+    journeys = [t for t in targets if not Path(t).is_file()]
+    if targets:
+        dirs = [SCHEMAS_DIR / j for j in journeys]
+    else:
+        dirs = sorted(p for p in SCHEMAS_DIR.iterdir() if p.is_dir())
+    for d in dirs:
+        found = [d / n for n in ('schema-kycp.yaml', 'schema.yaml') if (d / n).exists()]
+        if not found:
+            warn(f"No schema in {d}")
+        files.extend(found)
+    return files
+
+def relative_uri(path: str) -> str:
+    try:
+        return Path(path).resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return Path(path).as_posix()
+
+def to_sarif(linted: list[dict]) -> dict:
+    rules = [{
+        'id': r['id'],
+        'shortDescription': {'text': r['description']},
+        'defaultConfiguration': {'level': r['level']}
+    } for r in FIELD_RULES + SCHEMA_RULES]
+    results = []
+    for item in linted:
+        uri = relative_uri(item['path'])
+        for res in item['results']:
+            location = {'physicalLocation': {'artifactLocation': {'uri': uri}}}
+            if res['location']:
+                location['logicalLocations'] = [{'fullyQualifiedName': res['location'], 'name': str(res['key'])}]
+            results.append({
+                'ruleId': res['rule'],
+                'level': res['level'],
+                'message': {'text': res['message']},
+                'locations': [location]
+            })
+    return {
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'version': '2.1.0',
+        'runs': [{'tool': {'driver': {'name': 'rbsi-schema-lint', 'rules': rules}}, 'results': results}]
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description='Lint KYCP and legacy schemas')
+    ap.add_argument('journeys', nargs='*', help='Journey keys or schema files (default: every schema under data/schemas/)')
+    ap.add_argument('--sarif', help='Write SARIF 2.1.0 to this path')
+    ap.add_argument('--json', help='Write plain JSON results to this path')
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ap.add_argument('--fail-on', choices=LEVELS, default='error', help='Exit 1 when a result at this level or above is found')
+    ap.add_argument('--quiet', action='store_true', help='Only print the summary')
+    args = ap.parse_args()
+
+    files = [str(p) for p in schema_files(args.journeys)]
+    started = time.perf_counter()
+    if args.workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(files))) as pool:
+            linted = list(pool.map(lint_file, files))
+    else:
+        linted = [lint_file(p) for p in files]
+    elapsed = time.perf_counter() - started
+
+    counts = {level: 0 for level in LEVELS}
+    for item in linted:
+        for res in item['results']:
+            counts[res['level']] += 1
+            if not args.quiet:
+                where = f" [{res['key']}]" if res['key'] else ''
+                print(f"{relative_uri(item['path'])}: {res['level']}: {res['rule']}{where}: {res['message']}")
+    info(f"Linted {len(files)} schemas in {elapsed:.2f}s: "
+         f"{counts['error']} errors, {counts['warning']} warnings, {counts['note']} notes")
+
+    if args.sarif:
+        out = Path(args.sarif)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(to_sarif(linted), indent=2, ensure_ascii=False), encoding='utf-8')
+        info(f"Wrote {out}")
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        payload = {'counts': counts, 'schemas': [{**item, 'path': relative_uri(item['path'])} for item in linted]}
+        out.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding='utf-8')
+        info(f"Wrote {out}")
+
+    threshold = LEVELS.index(args.fail_on)
+    return 1 if any(counts[level] for level in LEVELS[threshold:]) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Opt-in process-pool field construction for very large sheets
+
+Importers hand their per-row builder (process_field, create_kycp_field's row
+wrapper) to map_rows together with the read-only tables it needs (mapping,
+lookup registry):
+
+    from parallel_fields import map_rows
+    fields = map_rows(process_field, included, mapping, lookups)
+
+With RBSI_IMPORT_WORKERS unset (the default) this is a plain loop. With
+RBSI_IMPORT_WORKERS=N (or "auto" for one per CPU) and at least MIN_ROWS rows,
+the rows are cut into chunks and built in a pool of N processes. The shared
+tables go to each worker once, through the pool initializer, not with every
+chunk. Results come back in row order, and the import_metrics counters each
+worker records are added to this process's counters (each worker has its own
+visibility cache, so cache-hit counts come out lower).
+
+Workers return pickled copies, so objects that were shared between fields (a
+lookup's option list) are no longer shared afterwards. Importers put those
+references back so the YAML they write stays the same.
+
+Usage:
+  RBSI_IMPORT_WORKERS=auto python apps/prototype/scripts/import_non_lux_2_2.py
+  RBSI_IMPORT_WORKERS=8 python scripts/import_xlsx_kycp.py --mapping ... --input ...
+"""
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from import_metrics import metrics
+
+# Below this many rows the pool's start-up costs more than it saves
+MIN_ROWS = 2000
+CHUNK_ROWS = 500
+
+def configured_workers() -> int:
+    value = (os.environ.get('RBSI_IMPORT_WORKERS') or '').strip().lower()
+    if value == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(0, int(value or 0))
+    except ValueError:
+        return 0
+
+_worker: dict = {}
+
+def _init_worker(fn, shared: tuple):
+    # Forked workers inherit the parent's counters; start from zero
+    metrics.start(None)
+    _worker['fn'] = fn
+    _worker['shared'] = shared
+
+def _build_chunk(chunk: list) -> tuple[list, dict]:
+    fn, shared = _worker['fn'], _worker['shared']
+    metrics.counters.clear()
+    results = [fn(item, *shared) for item in chunk]
+    return results, dict(metrics.counters)
+
+def map_rows(fn, items: list, *shared, workers: int | None = None) -> list:
+    """[fn(item, *shared) for item in items], built in a process pool when enabled and worth it"""
+    workers = configured_workers() if workers is None else workers
+    if workers <= 1 or len(items) < MIN_ROWS:
+        return [fn(item, *shared) for item in items]
+    chunks = [items[i:i + CHUNK_ROWS] for i in range(0, len(items), CHUNK_ROWS)]
+    out = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=(fn, shared)) as pool:
+        for results, counters in pool.map(_build_chunk, chunks):
+            out.extend(results)
+            for name, n in counters.items():
+                metrics.count(name, n)
+    metrics.count('parallel.chunks', len(chunks))
+    return out
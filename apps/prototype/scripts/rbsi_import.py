@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+rbsi-import: build every journey schema from the manifest
+
+Journeys with an `import:` block in data/schemas/manifest.yaml are buildable:
+
+  import:
+    script: apps/prototype/scripts/import_non_lux_2_2.py      # journey-specific importer
+  import:
+    script: scripts/import_xlsx.py                            # generic importer
+    mapping: zelda.json                                       # data/mappings/
+    input: 20250909_Zelda_Mapping.xlsx                        # data/incoming/
+    output: schema.yaml                                       # optional, in data/schemas/<journey>/
+
+Inputs and outputs of journey-specific importers are read from their own
+constants (INCOMING, MAPPING, AS_IS_SCHEMA_PATH, OUT_FILE, ...), so nothing is
+declared twice. A journey whose input is another journey's output depends on
+it (sprint-2-testing-flow reads the non-lux-1-1 schema as its AS-IS source).
+
+A journey is rebuilt only when it is stale: an input (spreadsheet, mapping,
+upstream schema or importer code) hashes differently from its last build, or
+an output is missing. Input hashes are stored in
+data/generated/importer-cli/<journey>/build.json. Independent journeys build
+in parallel, each importer in its own process; dependents start as soon as
+their dependencies finish.
+
+Usage:
+  python apps/prototype/scripts/rbsi_import.py                  # rebuild stale journeys
+  python apps/prototype/scripts/rbsi_import.py sprint-2-testing-flow --force
+  python apps/prototype/scripts/rbsi_import.py --list
+  python apps/prototype/scripts/rbsi_import.py --watch          # rebuild on save (see watch_import.py)
+"""
+from __future__ import annotations
+import argparse, hashlib, importlib, json, os, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+SCRIPTS_DIR = APP_DIR / 'scripts'
+REPO_ROOT = APP_DIR.parents[1]
+MANIFEST = DATA_DIR / 'schemas' / 'manifest.yaml'
+STATE_DIR = DATA_DIR / 'generated' / 'importer-cli'
+
+# Importer module constants that name inputs/outputs
+INPUT_CONSTANTS = ('INCOMING', 'INCOMING_CSV', 'MAPPING', 'AS_IS_SCHEMA_PATH', 'AS_IS_FIELDS_PATH')
+OUTPUT_CONSTANTS = ('OUT_FILE', 'COPY_MAP_FILE')
+# Shared code every journey-specific importer runs through
+SHARED_INPUTS = (
+    SCRIPTS_DIR / 'as_is_index.py',
+    SCRIPTS_DIR / 'compiled_mapping.py',
+    SCRIPTS_DIR / 'conditions_report.py',
+    SCRIPTS_DIR / 'csv_stream.py',
+    SCRIPTS_DIR / 'exclusion_ledger.py',
+    SCRIPTS_DIR / 'identifiers.py',
+    SCRIPTS_DIR / 'import_metrics.py',
+    SCRIPTS_DIR / 'parallel_fields.py',
+    SCRIPTS_DIR / 'validate_kycp_schema.py',
+    SCRIPTS_DIR / 'kycp_schema.json',
+)
+
+def warn(msg: str):
+    print(f"[warn] {msg}", file=sys.stderr)
+
+def info(msg: str):
+    print(f"[info] {msg}")
+
+def rel(path: Path) -> str:
+    try:
+        return path.resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+def file_hash(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest() -> list[dict]:
+    import yaml
+    with MANIFEST.open('r', encoding='utf-8') as f:
+        manifest = yaml.safe_load(f) or {}
+    return manifest.get('active') or []
+
+def importer_paths(script: Path) -> tuple[list[Path], list[Path]]:
+    """Inputs/outputs declared as constants in a journey-specific importer"""
+    if str(script.parent) not in sys.path:
+        sys.path.insert(0, str(script.parent))
+    module = importlib.import_module(script.stem)
+    inputs = [getattr(module, n) for n in INPUT_CONSTANTS if isinstance(getattr(module, n, None), Path)]
+    outputs = [getattr(module, n) for n in OUTPUT_CONSTANTS if isinstance(getattr(module, n, None), Path)]
+    return inputs, outputs
+
+def build_plan(entries: list[dict]) -> dict[str, dict]:
+    """Journey → {script, command, inputs, outputs, deps} for every buildable journey"""
+    plan = {}
+    for entry in entries:
+        spec = entry.get('import')
+        if not spec:
+            continue
+        key = entry['key']
+        script = REPO_ROOT / spec['script']
+        if not script.exists():
+            warn(f"{key}: importer not found: {spec['script']}")
+            continue
+        if spec.get('mapping'):
+            mapping = DATA_DIR / 'mappings' / spec['mapping']
+            incoming = DATA_DIR / 'incoming' / spec['input']
+            out = DATA_DIR / 'schemas' / key / spec.get('output', 'schema.yaml')
+            # The generic importers import the shared modules too (via sys.path)
+            inputs = [mapping, incoming] + list(SHARED_INPUTS)
+            outputs = [out]
+            command = [sys.executable, str(script), '--mapping', rel(mapping), '--input', rel(incoming),
+                       '--out', rel(out), '--journey-key', key]
+        else:
+            inputs, outputs = importer_paths(script)
+            inputs = inputs + list(SHARED_INPUTS)
+            command = [sys.executable, str(script)]
+        plan[key] = {
+            'script': script,
+            'command': command,
+            'inputs': [script] + inputs,
+            'outputs': outputs,
+            'deps': set()
+        }
+
+    produced_by = {out.resolve(): key for key, job in plan.items() for out in job['outputs']}
+    for key, job in plan.items():
+        for path in job['inputs']:
+            owner = produced_by.get(path.resolve())
+            if owner and owner != key:
+                job['deps'].add(owner)
+    return plan
+
+def topological_order(plan: dict[str, dict]) -> list[str]:
+    order, state = [], {}
+    def visit(key, trail):
+        if state.get(key) == 'done':
+            return
+        if state.get(key) == 'visiting':
+            raise SystemExit(f"Dependency cycle: {' -> '.join(trail + [key])}")
+        state[key] = 'visiting'
+        for dep in sorted(plan[key]['deps']):
+            visit(dep, trail + [key])
+        state[key] = 'done'
+        order.append(key)
+    for key in plan:
+        visit(key, [])
+    return order
+
+def state_file(key: str) -> Path:
+    return STATE_DIR / key / 'build.json'
+
+def stale_reason(key: str, job: dict) -> tuple[str | None, dict]:
+    """Why a journey needs rebuilding (None when up to date) and its current input hashes"""
+    hashes = {rel(p): file_hash(p) for p in job['inputs']}
+    missing = [k for k, v in hashes.items() if v is None]
+    if missing:
+        return f"missing input {missing[0]}", hashes
+    try:
+        previous = json.loads(state_file(key).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return 'never built', hashes
+    changed = [k for k, v in hashes.items() if previous.get('inputs', {}).get(k) != v]
+    if changed:
+        return f"changed {', '.join(changed)}", hashes
+    absent = [rel(p) for p in job['outputs'] if not p.exists()]
+    if absent:
+        return f"missing output {absent[0]}", hashes
+    return None, hashes
+
+def run_import(key: str, job: dict, hashes: dict) -> dict:
+    """Run one importer in its own process and record its input hashes on success"""
+    started = time.perf_counter()
+    proc = subprocess.run(job['command'], cwd=REPO_ROOT, capture_output=True, text=True)
+    seconds = round(time.perf_counter() - started, 2)
+    result = {'key': key, 'ok': proc.returncode == 0, 'seconds': seconds,
+              'returncode': proc.returncode, 'stdout': proc.stdout, 'stderr': proc.stderr}
+    if result['ok']:
+        record_build(key, job, hashes, seconds)
+    return result
+
+def record_build(key: str, job: dict, hashes: dict, seconds: float):
+    """Remember the input hashes a journey was built from"""
+    out = state_file(key)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        'journey': key,
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        'seconds': seconds,
+        'command': [rel(Path(c)) if c.endswith('.py') else c for c in job['command'][1:]],
+        'inputs': hashes,
+        'outputs': {rel(p): file_hash(p) for p in job['outputs']}
+    }, indent=2), encoding='utf-8')
+
+def build(plan: dict[str, dict], targets: list[str], force: bool, jobs: int, dry_run: bool, verbose: bool) -> int:
+    # Targets plus everything upstream of them
+    wanted, stack = set(), list(targets)
+    while stack:
+        key = stack.pop()
+        if key not in wanted:
+            wanted.add(key)
+            stack.extend(plan[key]['deps'])
+    order = [k for k in topological_order(plan) if k in wanted]
+
+    pending = {k: set(plan[k]['deps']) & wanted for k in order}
+    rebuilt, failed, skipped = set(), set(), []
+    running = {}
+
+    def finish(key):
+        for deps in pending.values():
+            deps.discard(key)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            ready = [k for k in order if k in pending and not pending[k]]
+            for key in ready:
+                del pending[key]
+                job = plan[key]
+                if job['deps'] & failed:
+                    failed.add(key)
+                    skipped.append(key)
+                    warn(f"{key}: skipped (dependency failed)")
+                    finish(key)
+                    continue
+                reason, hashes = stale_reason(key, job)
+                if reason is None and dry_run and job['deps'] & rebuilt:
+                    reason = 'upstream schema may change'
+                if reason is None and force:
+                    reason = 'forced'
+                if reason is None:
+                    info(f"{key}: up to date")
+                    finish(key)
+                elif dry_run:
+                    info(f"{key}: would rebuild ({reason})")
+                    rebuilt.add(key)
+                    finish(key)
+                else:
+                    info(f"{key}: rebuilding ({reason})")
+                    running[pool.submit(run_import, key, job, hashes)] = key
+            if ready and not running:
+                continue
+            if not running:
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = running.pop(fut)
+                result = fut.result()
+                if result['ok']:
+                    rebuilt.add(key)
+                    info(f"{key}: built in {result['seconds']}s")
+                    if verbose:
+                        print(result['stdout'], end='')
+                else:
+                    failed.add(key)
+                    warn(f"{key}: importer failed (exit {result['returncode']})")
+                    print(result['stdout'] + result['stderr'], file=sys.stderr, end='')
+                finish(key)
+
+    info(f"Rebuilt {len(rebuilt)}, failed {len(failed) - len(skipped)}, skipped {len(skipped)}, "
+         f"up to date {len(order) - len(rebuilt) - len(failed)}")
+    return 1 if failed else 0
+
+def main():
+    ap = argparse.ArgumentParser(prog='rbsi-import', description='Rebuild stale journey schemas from the manifest')
+    ap.add_argument('journeys', nargs='*', help='Journeys to build (default: every journey with an import block)')
+    ap.add_argument('--force', action='store_true', help='Rebuild even when inputs are unchanged')
+    ap.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, help='Importers to run in parallel')
+    ap.add_argument('--dry-run', action='store_true', help='Only report what would be rebuilt')
+    ap.add_argument('--list', action='store_true', help='Print the build graph and exit')
+    ap.add_argument('--verbose', '-v', action='store_true', help='Echo importer output')
+    ap.add_argument('--watch', action='store_true', help='Keep running and rebuild affected journeys when inputs change')
+    args = ap.parse_args()
+
+    if args.watch:
+        from watch_import import main as watch_main
+        sys.argv = [sys.argv[0]] + args.journeys + (['--verbose'] if args.verbose else [])
+        return watch_main()
+
+    plan = build_plan(load_manifest())
+    unknown = [k for k in args.journeys if k not in plan]
+    if unknown:
+        print(f"ERROR: not buildable (no import block in manifest): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    if args.list:
+        for key in topological_order(plan):
+            job = plan[key]
+            reason, _ = stale_reason(key, job)
+            deps = f" (after {', '.join(sorted(job['deps']))})" if job['deps'] else ''
+            print(f"{key}{deps}: {reason or 'up to date'}")
+            for p in job['inputs']:
+                print(f"  < {rel(p)}")
+            for p in job['outputs']:
+                print(f"  > {rel(p)}")
+        return 0
+
+    return build(plan, args.journeys or list(plan), args.force, args.jobs, args.dry_run, args.verbose)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Exhaustive visibility-path simulator for KYCP schemas
+
+Enumerates every reachable form state of a schema-kycp.yaml, branching only
+on controller fields (fields used as a condition sourceKey) and only on the
+values their conditions actually mention. All other answers, including
+"unset", behave identically for every condition and are folded into a single
+OTHER class. A controller can only hold a value while it is itself visible.
+
+Visibility follows the preview (pages/preview-kycp): a field with rules is
+visible if any rule passes; conditions compare case-insensitively and `neq`
+passes when the source is unset.
+
+To stay tractable the simulator:
+- splits controllers into independent components (fields whose conditions
+  share no controller never interact),
+- assigns controllers in dependency order so a controller's visibility is
+  known before branching on it,
+- memoizes each step on the assignment of only those controllers that are
+  still referenced by later steps, so equivalent partial states are explored
+  once.
+
+Reports fields that can never be shown (always hidden: statically dead rules;
+unreachable: dead only because of how controllers chain), condition values no
+option can produce, and the maximum number of visible input fields together
+with answers that reach it.
+
+Usage:
+  python apps/prototype/scripts/simulate_visibility.py non-lux-lp-2-2
+  python apps/prototype/scripts/simulate_visibility.py non-lux-lp-2-2 --json out.json
+"""
+from __future__ import annotations
+import argparse, json, sys, time, yaml
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Equivalence class for "unset or any value no condition mentions"
+OTHER = None
+
+def short(value, limit: int = 60) -> str:
+    text = str(value)
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+def warn(msg: str):
+    print(f"[warn] {msg}", file=sys.stderr)
+
+def info(msg: str):
+    print(f"[info] {msg}")
+
+def load_kycp_schema(journey_or_path: str) -> dict:
+    p = Path(journey_or_path)
+    if not p.is_file():
+        p = DATA_DIR / 'schemas' / journey_or_path / 'schema-kycp.yaml'
+    if not p.exists():
+        raise SystemExit(f"Schema not found: {p}")
+    with p.open('r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=YAML_LOADER) or {}
+
+def norm_value(value):
+    """Case-insensitive comparison value (mirrors the preview's toLowerCase)"""
+    if value is None:
+        return None
+    return str(value).lower()
+
+def compile_rules(field: dict) -> list[tuple[bool, list[tuple[str, str, object]]]]:
+    """[(all_must_match, [(sourceKey, operator, normalized value)])]"""
+    rules = []
+    for rule in field.get('visibility') or []:
+        conds = [
+            (c.get('sourceKey'), c.get('operator'), norm_value(c.get('value')))
+            for c in rule.get('conditions') or []
+        ]
+        rules.append((rule.get('allConditionsMustMatch') is not False, conds))
+    return rules
+
+def condition_passes(op: str, current, target, all_match: bool) -> bool:
+    if op in ('eq', '=='):
+        return current == target
+    if op in ('neq', '!='):
+        return current != target
+    # Unknown operators pass in AND rules and fail in OR rules (as in the preview)
+    return all_match
+
+def is_visible(rules, assignment: dict) -> bool:
+    """Any rule passing makes the field visible; no rules means always visible"""
+    if not rules:
+        return True
+    for all_match, conds in rules:
+        tests = (condition_passes(op, assignment.get(src), value, all_match) for src, op, value in conds)
+        if all(tests) if all_match else any(tests):
+            return True
+    return False
+
+def rule_sources(rules) -> set[str]:
+    return {src for _, conds in rules for src, _, _ in conds}
+
+def is_input_field(field: dict) -> bool:
+    return (field.get('style') or 'field') == 'field'
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+def dependency_order(controllers: list[str], deps: dict[str, set[str]]) -> list[str]:
+    """Topological order (dependencies first); cycle members keep input order"""
+    remaining = {c: {d for d in deps.get(c, ()) if d in deps and d != c} for c in controllers}
+    order = []
+    ready = [c for c in controllers if not remaining[c]]
+    placed = set()
+    while len(order) < len(controllers):
+        if not ready:
+            # Break a cycle with the first unplaced controller
+            ready = [next(c for c in controllers if c not in placed)]
+        c = ready.pop(0)
+        if c in placed:
+            continue
+        placed.add(c)
+        order.append(c)
+        for other in controllers:
+            if other not in placed and c in remaining[other]:
+                remaining[other].discard(c)
+                if not remaining[other]:
+                    ready.append(other)
+    return order
+
+def simulate_component(controllers, field_ids, rules_by_field, controller_field, choices, counted):
+    """Explore one independent component; returns (states, max_count, visible_mask, best_answers)"""
+    deps = {c: rule_sources(rules_by_field[controller_field[c]]) if c in controller_field else set()
+            for c in controllers}
+    order = dependency_order(controllers, deps)
+    index = {c: i for i, c in enumerate(order)}
+
+    # Events fire at the step where their last controller is assigned
+    field_events = [[] for _ in order]
+    for fid in field_ids:
+        step = max(index[s] for s in rule_sources(rules_by_field[fid]))
+        field_events[step].append(fid)
+    check_events = [[] for _ in order]
+    pre_checks = [False] * len(order)
+    for c in order:
+        if c in controller_field and rules_by_field[controller_field[c]]:
+            step = max([index[c]] + [index[d] for d in deps[c]])
+            check_events[step].append(c)
+            pre_checks[index[c]] = step == index[c]
+
+    last_use = {c: index[c] for c in order}
+    for step, fids in enumerate(field_events):
+        for fid in fids:
+            for s in rule_sources(rules_by_field[fid]):
+                last_use[s] = max(last_use[s], step)
+    for step, cs in enumerate(check_events):
+        for c in cs:
+            for s in deps[c] | {c}:
+                last_use[s] = max(last_use[s], step)
+    live = [[c for c in order[:i] if last_use[c] >= i] for i in range(len(order) + 1)]
+
+    memo = {}
+    assignment = {}
+
+    def explore(i):
+        if i == len(order):
+            return 1, 0, 0, None
+        key = (i, tuple(assignment.get(c) for c in live[i]))
+        cached = memo.get(key)
+        if cached is not None:
+            return cached
+
+        c = order[i]
+        options = choices[c]
+        if pre_checks[i] and not is_visible(rules_by_field[controller_field[c]], assignment):
+            options = (OTHER,)
+
+        states = 0
+        best = -1
+        best_value = OTHER
+        mask = 0
+        for value in options:
+            assignment[c] = value
+            if any(assignment.get(k) is not OTHER and not is_visible(rules_by_field[controller_field[k]], assignment)
+                   for k in check_events[i]):
+                continue
+            count = 0
+            step_mask = 0
+            for fid in field_events[i]:
+                if is_visible(rules_by_field[fid], assignment):
+                    step_mask |= 1 << fid
+                    count += counted[fid]
+            sub_states, sub_best, sub_mask, _ = explore(i + 1)
+            if not sub_states:
+                continue  # no consistent completion (deferred checks in a cycle)
+            states += sub_states
+            mask |= step_mask | sub_mask
+            if count + sub_best > best:
+                best = count + sub_best
+                best_value = value
+        assignment.pop(c, None)
+
+        result = (states, best, mask, best_value)
+        memo[key] = result
+        return result
+
+    states, best, mask, _ = explore(0)
+
+    # Replay the memo to recover answers that reach the maximum
+    answers = {}
+    for i, c in enumerate(order):
+        value = memo[(i, tuple(assignment.get(k) for k in live[i]))][3]
+        assignment[c] = value
+        if value is not OTHER:
+            answers[c] = value
+    return states, best, mask, answers, len(memo)
+
+def static_dead_reason(rules, choices, known_keys) -> str | None:
+    """Why every rule of a field is unsatisfiable regardless of other answers"""
+    reasons = []
+    for all_match, conds in rules:
+        rule_reasons = []
+        required = {}
+        for src, op, value in conds:
+            if op in ('eq', '==') and value not in choices.get(src, ()):
+                rule_reasons.append(f"{src} can never be '{value}'" if src in known_keys
+                                    else f"{src} is not a field in this schema")
+            elif op in ('eq', '==') and required.setdefault(src, value) != value:
+                rule_reasons.append(f"{src} must equal both '{required[src]}' and '{value}'")
+        if all_match and rule_reasons:
+            reasons.append('; '.join(rule_reasons))
+        elif not all_match and conds and len(rule_reasons) == len(conds):
+            reasons.append('; '.join(rule_reasons))
+        else:
+            return None
+    return ' | '.join(dict.fromkeys(reasons)) if reasons else None
+
+def simulate(schema: dict) -> dict:
+    fields = schema.get('fields') or []
+    rules_by_field = [compile_rules(f) for f in fields]
+    counted = [1 if is_input_field(f) else 0 for f in fields]
+
+    controller_field = {}
+    for fid, f in enumerate(fields):
+        controller_field.setdefault(f.get('key'), fid)
+    known_keys = set(controller_field)
+
+    referenced: dict[str, dict] = {}
+    for rules in rules_by_field:
+        for _, conds in rules:
+            for src, _, value in conds:
+                referenced.setdefault(src, {})[value] = True
+
+    # Branch values: referenced values an answer can actually produce
+    choices = {}
+    impossible = []
+    for src, values in referenced.items():
+        field = fields[controller_field[src]] if src in controller_field else None
+        if field is None:
+            reachable = []
+        elif field.get('options'):
+            option_values = {norm_value(o.get('value') if isinstance(o, dict) else o) for o in field['options']}
+            reachable = [v for v in values if v in option_values]
+        else:
+            reachable = [v for v in values if v is not None]
+        for v in values:
+            if v not in reachable and v is not None:
+                impossible.append({'sourceKey': src, 'value': v, 'missing_field': field is None})
+        choices[src] = tuple(reachable) + (OTHER,)
+    controllers = list(referenced)
+
+    # Independent components over controllers (plus the fields they gate)
+    uf = UnionFind()
+    for c in controllers:
+        uf.find(c)
+        if c in controller_field:
+            for s in rule_sources(rules_by_field[controller_field[c]]):
+                uf.union(c, s)
+    conditional = [fid for fid, rules in enumerate(rules_by_field) if rules]
+    for fid in conditional:
+        sources = list(rule_sources(rules_by_field[fid]))
+        for s in sources[1:]:
+            uf.union(sources[0], s)
+
+    components: dict[str, dict] = {}
+    for c in controllers:
+        components.setdefault(uf.find(c), {'controllers': [], 'fields': []})['controllers'].append(c)
+    for fid in conditional:
+        sources = rule_sources(rules_by_field[fid])
+        if sources:
+            components[uf.find(next(iter(sources)))]['fields'].append(fid)
+
+    # Fields whose visibility does not depend on any answer
+    const_visible = 0
+    visible_mask = 0
+    for fid, rules in enumerate(rules_by_field):
+        if not rule_sources(rules) and is_visible(rules, {}):
+            visible_mask |= 1 << fid
+            const_visible += counted[fid]
+
+    total_states = 1
+    max_visible = const_visible
+    best_answers = {}
+    memo_entries = 0
+    for comp in components.values():
+        states, best, mask, answers, memo_size = simulate_component(
+            comp['controllers'], comp['fields'], rules_by_field, controller_field, choices, counted
+        )
+        total_states *= states
+        max_visible += best
+        visible_mask |= mask
+        best_answers.update(answers)
+        memo_entries += memo_size
+
+    always_hidden = []
+    unreachable = []
+    for fid in conditional:
+        if visible_mask >> fid & 1:
+            continue
+        f = fields[fid]
+        entry = {'key': f.get('key'), 'label': f.get('label'),
+                 'sources': sorted(rule_sources(rules_by_field[fid]))}
+        reason = static_dead_reason(rules_by_field[fid], choices, known_keys)
+        if reason:
+            entry['reason'] = reason
+            always_hidden.append(entry)
+        else:
+            unreachable.append(entry)
+
+    # Report answers with the schema's own casing
+    display = {}
+    for c, value in best_answers.items():
+        field = fields[controller_field[c]] if c in controller_field else {}
+        for o in field.get('options') or []:
+            ov = o.get('value') if isinstance(o, dict) else o
+            if norm_value(ov) == value:
+                value = ov
+                break
+        display[c] = value
+
+    return {
+        'journey': schema.get('key'),
+        'fields': len(fields),
+        'input_fields': sum(counted),
+        'conditional_fields': len(conditional),
+        'controllers': len(controllers),
+        'components': len(components),
+        'largest_component': max((len(c['controllers']) for c in components.values()), default=0),
+        'reachable_states': total_states,
+        'memo_entries': memo_entries,
+        'max_visible_fields': max_visible,
+        'max_visible_answers': display,
+        'always_hidden': always_hidden,
+        'unreachable': unreachable,
+        'impossible_condition_values': impossible
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description='Enumerate reachable visibility states of a KYCP schema')
+    ap.add_argument('journey', help='Journey key (data/schemas/<key>/schema-kycp.yaml) or schema path')
+    ap.add_argument('--json', help='Write the full report to this path')
+    args = ap.parse_args()
+
+    schema = load_kycp_schema(args.journey)
+    started = time.perf_counter()
+    report = simulate(schema)
+    elapsed = time.perf_counter() - started
+    report['elapsed_seconds'] = round(elapsed, 3)
+
+    info(f"{report['journey']}: {report['fields']} fields, {report['conditional_fields']} conditional, "
+         f"{report['controllers']} controllers in {report['components']} components "
+         f"(largest {report['largest_component']})")
+    info(f"Reachable states: {report['reachable_states']} ({report['memo_entries']} memoized partial states, {elapsed:.2f}s)")
+    info(f"Max visible input fields: {report['max_visible_fields']} of {report['input_fields']}")
+    for entry in report['always_hidden']:
+        warn(f"Always hidden: {entry['key']} – {short(entry['reason'], 160)}")
+    for entry in report['unreachable']:
+        warn(f"Unreachable: {entry['key']} (depends on {', '.join(entry['sources'])})")
+    for entry in report['impossible_condition_values']:
+        if not entry['missing_field']:
+            warn(f"No option produces {entry['sourceKey']} = '{short(entry['value'])}'")
+
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str), encoding='utf-8')
+        info(f"Wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Structural validation of KYCP schemas (schema-kycp.yaml)
+
+Checks the field/accordion shape against scripts/kycp_schema.json (JSON
+Schema 2020-12). The validator is built once per process and reused for
+every schema; all errors are collected rather than stopping at the first.
+
+Importers call check_kycp_schema() before writing, so a malformed schema is
+never written (and never deployed). Requires the `jsonschema` package
+(requirements.txt); without it the check fails and so does the import. Set
+KYCP_SKIP_VALIDATION=1 to write schemas unvalidated anyway, e.g. on a machine
+where jsonschema cannot be installed.
+
+Usage:
+  python apps/prototype/scripts/validate_kycp_schema.py                 # every schema-kycp.yaml
+  python apps/prototype/scripts/validate_kycp_schema.py non-lux-lp-2-2 path/to/schema-kycp.yaml
+"""
+from __future__ import annotations
+import argparse, json, os, sys
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import jsonschema
+except ImportError:  # reported by check_kycp_schema(), which then fails the import
+    jsonschema = None
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / 'data'
+SCHEMA_FILE = Path(__file__).resolve().parent / 'kycp_schema.json'
+# Explicit opt-out: importers write without structural validation
+SKIP_ENV = 'KYCP_SKIP_VALIDATION'
+
+def warn(msg: str):
+    print(f"[warn] {msg}", file=sys.stderr)
+
+def info(msg: str):
+    print(f"[info] {msg}")
+
+@lru_cache(maxsize=None)
+def kycp_validator():
+    """JSON Schema validator for the KYCP shape, compiled once per process"""
+    with SCHEMA_FILE.open('r', encoding='utf-8') as f:
+        spec = json.load(f)
+    cls = jsonschema.validators.validator_for(spec)
+    cls.check_schema(spec)
+    return cls(spec)
+
+def format_error(error, schema: dict) -> str:
+    path = list(error.absolute_path)
+    where = '.'.join(str(p) for p in path) or '(root)'
+    # Name the field, the index alone is hard to find in a 2k-line YAML file
+    if len(path) >= 2 and path[0] == 'fields' and isinstance(path[1], int):
+        fields = schema.get('fields') or []
+        if path[1] < len(fields) and isinstance(fields[path[1]], dict):
+            where += f" [{fields[path[1]].get('key')}]"
+    return f"{where}: {error.message}"
+
+def validate_kycp(schema: dict) -> list[str]:
+    """Every structural error in a KYCP schema, in document order"""
+    def order(error):
+        return [(0, p, '') if isinstance(p, int) else (1, 0, str(p)) for p in error.absolute_path]
+    errors = sorted(kycp_validator().iter_errors(schema), key=order)
+    return [format_error(e, schema) for e in errors]
+
+def check_kycp_schema(schema: dict, max_shown: int = 20) -> bool:
+    """Importer hook: print errors and return False when the schema is invalid"""
+    if os.environ.get(SKIP_ENV, '').strip().lower() in ('1', 'true', 'yes'):
+        warn(f"{SKIP_ENV} set; skipping KYCP structural validation")
+        return True
+    if jsonschema is None:
+        print("ERROR: jsonschema is required to validate the KYCP schema (pip install -r requirements.txt); "
+              f"set {SKIP_ENV}=1 to write it unvalidated", file=sys.stderr)
+        return False
+    errors = validate_kycp(schema)
+    if not errors:
+        info("KYCP structure valid")
+        return True
+    print(f"ERROR: schema failed KYCP structural validation ({len(errors)} errors)", file=sys.stderr)
+    for e in errors[:max_shown]:
+        print(f"  {e}", file=sys.stderr)
+    if len(errors) > max_shown:
+        print(f"  ... {len(errors) - max_shown} more", file=sys.stderr)
+    return False
+
+def main():
+    import yaml
+    ap = argparse.ArgumentParser(description='Validate schema-kycp.yaml files against the KYCP structure')
+    ap.add_argument('targets', nargs='*', help='Journey keys or schema files (default: every schema-kycp.yaml)')
+    args = ap.parse_args()
+    if jsonschema is None:
+        print("ERROR: jsonschema is required (pip install jsonschema)", file=sys.stderr)
+        return 2
+
+    if args.targets:
+        paths = [Path(t) if Path(t).is_file() else DATA_DIR / 'schemas' / t / 'schema-kycp.yaml' for t in args.targets]
+    else:
+        paths = sorted((DATA_DIR / 'schemas').glob('*/schema-kycp.yaml'))
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    failed = 0
+    for p in paths:
+        if not p.exists():
+            warn(f"Schema not found: {p}")
+            failed += 1
+            continue
+        with p.open('r', encoding='utf-8') as f:
+            schema = yaml.load(f, Loader=loader) or {}
+        errors = validate_kycp(schema)
+        if errors:
+            failed += 1
+            print(f"{p}: {len(errors)} errors")
+            for e in errors:
+                print(f"  {e}")
+        else:
+            info(f"{p}: valid")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Vectorized visibility evaluator for bulk scenario testing (NumPy)
+
+Compiles a KYCP schema's visibility rules once into integer-coded tables:
+- every controller (condition sourceKey) gets a column, and each value its
+  conditions mention gets a small integer code; 0 means unset or any value no
+  condition mentions (they behave identically for every condition),
+- every condition becomes (controller column, value code, is-eq),
+- conditions are grouped by rule and rules by field, so rule and field results
+  are segment reductions over contiguous columns.
+
+A batch of answer vectors (rows × controllers, int codes) is then evaluated
+in one pass per stage with NumPy and returns a boolean visible-field matrix
+(rows × fields). Semantics match simulate_visibility.py and the preview:
+a field is visible if any rule passes, comparisons are case-insensitive.
+
+The CLI samples random applications and, with --baseline, compares two
+versions of a schema on the same answers to catch changes in how the
+importer parses visibility.
+
+Usage:
+  python apps/prototype/scripts/visibility_bitset.py non-lux-lp-2-2 --samples 10000
+  python apps/prototype/scripts/visibility_bitset.py non-lux-lp-2-2 --baseline old/schema-kycp.yaml
+"""
+from __future__ import annotations
+import argparse, json, sys, time
+from pathlib import Path
+
+import numpy as np
+
+from simulate_visibility import compile_rules, load_kycp_schema, norm_value, info, warn
+
+OP_EQ, OP_NEQ, OP_PASS, OP_FAIL = 0, 1, 2, 3
+
+def compile_visibility(schema: dict) -> dict:
+    """Compile a schema's rules into NumPy tables"""
+    fields = schema.get('fields') or []
+    rules_by_field = [compile_rules(f) for f in fields]
+
+    controllers: list[str] = []
+    controller_index: dict[str, int] = {}
+    value_codes: list[dict] = []
+
+    cond_ctrl, cond_code, cond_op = [], [], []
+    rule_start, rule_all, rule_len = [], [], []
+    field_rule_start, field_rule_count = [], []
+
+    for rules in rules_by_field:
+        field_rule_start.append(len(rule_start))
+        field_rule_count.append(len(rules))
+        for all_match, conds in rules:
+            rule_start.append(len(cond_ctrl))
+            rule_all.append(all_match)
+            rule_len.append(len(conds))
+            for src, op, value in conds:
+                if src not in controller_index:
+                    controller_index[src] = len(controllers)
+                    controllers.append(src)
+                    value_codes.append({})
+                ci = controller_index[src]
+                codes = value_codes[ci]
+                if value is None:
+                    code = 0
+                else:
+                    code = codes.setdefault(value, len(codes) + 1)
+                cond_ctrl.append(ci)
+                cond_code.append(code)
+                if op in ('eq', '=='):
+                    cond_op.append(OP_EQ)
+                elif op in ('neq', '!='):
+                    cond_op.append(OP_NEQ)
+                else:
+                    # Unknown operators pass in AND rules and fail in OR rules
+                    cond_op.append(OP_PASS if all_match else OP_FAIL)
+
+    first_field = {}
+    for i, f in enumerate(fields):
+        first_field.setdefault(f.get('key'), i)
+
+    return {
+        'keys': [f.get('key') for f in fields],
+        'controllers': controllers,
+        'controller_index': controller_index,
+        'value_codes': value_codes,
+        'cond_ctrl': np.array(cond_ctrl, dtype=np.intp),
+        'cond_code': np.array(cond_code, dtype=np.int32),
+        'cond_op': np.array(cond_op, dtype=np.int8),
+        'rule_start': np.array(rule_start, dtype=np.intp),
+        'rule_len': np.array(rule_len, dtype=np.intp),
+        'rule_all': np.array(rule_all, dtype=bool),
+        'field_rule_start': np.array(field_rule_start, dtype=np.intp),
+        'field_rule_count': np.array(field_rule_count, dtype=np.intp),
+        # Controllers that are fields themselves (for settling answers)
+        'controller_field': np.array([first_field.get(c, -1) for c in controllers], dtype=np.intp)
+    }
+
+def encode_answers(compiled: dict, answers: list[dict]) -> np.ndarray:
+    """Encode answer dicts ({fieldKey: value}) as a rows × controllers code matrix"""
+    matrix = np.zeros((len(answers), len(compiled['controllers'])), dtype=np.int32)
+    index = compiled['controller_index']
+    codes = compiled['value_codes']
+    for row, answer in enumerate(answers):
+        for key, value in answer.items():
+            ci = index.get(key)
+            if ci is not None:
+                matrix[row, ci] = codes[ci].get(norm_value(value), 0)
+    return matrix
+
+def _segment_reduce(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Sum columns of a rows × n int matrix over contiguous segments (empty → 0)"""
+    out = np.zeros((values.shape[0], len(starts)), dtype=np.int32)
+    nonempty = lengths > 0
+    if values.shape[1] and nonempty.any():
+        out[:, nonempty] = np.add.reduceat(values, starts[nonempty], axis=1)
+    return out
+
+def visible_matrix(compiled: dict, codes: np.ndarray) -> np.ndarray:
+    """rows × fields boolean matrix of visible fields for encoded answers"""
+    rows = codes.shape[0]
+    if len(compiled['cond_ctrl']):
+        current = codes[:, compiled['cond_ctrl']]
+        equal = current == compiled['cond_code']
+        op = compiled['cond_op']
+        passes = np.where(op == OP_EQ, equal, np.where(op == OP_NEQ, ~equal, op == OP_PASS))
+    else:
+        passes = np.zeros((rows, 0), dtype=bool)
+
+    passed = _segment_reduce(passes.astype(np.int32), compiled['rule_start'], compiled['rule_len'])
+    rule_ok = np.where(compiled['rule_all'], passed == compiled['rule_len'], passed > 0)
+
+    fields_any = _segment_reduce(rule_ok.astype(np.int32), compiled['field_rule_start'], compiled['field_rule_count'])
+    return (fields_any > 0) | (compiled['field_rule_count'] == 0)
+
+def settle_answers(compiled: dict, codes: np.ndarray, max_rounds: int = 50) -> np.ndarray:
+    """Clear answers of controllers that are hidden, until nothing changes
+
+    Mirrors a user who can only answer visible questions.
+    """
+    codes = codes.copy()
+    ctrl_field = compiled['controller_field']
+    has_field = ctrl_field >= 0
+    for _ in range(max_rounds):
+        visible = visible_matrix(compiled, codes)
+        hidden = np.zeros_like(codes, dtype=bool)
+        hidden[:, has_field] = ~visible[:, ctrl_field[has_field]]
+        hidden[:, ~has_field] = True
+        clear = hidden & (codes != 0)
+        if not clear.any():
+            break
+        codes[clear] = 0
+    return codes
+
+def random_codes(compiled: dict, rows: int, rng: np.random.Generator) -> np.ndarray:
+    """Uniform random answers over each controller's codes (0 = other/unset)"""
+    sizes = np.array([len(v) + 1 for v in compiled['value_codes']], dtype=np.int32)
+    return (rng.random((rows, len(sizes))) * sizes).astype(np.int32)
+
+def translate_codes(source: dict, target: dict, codes: np.ndarray) -> np.ndarray:
+    """Re-encode answers from one compiled schema's codes into another's"""
+    out = np.zeros((codes.shape[0], len(target['controllers'])), dtype=np.int32)
+    for ci, key in enumerate(source['controllers']):
+        ti = target['controller_index'].get(key)
+        if ti is None:
+            continue
+        lut = np.zeros(len(source['value_codes'][ci]) + 1, dtype=np.int32)
+        for value, code in source['value_codes'][ci].items():
+            lut[code] = target['value_codes'][ti].get(value, 0)
+        out[:, ti] = lut[codes[:, ci]]
+    return out
+
+def union_compiled(a: dict, b: dict) -> dict:
+    """Controller/value vocabulary covering both schemas (for shared samples)"""
+    controllers = list(a['controllers'])
+    index = dict(a['controller_index'])
+    values = [dict(v) for v in a['value_codes']]
+    for ci, key in enumerate(b['controllers']):
+        if key not in index:
+            index[key] = len(controllers)
+            controllers.append(key)
+            values.append({})
+        codes = values[index[key]]
+        for value in b['value_codes'][ci]:
+            codes.setdefault(value, len(codes) + 1)
+    return {'controllers': controllers, 'controller_index': index, 'value_codes': values}
+
+def compare_schemas(current: dict, baseline: dict, samples: int, rng: np.random.Generator) -> list[dict]:
+    """Fields (by key) whose visibility differs between two schemas on shared answers"""
+    union = union_compiled(current, baseline)
+    codes = random_codes(union, samples, rng)
+    vis_current = visible_matrix(current, translate_codes(union, current, codes))
+    vis_baseline = visible_matrix(baseline, translate_codes(union, baseline, codes))
+
+    base_col = {}
+    for i, key in enumerate(baseline['keys']):
+        base_col.setdefault(key, i)
+    diffs = []
+    for i, key in enumerate(current['keys']):
+        j = base_col.get(key)
+        if j is None:
+            continue
+        differ = vis_current[:, i] != vis_baseline[:, j]
+        count = int(differ.sum())
+        if count:
+            diffs.append({
+                'key': key,
+                'differing_samples': count,
+                'visible_now': int(vis_current[:, i].sum()),
+                'visible_before': int(vis_baseline[:, j].sum())
+            })
+    return diffs
+
+def main():
+    ap = argparse.ArgumentParser(description='Bulk-evaluate KYCP visibility over random applications')
+    ap.add_argument('journey', help='Journey key or schema-kycp.yaml path')
+    ap.add_argument('--samples', type=int, default=10000, help='Random applications to evaluate')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--settle', action='store_true', help='Clear answers of hidden controllers before evaluating')
+    ap.add_argument('--baseline', help='Other version of the schema to compare visibility against')
+    ap.add_argument('--json', help='Write the report to this path')
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    schema = load_kycp_schema(args.journey)
+    started = time.perf_counter()
+    compiled = compile_visibility(schema)
+    compile_s = time.perf_counter() - started
+
+    codes = random_codes(compiled, args.samples, rng)
+    if args.settle:
+        codes = settle_answers(compiled, codes)
+    started = time.perf_counter()
+    visible = visible_matrix(compiled, codes)
+    eval_s = time.perf_counter() - started
+
+    per_field = visible.sum(axis=0)
+    never = [k for k, n in zip(compiled['keys'], per_field) if n == 0]
+    report = {
+        'journey': schema.get('key'),
+        'fields': len(compiled['keys']),
+        'controllers': len(compiled['controllers']),
+        'conditions': int(len(compiled['cond_ctrl'])),
+        'samples': args.samples,
+        'settled': args.settle,
+        'compile_seconds': round(compile_s, 4),
+        'evaluate_seconds': round(eval_s, 4),
+        'visible_per_sample': {
+            'min': int(visible.sum(axis=1).min()) if args.samples else 0,
+            'mean': round(float(visible.sum(axis=1).mean()), 1) if args.samples else 0,
+            'max': int(visible.sum(axis=1).max()) if args.samples else 0
+        },
+        'never_visible_in_samples': never
+    }
+
+    info(f"{report['journey']}: {report['fields']} fields, {report['controllers']} controllers, "
+         f"{report['conditions']} conditions")
+    info(f"Evaluated {args.samples} applications in {eval_s:.3f}s (compile {compile_s:.3f}s)")
+    info(f"Visible fields per application: {report['visible_per_sample']}")
+    if never:
+        info(f"Never visible in samples: {len(never)}")
+
+    if args.baseline:
+        baseline = compile_visibility(load_kycp_schema(args.baseline))
+        diffs = compare_schemas(compiled, baseline, args.samples, rng)
+        report['visibility_changes'] = diffs
+        if diffs:
+            for d in diffs:
+                warn(f"{d['key']}: visibility differs in {d['differing_samples']} samples "
+                     f"(visible {d['visible_before']} → {d['visible_now']})")
+        else:
+            info("No visibility differences against baseline")
+
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, indent=2), encoding='utf-8')
+        info(f"Wrote {out}")
+
+    if args.baseline and report['visibility_changes']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the importers
+
+Polls every input of the journeys in the rbsi-import build graph (incoming
+spreadsheets/CSVs, mappings, importer code, upstream schemas). When something
+changes it waits for writes to settle, then rebuilds only the journeys that
+are stale, in dependency order, and leaves everything else untouched.
+
+Rebuilds run in this process so the expensive parts stay warm between runs:
+- importer modules (and yaml/jsonschema) are imported once; a module is
+  reloaded when its own file changes or when a shared module it imports was
+  reloaded after it (importers bind shared code with `from X import f`, so
+  they must be re-imported to see the new functions),
+- the KYCP validator is compiled once (validate_kycp_schema.kycp_validator),
+- workbooks are decompressed once per version: importers open spreadsheets
+  through WarmZipFile, which keeps every member of the last seen version of
+  each file in memory.
+
+Each schema is written to a temporary file beside the target and moved into
+place with os.replace, so the dev server never reads a half-written schema.
+Generic importers (scripts/import_xlsx.py) still run as a subprocess.
+
+Usage:
+  python apps/prototype/scripts/watch_import.py                 # every buildable journey
+  python apps/prototype/scripts/watch_import.py non-lux-lp-2-2 --debounce 0.3
+"""
+from __future__ import annotations
+import argparse, ast, contextlib, importlib, io, os, sys, time, traceback
+from pathlib import Path
+from zipfile import ZipFile
+
+import rbsi_import
+from rbsi_import import SCRIPTS_DIR, MANIFEST, build_plan, load_manifest, rel, record_build, run_import, stale_reason, topological_order, info, warn
+
+POLL_SECONDS = 0.2
+DEBOUNCE_SECONDS = 0.3
+
+_members: dict[str, tuple[tuple, dict[str, bytes]]] = {}
+
+class WarmZipFile:
+    """Read-only stand-in for ZipFile that serves members from memory
+
+    Members are decompressed the first time a given version (size, mtime) of
+    the file is opened and reused until the file changes.
+    """
+    def __init__(self, path, mode='r'):
+        path = Path(path)
+        st = path.stat()
+        version = (st.st_size, st.st_mtime_ns)
+        cached = _members.get(str(path))
+        if cached is None or cached[0] != version:
+            with ZipFile(path) as z:
+                cached = (version, {name: z.read(name) for name in z.namelist()})
+            _members[str(path)] = cached
+        self._data = cached[1]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def namelist(self) -> list[str]:
+        return list(self._data)
+
+    def read(self, name: str) -> bytes:
+        return self._data[name]
+
+    def open(self, name: str, mode='r'):
+        return io.BytesIO(self._data[name])
+
+    def close(self):
+        pass
+
+class Watcher:
+    def __init__(self, targets: list[str], debounce: float, verbose: bool):
+        self.targets = targets
+        self.debounce = debounce
+        self.verbose = verbose
+        self.modules: dict[str, object] = {}
+        self.module_mtimes: dict[str, int] = {}
+        # name -> load generation: a module older than one it imports is stale
+        self.loaded_at: dict[str, int] = {}
+        self.generation = 0
+        self._imports: dict[str, tuple[int, set[str]]] = {}
+        self.load_plan()
+
+    def load_plan(self):
+        self.plan = build_plan(load_manifest())
+        keys = self.targets or list(self.plan)
+        # Watch the targets and everything downstream of them
+        wanted = set(keys)
+        for key in topological_order(self.plan):
+            if self.plan[key]['deps'] & wanted:
+                wanted.add(key)
+        self.order = [k for k in topological_order(self.plan) if k in wanted]
+        self.paths = {MANIFEST}
+        for key in self.order:
+            self.paths.update(self.plan[key]['inputs'])
+
+    def snapshot(self) -> dict[Path, tuple | None]:
+        out = {}
+        for p in self.paths:
+            try:
+                st = p.stat()
+                out[p] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                out[p] = None
+        return out
+
+    def module_for(self, script: Path):
+        """Import (or reload after an edit) an importer and the shared modules it uses"""
+        paths = {p.stem: p for p in rbsi_import.SHARED_INPUTS if p.suffix == '.py'}
+        paths[script.stem] = script
+        deps = {name: self.imports_of(p) & paths.keys() - {name} for name, p in paths.items()}
+        for name in self.dependency_order(deps, script.stem):
+            self._fresh_module(paths[name], deps[name])
+        return self.modules[script.stem]
+
+    def imports_of(self, path: Path) -> set[str]:
+        """Top-level module names a script imports (cached per file version)"""
+        mtime = path.stat().st_mtime_ns
+        cached = self._imports.get(path.stem)
+        if cached is None or cached[0] != mtime:
+            names = set()
+            for node in ast.walk(ast.parse(path.read_text(encoding='utf-8'))):
+                if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    names.add(node.module.split('.')[0])
+                elif isinstance(node, ast.Import):
+                    names.update(a.name.split('.')[0] for a in node.names)
+            cached = (mtime, names)
+            self._imports[path.stem] = cached
+        return cached[1]
+
+    @staticmethod
+    def dependency_order(deps: dict[str, set[str]], root: str) -> list[str]:
+        """root and the shared modules it reaches, imported modules before their importers"""
+        order, seen = [], set()
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in sorted(deps[name]):
+                visit(dep)
+            order.append(name)
+        visit(root)
+        return order
+
+    def _fresh_module(self, path: Path, deps: set[str]):
+        name = path.stem
+        mtime = path.stat().st_mtime_ns
+        module = self.modules.get(name) or sys.modules.get(name)
+        if module is None or name not in self.loaded_at:
+            # First use: a fresh import binds the current version of everything it imports
+            module = module or importlib.import_module(name)
+        else:
+            edited = self.module_mtimes[name] != mtime
+            newer_dep = next((d for d in sorted(deps) if self.loaded_at.get(d, 0) > self.loaded_at[name]), None)
+            if not (edited or newer_dep):
+                return module
+            module = importlib.reload(module)
+            info(f"Reloaded {path.name}" + ('' if edited else f" ({newer_dep}.py changed)"))
+        self.generation += 1
+        self.loaded_at[name] = self.generation
+        self.modules[name] = module
+        self.module_mtimes[name] = mtime
+        return module
+
+    def run_in_process(self, key: str, job: dict) -> bool:
+        module = self.module_for(job['script'])
+        if hasattr(module, 'ZipFile'):
+            module.ZipFile = WarmZipFile
+        target = module.OUT_FILE
+        tmp = target.with_name(f".{target.name}.tmp")
+        module.OUT_FILE = tmp
+        captured = io.StringIO()
+        ok = False
+        try:
+            with contextlib.redirect_stdout(captured):
+                code = module.main()
+            ok = code in (None, 0)
+        except SystemExit as e:
+            ok = e.code in (None, 0)
+        except Exception:
+            traceback.print_exc(file=captured)
+        finally:
+            module.OUT_FILE = target
+        if ok and tmp.exists():
+            os.replace(tmp, target)
+        else:
+            ok = False
+            tmp.unlink(missing_ok=True)
+        if self.verbose or not ok:
+            print(captured.getvalue(), end='', file=sys.stdout if ok else sys.stderr)
+        return ok
+
+    def rebuild(self):
+        failed = set()
+        for key in self.order:
+            job = self.plan[key]
+            if job['deps'] & failed:
+                warn(f"{key}: skipped (dependency failed)")
+                failed.add(key)
+                continue
+            reason, hashes = stale_reason(key, job)
+            if reason is None:
+                continue
+            info(f"{key}: rebuilding ({reason})")
+            started = time.perf_counter()
+            if job['script'].parent == SCRIPTS_DIR:
+                ok = self.run_in_process(key, job)
+                seconds = round(time.perf_counter() - started, 2)
+                if ok:
+                    record_build(key, job, hashes, seconds)
+            else:
+                result = run_import(key, job, hashes)
+                ok, seconds = result['ok'], result['seconds']
+                if not ok:
+                    print(result['stdout'] + result['stderr'], file=sys.stderr, end='')
+            if ok:
+                info(f"{key}: schema updated in {seconds}s")
+            else:
+                failed.add(key)
+                warn(f"{key}: import failed; previous schema kept")
+
+    def run(self):
+        info(f"Watching {len(self.paths)} files for {', '.join(self.order)} (Ctrl+C to stop)")
+        self.rebuild()
+        seen = self.snapshot()
+        while True:
+            time.sleep(POLL_SECONDS)
+            current = self.snapshot()
+            if current == seen:
+                continue
+            # Debounce: wait until the files stop changing (editors and Excel write in bursts)
+            while True:
+                time.sleep(self.debounce)
+                settled = self.snapshot()
+                if settled == current:
+                    break
+                current = settled
+            changed = [rel(p) for p in current if current[p] != seen.get(p)]
+            info(f"Changed: {', '.join(sorted(changed))}")
+            if MANIFEST in current and current[MANIFEST] != seen.get(MANIFEST):
+                self.load_plan()
+                current = self.snapshot()
+            self.rebuild()
+            seen = self.snapshot()
+
+def main():
+    ap = argparse.ArgumentParser(description='Rebuild journey schemas when their inputs change')
+    ap.add_argument('journeys', nargs='*', help='Journeys to watch (default: every journey with an import block)')
+    ap.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS, help='Seconds without changes before rebuilding')
+    ap.add_argument('--verbose', '-v', action='store_true', help='Echo importer output')
+    args = ap.parse_args()
+
+    watcher = Watcher(args.journeys, args.debounce, args.verbose)
+    unknown = [k for k in args.journeys if k not in watcher.plan]
+    if unknown:
+        print(f"ERROR: not buildable (no import block in manifest): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        info("Stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,7 @@ type Journey = {
   variant?: string
   owner?: string
   display?: { group?: string; order?: number; visible?: boolean; status?: string }
+  import?: Record<string, string>  // build recipe for scripts/rbsi_import.py; not sent to clients
 }
 
 type Manifest = { active: Journey[]; deprecated?: Journey[] }
@@ -24,7 +25,7 @@ export default defineEventHandler(async (event: H3Event) => {
     const adminCookie = getCookie(event, 'admin')
     const isAdmin = adminCookie === 'true'
 
-    const active = await Promise.all((manifest.active || []).map(async j => {
+    const active = await Promise.all((manifest.active || []).map(async ({ import: _recipe, ...j }) => {
       const display = { ...(j.display || {}) }
       if (visibleEnv.length) {
         display.visible = visibleEnv.includes(j.key)
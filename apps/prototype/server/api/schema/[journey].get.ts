@@ -28,7 +28,7 @@ export default defineEventHandler(async (event: H3Event) => {
       parsed = await loadYamlFromData(event, `schemas/${journey}/schema.yaml`)
     }
     
-    // Skip validation for KYCP format (has different structure)
+    // KYCP schemas are validated at import time (scripts/validate_kycp_schema.py), so no runtime check
     if (!isKycpFormat) {
       // Validate schema structure for legacy format
       const { validateSchema } = await import('~/server/utils/schema-validator')
@@ -7,6 +7,7 @@ a CSV report for human review with suggested improvements.
 
 Usage:
     python3 scripts/analyze_tone.py --schema path/to/schema.yaml --output analysis.csv
+    python3 scripts/analyze_tone.py --schema path/to/schema.yaml --config tone-thresholds.json
 """
 
 import argparse
@@ -14,9 +15,48 @@ import csv
 import re
 import sys
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import yaml
 
+from tone_metrics import METRIC_COLUMNS, compute_batch, compute_metrics, load_thresholds
+
+
+# Styles whose label is a heading or action rather than copy users read
+NON_COPY_STYLES = {'divider', 'button'}
+
+# Text sources held to the longer help-text word limit
+LONG_FORM_SOURCES = {'help', 'description', 'original.help', 'statement'}
+
+
+def iter_text_nodes(field: Dict) -> Iterator[Tuple[str, str]]:
+    """Yield (source, text) for every user-visible text on a KYCP field
+    
+    Sources: label, statement, help, description, original.help, option.
+    Text repeated within the same field (e.g. help == original.help) is
+    yielded once.
+    """
+    seen = set()
+    
+    def visit(source, value):
+        text = str(value).strip() if value is not None else ''
+        if text and text not in seen:
+            seen.add(text)
+            yield source, text
+    
+    style = field.get('style')
+    if style not in NON_COPY_STYLES:
+        yield from visit('statement' if style == 'statement' else 'label', field.get('label'))
+    
+    yield from visit('help', field.get('help'))
+    yield from visit('description', field.get('description'))
+    
+    original = field.get('original')
+    if isinstance(original, dict):
+        yield from visit('original.help', original.get('help'))
+    
+    for option in field.get('options') or []:
+        yield from visit('option', option.get('label') if isinstance(option, dict) else option)
+
 
 class ToneAnalyzer:
     """Analyzes questions for tone of voice compliance"""
@@ -46,33 +86,76 @@ class ToneAnalyzer:
         'supplementary': 'extra'
     }
     
-    def __init__(self):
+    def __init__(self, thresholds: Optional[Dict] = None):
         self.issues = []
+        self.thresholds = thresholds or load_thresholds()
+        self._metrics = {}
+        self._text_issues = {}
+        self._seen_options = set()
+        
+    def prime_metrics(self, texts: List[str]):
+        """Measure a whole schema's texts up front in one batch"""
+        texts = [t for t in texts if t and t not in self._metrics]
+        self._metrics.update(zip(texts, compute_batch(texts)))
+    
+    def metrics_for(self, text: str) -> Dict:
+        """Readability metrics for a text, computed once per distinct string"""
+        metrics = self._metrics.get(text)
+        if metrics is None:
+            metrics = compute_metrics(text)
+            self._metrics[text] = metrics
+        return metrics
         
     def analyze_field(self, field: Dict) -> List[Dict]:
-        """Analyze a single field for tone issues"""
-        issues = []
+        """Analyze every user-visible text of a single field for tone issues
         
-        # Skip non-question fields
-        if field.get('style') in ['statement', 'divider', 'button']:
-            return issues
-            
-        label = field.get('label', '')
+        Option labels are reported once per unique string across the whole
+        schema, so repeated lookups (country lists etc.) are not re-analyzed.
+        """
+        issues = []
         key = field.get('key', '')
         source_ref = field.get('scriptId', '')
         
-        if not label:
-            return issues
+        for text_source, text in iter_text_nodes(field):
+            if text_source == 'option':
+                if text in self._seen_options:
+                    continue
+                self._seen_options.add(text)
+            
+            for found in self.analyze_text(text, text_source):
+                issues.append({
+                    'row_ref': source_ref,
+                    'field_key': key,
+                    'text_source': text_source,
+                    **found
+                })
             
+        return issues
+    
+    def analyze_text(self, text: str, text_source: str = 'label') -> List[Dict]:
+        """Analyze one text node; results are cached per (text, length rule)"""
+        long_form = text_source in LONG_FORM_SOURCES
+        cache_key = (text, long_form)
+        cached = self._text_issues.get(cache_key)
+        if cached is None:
+            cached = self._check_text(text, long_form)
+            self._text_issues[cache_key] = cached
+        return cached
+    
+    def _check_text(self, label: str, long_form: bool) -> List[Dict]:
+        """Run every tone check against a single piece of text"""
+        issues = []
+        metrics = self.metrics_for(label)
+        limits = self.thresholds
+        max_words = limits['max_help_words'] if long_form else limits['max_words']
+        
         # Check length
-        word_count = len(label.split())
-        if word_count > 20:
+        word_count = metrics['word_count']
+        if word_count > max_words:
             issues.append({
-                'row_ref': source_ref,
-                'field_key': key,
                 'original': label,
                 'issue_type': 'Too Long',
-                'severity': 'High' if word_count > 30 else 'Medium',
+                'severity': 'High' if word_count > max(limits['high_severity_words'], max_words) else 'Medium',
                 'details': f'{word_count} words',
                 'suggestion': self._suggest_shorter(label)
             })
@@ -86,8 +169,6 @@ class ToneAnalyzer:
         
         if jargon_found:
             issues.append({
-                'row_ref': source_ref,
-                'field_key': key,
                 'original': label,
                 'issue_type': 'Jargon',
                 'severity': 'Medium',
@@ -98,8 +179,6 @@ class ToneAnalyzer:
         # Check for passive voice
         if self._is_passive(label):
             issues.append({
-                'row_ref': source_ref,
-                'field_key': key,
                 'original': label,
                 'issue_type': 'Passive Voice',
                 'severity': 'Low',
@@ -111,8 +190,6 @@ class ToneAnalyzer:
         pronoun_issue = self._check_pronouns(label)
         if pronoun_issue:
             issues.append({
-                'row_ref': source_ref,
-                'field_key': key,
                 'original': label,
                 'issue_type': 'Pronoun Usage',
                 'severity': 'Medium',
@@ -121,16 +198,28 @@ class ToneAnalyzer:
             })
         
         # Check for complex sentences
-        if ',' in label and len(label) > 100:
+        clause_count = metrics['clause_count']
+        if clause_count > limits['max_clauses'] or (clause_count > 1 and len(label) > limits['complex_min_chars']):
             issues.append({
-                'row_ref': source_ref,
-                'field_key': key,
                 'original': label,
                 'issue_type': 'Complex Sentence',
                 'severity': 'Medium',
-                'details': 'Multiple clauses',
+                'details': f'{clause_count} clauses',
                 'suggestion': self._simplify_sentence(label)
             })
+        
+        # Check reading ease (only meaningful for longer text)
+        if word_count >= limits['min_words_for_ease'] and metrics['reading_ease'] < limits['min_reading_ease']:
+            issues.append({
+                'original': label,
+                'issue_type': 'Hard to Read',
+                'severity': 'Low',
+                'details': f"Reading ease {metrics['reading_ease']}",
+                'suggestion': self._suggest_shorter(label)
+            })
+        
+        for issue in issues:
+            issue.update(metrics)
             
         return issues
     
@@ -270,15 +359,18 @@ def load_schema(path: Path) -> Dict:
         return yaml.safe_load(f)
 
 
-def analyze_schema(schema_path: Path) -> List[Dict]:
+def analyze_schema(schema_path: Path, thresholds: Optional[Dict] = None) -> List[Dict]:
     """Analyze all fields in a schema"""
     schema = load_schema(schema_path)
-    analyzer = ToneAnalyzer()
+    analyzer = ToneAnalyzer(thresholds)
     all_issues = []
     
     # Handle both formats (items for legacy, fields for KYCP)
     fields = schema.get('fields', schema.get('items', []))
     
+    # Measure every text node in one pass before the per-field checks
+    analyzer.prime_metrics([text for field in fields for _, text in iter_text_nodes(field)])
+    
     for field in fields:
         issues = analyzer.analyze_field(field)
         all_issues.extend(issues)
@@ -295,8 +387,9 @@ def write_csv_report(issues: List[Dict], output_path: Path):
     
     with open(output_path, 'w', newline='', encoding='utf-8') as f:
         fieldnames = [
-            'row_ref', 'field_key', 'issue_type', 'severity', 
-            'details', 'original', 'suggestion', 'human_decision', 'notes'
+            'row_ref', 'field_key', 'text_source', 'issue_type', 'severity', 
+            'details', 'original', 'suggestion', *METRIC_COLUMNS,
+            'human_decision', 'notes'
         ]
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
@@ -368,6 +461,11 @@ def main():
         default=Path('tone_analysis.csv'),
         help='Output CSV file (default: tone_analysis.csv)'
     )
+    parser.add_argument(
+        '--config',
+        type=Path,
+        help='JSON file with readability thresholds (see tone_metrics.DEFAULT_THRESHOLDS)'
+    )
     parser.add_argument(
         '--summary',
         action='store_true',
@@ -380,10 +478,20 @@ def main():
         print(f"Error: Schema file not found: {args.schema}", file=sys.stderr)
         sys.exit(1)
     
+    if args.config and not args.config.exists():
+        print(f"Error: Config file not found: {args.config}", file=sys.stderr)
+        sys.exit(1)
+    
+    try:
+        thresholds = load_thresholds(args.config)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    
     print(f"Analyzing: {args.schema}")
     
     # Run analysis
-    issues = analyze_schema(args.schema)
+    issues = analyze_schema(args.schema, thresholds)
     
     # Write CSV report
     write_csv_report(issues, args.output)
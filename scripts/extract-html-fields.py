@@ -2,16 +2,38 @@
 """
 Extract and analyze form fields from as-is HTML
 Generates structured field inventory for mapping
+
+Uses the lxml engine in html_field_extractor.py when lxml is installed and
+falls back to BeautifulSoup otherwise. Pages and directories of saved pages
+can be passed; with lxml they are extracted in a worker pool, the container
+selector is discovered per page, unchanged pages are skipped using a hash
+cache next to the JSON output, and fields are merged with page provenance.
+
+Usage:
+    python scripts/extract-html-fields.py [page.html | pages/ ...] [--workers N] [--no-cache]
 """
 
+import argparse
+import os
 import re
-from bs4 import BeautifulSoup
 import json
 import yaml
 from pathlib import Path
 
+try:
+    import html_field_extractor
+except ImportError:  # lxml not installed
+    html_field_extractor = None
+
 def extract_form_fields(html_path):
     """Extract all form fields from HTML with metadata"""
+    if html_field_extractor is not None:
+        return html_field_extractor.extract_form_fields(html_path)
+    return extract_form_fields_bs4(html_path)
+
+def extract_form_fields_bs4(html_path):
+    """Extract form fields with BeautifulSoup (slow path, no lxml)"""
+    from bs4 import BeautifulSoup
     
     with open(html_path, 'r', encoding='utf-8') as f:
         html_content = f.read()
@@ -105,12 +127,34 @@ def match_to_spreadsheet_patterns(fields):
     
     return fields
 
-def generate_field_inventory(fields, output_path):
+def collect_pages(inputs):
+    """Expand files and directories into (path, page name) pairs"""
+    pages = []
+    for input_path in inputs:
+        if input_path.is_dir():
+            found = sorted(p for p in input_path.rglob('*') if p.suffix.lower() in ('.html', '.htm'))
+            pages.extend((p, p.relative_to(input_path).as_posix()) for p in found)
+        else:
+            pages.append((input_path, input_path.name))
+    return pages
+
+def extract_pages_bs4(pages):
+    """Concatenate fields from each page without lxml (no pool, no cache)"""
+    fields = []
+    for html_path, name in pages:
+        page_fields = extract_form_fields_bs4(html_path)
+        for field in page_fields:
+            field['pages'] = [{'page': name, 'index': field['index']}]
+        fields.extend(page_fields)
+    return fields
+
+def generate_field_inventory(fields, output_path, sources=None):
     """Generate markdown documentation of extracted fields"""
     
+    sources = sources or ['Project Stealth Code Questions (1).html']
     with open(output_path, 'w') as f:
         f.write("# As-Is HTML Field Inventory\n\n")
-        f.write("Extracted from: `Project Stealth Code Questions (1).html`\n")
+        f.write(f"Extracted from: {', '.join(f'`{s}`' for s in sources)}\n")
         f.write(f"Total fields identified: {len(fields)}\n\n")
         
         f.write("## Field Summary by Component Type\n\n")
@@ -132,6 +176,8 @@ def generate_field_inventory(fields, output_path):
             f.write(f"### Field {field['index']}\n\n")
             f.write(f"**Question**: {field['question_text']}\n\n")
             f.write(f"- **Component Type**: {field['component_type']}\n")
+            if len(sources) > 1 and field.get('pages'):
+                f.write(f"- **Pages**: {', '.join(p['page'] for p in field['pages'])}\n")
             f.write(f"- **Mandatory**: {'Yes' if field['is_mandatory'] else 'No'}\n")
             f.write(f"- **Has Visibility Condition**: {'Yes' if field['has_visibility_condition'] else 'No'}\n")
             
@@ -149,13 +195,43 @@ def generate_field_inventory(fields, output_path):
 def main():
     # Paths
     project_root = Path(__file__).parent.parent
-    html_path = project_root / "Documents/01 Areas/As-is/Project Stealth Code Questions (1).html"
+    default_html = project_root / "Documents/01 Areas/As-is/Project Stealth Code Questions (1).html"
     output_md = project_root / "Documents/01 Areas/as-is-analysis/field-inventory.md"
     output_json = project_root / "data/generated/as-is-audit/extracted-fields.json"
+    cache_path = output_json.with_name('extracted-fields.cache.json')
+    
+    parser = argparse.ArgumentParser(description='Extract form fields from saved as-is HTML pages')
+    parser.add_argument('html', nargs='*', type=Path,
+                        help='Saved HTML pages or directories of pages (default: Project Stealth page)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Worker processes for extraction (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-extract every page, ignoring the hash cache')
+    args = parser.parse_args()
+    pages = collect_pages(args.html or [default_html])
+    if not pages:
+        print("No HTML pages found")
+        return
+    page_names = [name for _, name in pages]
     
     # Extract fields
-    print("Extracting fields from HTML...")
-    fields = extract_form_fields(html_path)
+    if html_field_extractor is not None:
+        print(f"Extracting fields from {len(pages)} page(s) (lxml, {args.workers} workers)...")
+        results = html_field_extractor.crawl_pages(
+            [path for path, _ in pages],
+            cache_path=None if args.no_cache else cache_path,
+            workers=args.workers,
+            page_names=page_names
+        )
+        skipped = sum(1 for page in results if page['cached'])
+        if skipped:
+            print(f"- Skipped {skipped} unchanged page(s)")
+        for page in results:
+            if page['container_attr'] != html_field_extractor.DEFAULT_CONTAINER_ATTR:
+                print(f"- {page['page']}: question containers matched on {page['container_attr'] or '<li> with question span'}")
+        fields = html_field_extractor.merge_pages(results)
+    else:
+        print(f"Extracting fields from {len(pages)} page(s) (BeautifulSoup)...")
+        fields = extract_pages_bs4(pages)
     
     # Try to match patterns
     print("Matching to spreadsheet patterns...")
@@ -163,7 +239,7 @@ def main():
     
     # Generate outputs
     print(f"Generating field inventory markdown...")
-    generate_field_inventory(fields, output_md)
+    generate_field_inventory(fields, output_md, page_names)
     
     print(f"Saving JSON data...")
     output_json.parent.mkdir(parents=True, exist_ok=True)
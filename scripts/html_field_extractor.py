@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Fast extraction engine for as-is KYCP HTML pages (lxml)
+
+Parses each saved page once with lxml's C-backed HTML parser and classifies
+every question container with precompiled XPath expressions evaluated over
+the whole document, instead of running a chain of BeautifulSoup find() calls
+per container. Produces the same field records as extract-html-fields.py.
+
+For directories of saved pages, crawl_pages() extracts each page in a process
+pool, discovers the question-container attribute per page (the data-v-* hash
+changes with every Vue build), skips pages whose content hash is unchanged
+since the last run, and merge_pages() folds the results into one
+de-duplicated field list with page provenance.
+
+Usage:
+    from html_field_extractor import extract_form_fields, iter_extract
+
+    fields = extract_form_fields(path)
+    for path, fields in iter_extract(paths):
+        ...
+
+    pages = crawl_pages(paths, cache_path=cache, workers=4)
+    fields = merge_pages(pages)
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lxml import etree
+
+CACHE_VERSION = 1
+
+# Vue scoped-style attribute on question <li> containers in the saved KYCP build
+DEFAULT_CONTAINER_ATTR = 'data-v-15d17799'
+
+QUESTION_CLASS = 'col-12 text-break'
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching one token of a class attribute"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Component classification in the same priority order as the original
+# container.find() chain; the first matching rule wins.
+COMPONENT_RULES = [
+    ('dropdown', f".//div[{_has_class('v-select')}]"),
+    ('textarea', ".//textarea"),
+    ('text_input', ".//input[@type='text']"),
+    ('radio', ".//input[@type='radio']"),
+    ('checkbox', ".//input[@type='checkbox']"),
+    ('complex_field', ".//ul[@class='fieldContainer effisComplex']"),
+]
+
+# Per-container lookups, compiled once
+QUESTION_XP = etree.XPath(f"(.//span[@class='{QUESTION_CLASS}'])[1]")
+HELP_XP = etree.XPath(f"(.//label[@class='{QUESTION_CLASS}'])[1]")
+INPUT_XP = etree.XPath("(.//input)[1]")
+TEXT_XP = etree.XPath(".//text()")
+# Nearest <li> around each question span, used to discover the container attribute
+QUESTION_LI_XP = etree.XPath(f"//span[@class='{QUESTION_CLASS}']/ancestor::li[1]")
+
+HTML_PARSER = etree.HTMLParser(encoding='utf-8', remove_comments=True)
+
+
+@lru_cache(maxsize=None)
+def compile_selectors(container_attr: Optional[str]) -> Tuple[etree.XPath, List[Tuple[str, etree.XPath]]]:
+    """Compile the container query and document-wide classification queries
+
+    Without a container attribute, any <li> holding a question span is a container.
+    """
+    if container_attr:
+        container = f"//li[@{container_attr}]"
+    else:
+        container = f"//li[.//span[@class='{QUESTION_CLASS}']]"
+    rules = [
+        (component, etree.XPath(f"{container}[{inner}]"))
+        for component, inner in COMPONENT_RULES
+    ]
+    return etree.XPath(container), rules
+
+
+def element_text(elem) -> str:
+    """Equivalent of BeautifulSoup get_text(strip=True)"""
+    return ''.join(t.strip() for t in TEXT_XP(elem))
+
+
+def parse_document(html_path: Path):
+    """Parse a saved page with the C HTML parser"""
+    return etree.parse(str(html_path), HTML_PARSER)
+
+
+def discover_container_attr(doc) -> Optional[str]:
+    """Find the data-v-* attribute shared by most question containers"""
+    counts = Counter()
+    for li in QUESTION_LI_XP(doc):
+        counts.update(name for name in li.attrib if name.startswith('data-v-'))
+    if not counts:
+        return None
+    return counts.most_common(1)[0][0]
+
+
+def classify_containers(doc, container_attr: Optional[str] = DEFAULT_CONTAINER_ATTR) -> Tuple[list, Dict]:
+    """Return question containers and a container -> component type map
+
+    Each rule is evaluated once over the whole document; containers are
+    assigned the highest-priority rule that matched them.
+    """
+    container_xp, rules = compile_selectors(container_attr)
+    containers = container_xp(doc)
+    component_by_container = {}
+    for component, rule_xp in reversed(rules):
+        for container in rule_xp(doc):
+            component_by_container[container] = component
+    return containers, component_by_container
+
+
+def extract_from_document(doc, container_attr: Optional[str] = DEFAULT_CONTAINER_ATTR) -> List[Dict]:
+    """Extract field records from an already parsed document"""
+    containers, component_by_container = classify_containers(doc, container_attr)
+    fields = []
+
+    for idx, container in enumerate(containers):
+        field_data = {
+            'index': idx + 1,
+            'question_text': None,
+            'is_mandatory': False,
+            'component_type': component_by_container.get(container),
+            'has_visibility_condition': False,
+            'options': [],
+            'help_text': None,
+            'validation_type': None
+        }
+
+        question = QUESTION_XP(container)
+        if question:
+            text = element_text(question[0])
+            field_data['question_text'] = text.rstrip('*')
+            field_data['is_mandatory'] = text.endswith('*')
+
+        # Check for visibility conditions (style="display: none")
+        style = container.get('style')
+        if style and 'display: none' in style:
+            field_data['has_visibility_condition'] = True
+
+        help_label = HELP_XP(container)
+        if help_label:
+            field_data['help_text'] = element_text(help_label[0])
+
+        input_elem = INPUT_XP(container)
+        if input_elem:
+            input_elem = input_elem[0]
+            if 'txtDecimalInput' in input_elem.get('id', ''):
+                field_data['validation_type'] = 'decimal'
+            elif input_elem.get('type') == 'email':
+                field_data['validation_type'] = 'email'
+
+        if field_data['question_text']:
+            fields.append(field_data)
+
+    return fields
+
+
+def extract_form_fields(html_path, container_attr: str = DEFAULT_CONTAINER_ATTR) -> List[Dict]:
+    """Extract all form fields from one saved HTML page"""
+    return extract_from_document(parse_document(Path(html_path)), container_attr)
+
+
+def iter_extract(html_paths: Iterable, container_attr: str = DEFAULT_CONTAINER_ATTR) -> Iterator[Tuple[Path, List[Dict]]]:
+    """Stream (path, fields) for many pages, holding one parsed tree at a time"""
+    for html_path in html_paths:
+        html_path = Path(html_path)
+        yield html_path, extract_form_fields(html_path, container_attr)
+
+
+def page_hash(html_path: Path) -> str:
+    """Content hash used to skip unchanged pages"""
+    with open(html_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def extract_page(html_path) -> Dict:
+    """Extract one page with a discovered container selector (pool worker)"""
+    html_path = Path(html_path)
+    doc = parse_document(html_path)
+    container_attr = discover_container_attr(doc)
+    return {
+        'container_attr': container_attr,
+        'fields': extract_from_document(doc, container_attr)
+    }
+
+
+def load_cache(cache_path: Optional[Path]) -> Dict:
+    """Load per-page results from a previous crawl"""
+    if not cache_path or not Path(cache_path).exists():
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if data.get('version') != CACHE_VERSION:
+        return {}
+    return data.get('pages', {})
+
+
+def save_cache(cache_path: Path, pages: List[Dict]):
+    """Write per-page results so unchanged pages are skipped next time"""
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        'version': CACHE_VERSION,
+        'pages': {
+            page['page']: {k: page[k] for k in ('hash', 'container_attr', 'fields')}
+            for page in pages
+        }
+    }
+    tmp_path = cache_path.with_suffix(cache_path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, cache_path)
+
+
+def crawl_pages(html_paths: Iterable, cache_path: Optional[Path] = None,
+                workers: Optional[int] = None, page_names: Optional[List[str]] = None) -> List[Dict]:
+    """Extract many pages in a process pool, reusing cached unchanged pages
+
+    Returns one record per page in input order:
+    {page, hash, container_attr, fields, cached}
+    """
+    html_paths = [Path(p) for p in html_paths]
+    page_names = page_names or [p.name for p in html_paths]
+    cached = load_cache(cache_path)
+
+    pages = []
+    stale = []
+    for html_path, name in zip(html_paths, page_names):
+        digest = page_hash(html_path)
+        entry = cached.get(name)
+        if entry and entry.get('hash') == digest:
+            pages.append({'page': name, **entry, 'cached': True})
+        else:
+            page = {'page': name, 'hash': digest, 'cached': False}
+            pages.append(page)
+            stale.append((page, html_path))
+
+    if len(stale) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(extract_page, [path for _, path in stale])
+            for (page, _), result in zip(stale, results):
+                page.update(result)
+    else:
+        for page, html_path in stale:
+            page.update(extract_page(html_path))
+
+    if cache_path and (stale or set(cached) != set(page_names)):
+        save_cache(cache_path, pages)
+
+    return pages
+
+
+def _question_key(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def merge_pages(pages: List[Dict]) -> List[Dict]:
+    """Merge per-page fields into one de-duplicated list with provenance
+
+    The nth occurrence of a question (same text and component) on one page is
+    merged with the nth occurrence on every other page, so questions that
+    legitimately repeat within a page stay separate fields. A single page
+    keeps its container indexes; merged fields from several pages are
+    renumbered and point back to their pages through 'pages'.
+    """
+    merged: Dict[Tuple, Dict] = {}
+
+    for page in pages:
+        occurrences = Counter()
+        for field in page['fields']:
+            base_key = (_question_key(field['question_text']), field['component_type'])
+            occurrences[base_key] += 1
+            key = base_key + (occurrences[base_key],)
+
+            entry = merged.get(key)
+            if entry is None:
+                entry = {**field, 'pages': []}
+                merged[key] = entry
+            else:
+                entry['is_mandatory'] = entry['is_mandatory'] or field['is_mandatory']
+                entry['has_visibility_condition'] = (
+                    entry['has_visibility_condition'] or field['has_visibility_condition']
+                )
+                entry['help_text'] = entry['help_text'] or field['help_text']
+                entry['validation_type'] = entry['validation_type'] or field['validation_type']
+            entry['pages'].append({'page': page['page'], 'index': field['index']})
+
+    fields = list(merged.values())
+    if len(pages) > 1:
+        for idx, field in enumerate(fields):
+            field['index'] = idx + 1
+    return fields
@@ -26,6 +26,14 @@ import sys
 import pandas as pd
 import yaml
 
+# Shared importer helpers (instrumentation) live with the app scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "prototype" / "scripts"))
+from compiled_mapping import CompiledMapping
+from conditions_report import write_conditions_report
+from exclusion_ledger import exclusions
+from identifiers import sanitize_id
+from import_metrics import metrics
+
 # Resolve base data directory (supports both monorepo and app-local layouts)
 def resolve_base_data_dir() -> Path:
     app_local = Path('apps/prototype/data')
@@ -47,9 +55,9 @@ def resolve_column(df, name: str):
     return None
 
 
-def load_mapping(path: Path) -> dict:
+def load_mapping(path: Path) -> CompiledMapping:
     with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+        return CompiledMapping(json.load(f), source=path)
 
 
 def load_lookups_from_sheet(xlsx_path: Path, sheet: str) -> dict:
@@ -81,15 +89,6 @@ def as_bool(v) -> bool:
     return s in ("y", "yes", "true", "1", "a", "required", "mandatory")
 
 
-def sanitize_id(raw: str) -> str:
-    if not raw:
-        return ""
-    # Preserve alnum and underscores, collapse spaces to underscores
-    s = re.sub(r"\s+", "_", raw.strip())
-    s = re.sub(r"[^A-Za-z0-9_]", "", s)
-    return s or ""
-
-
 def infer_control(data_type: str, label: str, options: list, *, force_select: bool=False) -> str:
     dt = (data_type or "").lower()
     lab = (label or "").lower()
@@ -147,6 +146,8 @@ def main():
     ap.add_argument("--journey-key", help="Journey key (default: from --out or mapping file name)")
     args = ap.parse_args()
 
+    metrics.start(args.journey_key)
+    exclusions.start()
     base_data = resolve_base_data_dir()
     mapping_path = Path(args.mapping)
     xlsx_path = Path(args.input)
@@ -168,6 +169,7 @@ def main():
     df = None
     header_candidates = [header_row] if header_row is not None else [0, 1, 2]
     header_used = None
+    metrics.stage("sheet parse")
     for h in header_candidates:
         try:
             tmp = pd.read_excel(xlsx_path, sheet_name=sheet, header=h)
@@ -200,7 +202,11 @@ def main():
             continue
         filtered_df = filtered_df[filtered_df[resolved].astype(str) == str(fval)]
 
+    metrics.count("rows.read", int(df.shape[0]))
+    metrics.count("rows.excluded.filters", int(df.shape[0] - filtered_df.shape[0]))
+
     # Load lookups
+    metrics.stage("lookups")
     lookups = {}
     if mapping.get("lookups"):
         lookups.update(mapping["lookups"])  # inline
@@ -216,8 +222,8 @@ def main():
 
     cols = mapping.get("columns") or {}
     norm = mapping.get("normalization") or {}
-    type_map = (norm.get("data_type") or {})
-    op_map = (norm.get("operators") or {})
+    type_map = mapping.data_types
+    op_map = mapping.operators
     strip_prefixes = norm.get("strip_prefixes") or []
 
     # Resolve important columns
@@ -273,10 +279,12 @@ def main():
     decisions = []
 
     items = []
+    metrics.stage("field build")
     for idx, row in filtered_df.iterrows():
         raw_id = str(row.get(id_col)) if id_col and pd.notna(row.get(id_col)) else ""
         label = str(row.get(label_col)) if label_col and pd.notna(row.get(label_col)) else ""
         if not raw_id and not label:
+            exclusions.record("no_id_or_label", idx + header_used + 2)
             continue
         # Generate id
         fid = sanitize_id(raw_id) or sanitize_id(label)
@@ -317,16 +325,19 @@ def main():
             if lk_norm in lookups_norm:
                 options = [str(v) for v in lookups_norm[lk_norm]]
                 lookup_source = f"lookups:{lookup_key}"
+                metrics.count("lookups.resolved")
             elif lk_norm in {norm_key('Yes/No'), 'yesno', 'yes_no'}:
                 options = ["Yes", "No"]
                 lookup_source = "default:yes_no"
                 summary["lookup_defaults_used"] += 1
+                metrics.count("lookups.yes_no")
             else:
                 # Missing lookup definition → fall back to text input and note
                 options = []
                 lookup_source = "missing"
                 summary.setdefault("missing_lookups", 0)
                 summary["missing_lookups"] += 1
+                metrics.count("lookups.unresolved")
 
         # Mandatory
         mandatory_val = row.get(mandatory_col) if mandatory_col else False
@@ -452,10 +463,17 @@ def main():
     }
 
     # Write outputs
+    metrics.stage("yaml dump")
     with out_path.open("w", encoding="utf-8") as f:
         yaml.dump(schema, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
+    metrics.stage("conditions report")
+    write_conditions_report(schema, journey_key, parser="import_xlsx.py")
 
     summary["items_written"] = len(items)
+    metrics.count("fields.written", len(items))
+    summary["metrics"] = metrics.summary()
+    metrics.write_trace(journey_key)
+    exclusions.write(journey_key, gen_dir)
     with (gen_dir / "summary.json").open("w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2)
     with (gen_dir / "decisions.json").open("w", encoding="utf-8") as f:
@@ -463,7 +481,7 @@ def main():
 
     print("Import complete")
     print(f"- Schema: {out_path}")
-    print(f"- Reports: {gen_dir}/summary.json, decisions.json")
+    print(f"- Reports: {gen_dir}/summary.json, decisions.json, exclusions.csv")
 
 
 if __name__ == "__main__":
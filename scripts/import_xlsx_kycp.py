@@ -26,6 +26,16 @@ import sys
 import pandas as pd
 import yaml
 
+# Shared importer helpers (instrumentation) live with the app scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "prototype" / "scripts"))
+from import_metrics import metrics
+from compiled_mapping import CompiledMapping
+from conditions_report import write_conditions_report
+from exclusion_ledger import exclusions
+from identifiers import sanitize_id
+from parallel_fields import map_rows
+from validate_kycp_schema import check_kycp_schema
+
 # Resolve base data directory
 def resolve_base_data_dir() -> Path:
     app_local = Path('apps/prototype/data')
@@ -48,15 +58,6 @@ def as_bool(v) -> bool:
     return s in ("y", "yes", "true", "1", "a", "required", "mandatory")
 
 
-def sanitize_id(raw: str) -> str:
-    """Create valid field ID from raw string"""
-    if not raw:
-        return ""
-    s = re.sub(r"\s+", "_", raw.strip())
-    s = re.sub(r"[^A-Za-z0-9_]", "", s)
-    return s or ""
-
-
 def map_to_kycp_type(data_type: str, control: str, has_options: bool) -> str:
     """
     Map legacy data_type/control to KYCP DataType
@@ -290,6 +291,122 @@ def create_kycp_field(row_data: dict, lookups: dict, defaults: dict) -> dict:
     return field
 
 
+def build_row_field(item: tuple, ctx: dict) -> tuple:
+    """
+    Build the KYCP field for one included row; returns (field, flags for the summary)
+    """
+    idx, row, order = item
+    c = ctx["cols"]
+    lookups_norm = ctx["lookups_norm"]
+    
+    def cell(name, default=None):
+        column = c[name]
+        return str(row.get(column)) if column and pd.notna(row.get(column)) else default
+    
+    # Extract basic field info
+    raw_id = cell("id", "")
+    label = cell("label", "")
+    
+    field_id = sanitize_id(raw_id) or sanitize_id(label) or f"field_{order}"
+    if not label:
+        label = field_id
+    
+    # Get data type and control
+    data_type = cell("data_type", "string")
+    
+    # Normalize data type using mapping
+    data_type = ctx["data_types"].get(data_type, data_type).lower()
+    
+    # Determine control type
+    control = "text"
+    
+    # Get options from lookup
+    options = []
+    resolved_lookup = None
+    lookup_key = cell("lookup_type", "").strip()
+    if lookup_key:
+        lk_norm = norm_key(lookup_key)
+        if lk_norm in lookups_norm:
+            options = lookups_norm[lk_norm]
+            control = "select"
+            resolved_lookup = lk_norm
+            metrics.count("lookups.resolved")
+        elif lk_norm in {norm_key('Yes/No'), 'yesno'}:
+            options = [{"value": "Yes", "label": "Yes"}, {"value": "No", "label": "No"}]
+            control = "select"
+            metrics.count("lookups.yes_no")
+        else:
+            metrics.count("lookups.unresolved")
+    
+    # Check for textarea
+    if any(w in label.lower() for w in ["details", "describe", "explain"]):
+        control = "textarea"
+    
+    # Get other field properties
+    mandatory = as_bool(row.get(c["mandatory"])) if c["mandatory"] and pd.notna(row.get(c["mandatory"])) else False
+    
+    # Parse visibility
+    visibility_conditions = []
+    vis_raw = cell("visibility")
+    if vis_raw is not None:
+        vis_expr = normalize_visibility_expression(vis_raw, ctx["op_map"])
+        if vis_expr:
+            conditions = parse_visibility_condition(vis_expr)
+            if conditions:
+                visibility_conditions.append(conditions)
+    
+    # Check if internal
+    internal_only = False
+    val = cell("internal")
+    if val is not None:
+        internal_only = as_bool(val) or bool(re.search(r"\binternal\b", val, flags=re.IGNORECASE))
+    
+    # Get help text
+    help_text = cell("help")
+    
+    # Get reference
+    ref = cell("ref")
+    source_ref = f"ROW:{ref or idx}|KEY:{field_id}"
+    
+    # Build row data
+    row_data = {
+        "id": field_id,
+        "label": label,
+        "help": help_text,
+        "data_type": data_type,
+        "control": control,
+        "options": options,
+        "mandatory": mandatory,
+        "visibility_conditions": visibility_conditions,
+        "internal_only": internal_only,
+        "source_ref": source_ref,
+        "order": order
+    }
+    
+    # Get regex validation
+    regex = cell("regex")
+    if regex is not None:
+        try:
+            re.compile(regex)
+            row_data["regex"] = regex
+        except re.error:
+            pass
+    
+    # Create KYCP field
+    field = create_kycp_field(row_data, ctx["lookups"], ctx["defaults"])
+    
+    # Group fields by section (optional enhancement)
+    section = cell("section", "General")
+    stage = cell("stage", "onboarding")
+    
+    # Add section/stage metadata (could be used for grouping later)
+    field["_section"] = section
+    field["_stage"] = stage
+    
+    flags = {"lookup": resolved_lookup, "visibility": bool(visibility_conditions), "internal": internal_only}
+    return field, flags
+
+
 def main():
     ap = argparse.ArgumentParser(description="Import XLSX to KYCP-format schema.yaml")
     ap.add_argument("--mapping", required=True, help="Path to mapping JSON")
@@ -300,6 +417,8 @@ def main():
     ap.add_argument("--journey-key", help="Journey key")
     args = ap.parse_args()
     
+    metrics.start(args.journey_key)
+    exclusions.start()
     base_data = resolve_base_data_dir()
     mapping_path = Path(args.mapping)
     xlsx_path = Path(args.input)
@@ -313,7 +432,7 @@ def main():
     
     # Load mapping configuration
     with mapping_path.open("r", encoding="utf-8") as f:
-        mapping = json.load(f)
+        mapping = CompiledMapping(json.load(f), source=mapping_path)
     
     sheet = args.sheet or mapping.get("sheet")
     if not sheet:
@@ -324,7 +443,9 @@ def main():
     header_row = mapping.get("header_row")
     df = None
     header_candidates = [header_row] if header_row is not None else [0, 1, 2]
+    header_used = None
     
+    metrics.stage("sheet parse")
     for h in header_candidates:
         try:
             tmp = pd.read_excel(xlsx_path, sheet_name=sheet, header=h)
@@ -335,6 +456,7 @@ def main():
             hits = sum(1 for p in probe_cols if hm.get(norm_key(p)))
             if hits:
                 df = tmp
+                header_used = h
                 break
         except Exception:
             continue
@@ -382,7 +504,11 @@ def main():
         if resolved:
             filtered_df = filtered_df[filtered_df[resolved].astype(str) == str(fval)]
     
+    metrics.count("rows.read", int(df.shape[0]))
+    metrics.count("rows.excluded.filters", int(df.shape[0] - filtered_df.shape[0]))
+
     # Load lookups
+    metrics.stage("lookups")
     lookups = {}
     if mapping.get("lookups"):
         # Convert inline lookups to proper format
@@ -400,11 +526,6 @@ def main():
         lookups_norm[norm_key(k)] = vals
     
     # Process rows into KYCP fields
-    fields = []
-    order = 0
-    
-    norm = mapping.get("normalization") or {}
-    op_map = norm.get("operators") or {}
     
     # Track statistics
     summary = {
@@ -418,112 +539,40 @@ def main():
         "fields_with_visibility": 0
     }
     
+    metrics.stage("field build")
+    # Rows without id and label are skipped; the rest are numbered in sheet order
+    items = []
     for idx, row in filtered_df.iterrows():
-        # Extract basic field info
         raw_id = str(row.get(id_col)) if id_col and pd.notna(row.get(id_col)) else ""
         label = str(row.get(label_col)) if label_col and pd.notna(row.get(label_col)) else ""
-        
         if not raw_id and not label:
+            exclusions.record("no_id_or_label", idx + header_used + 2)
             continue
-        
-        field_id = sanitize_id(raw_id) or sanitize_id(label) or f"field_{order}"
-        if not label:
-            label = field_id
-        
-        # Get data type and control
-        data_type = str(row.get(dtype_col)) if dtype_col and pd.notna(row.get(dtype_col)) else "string"
-        
-        # Normalize data type using mapping
-        type_map = norm.get("data_type") or {}
-        data_type = type_map.get(data_type, data_type).lower()
-        
-        # Determine control type
-        control = "text"
-        field_type = str(row.get(ftype_col)) if ftype_col and pd.notna(row.get(ftype_col)) else ""
-        
-        # Get options from lookup
-        options = []
-        lookup_key = str(row.get(lookup_col)).strip() if lookup_col and pd.notna(row.get(lookup_col)) else ""
-        if lookup_key:
-            lk_norm = norm_key(lookup_key)
-            if lk_norm in lookups_norm:
-                options = lookups_norm[lk_norm]
-                control = "select"
-            elif lk_norm in {norm_key('Yes/No'), 'yesno'}:
-                options = [{"value": "Yes", "label": "Yes"}, {"value": "No", "label": "No"}]
-                control = "select"
-        
-        # Check for textarea
-        if any(w in label.lower() for w in ["details", "describe", "explain"]):
-            control = "textarea"
-        
-        # Get other field properties
-        mandatory = as_bool(row.get(mandatory_col)) if mandatory_col and pd.notna(row.get(mandatory_col)) else False
-        
-        # Parse visibility
-        visibility_conditions = []
-        if visibility_col and pd.notna(row.get(visibility_col)):
-            vis_raw = str(row.get(visibility_col))
-            vis_expr = normalize_visibility_expression(vis_raw, op_map)
-            if vis_expr:
-                conditions = parse_visibility_condition(vis_expr)
-                if conditions:
-                    visibility_conditions.append(conditions)
-                    summary["fields_with_visibility"] += 1
-        
-        # Check if internal
-        internal_only = False
-        if internal_col and pd.notna(row.get(internal_col)):
-            val = str(row.get(internal_col))
-            internal_only = as_bool(val) or bool(re.search(r"\binternal\b", val, flags=re.IGNORECASE))
-            if internal_only:
-                summary["internal_fields"] += 1
-        
-        # Get help text
-        help_text = str(row.get(help_col)) if help_col and pd.notna(row.get(help_col)) else None
-        
-        # Get reference
-        ref = str(row.get(ref_col)) if ref_col and pd.notna(row.get(ref_col)) else None
-        source_ref = f"ROW:{ref or idx}|KEY:{field_id}"
-        
-        # Build row data
-        row_data = {
-            "id": field_id,
-            "label": label,
-            "help": help_text,
-            "data_type": data_type,
-            "control": control,
-            "options": options,
-            "mandatory": mandatory,
-            "visibility_conditions": visibility_conditions,
-            "internal_only": internal_only,
-            "source_ref": source_ref,
-            "order": order
-        }
-        
-        # Get regex validation
-        if regex_col and pd.notna(row.get(regex_col)):
-            regex = str(row.get(regex_col))
-            try:
-                re.compile(regex)
-                row_data["regex"] = regex
-            except re.error:
-                pass
-        
-        # Create KYCP field
-        defaults = mapping.get("defaults", {})
-        field = create_kycp_field(row_data, lookups, defaults)
-        
-        # Group fields by section (optional enhancement)
-        section = str(row.get(section_col)) if section_col and pd.notna(row.get(section_col)) else "General"
-        stage = str(row.get(stage_col)) if stage_col and pd.notna(row.get(stage_col)) else "onboarding"
-        
-        # Add section/stage metadata (could be used for grouping later)
-        field["_section"] = section
-        field["_stage"] = stage
-        
+        items.append((idx, row, len(items)))
+    
+    ctx = {
+        "cols": {
+            "id": id_col, "label": label_col, "data_type": dtype_col, "field_type": ftype_col,
+            "lookup_type": lookup_col, "mandatory": mandatory_col, "visibility": visibility_col,
+            "section": section_col, "stage": stage_col, "regex": regex_col, "help": help_col,
+            "ref": ref_col, "internal": internal_col
+        },
+        "data_types": mapping.data_types,
+        "op_map": mapping.operators,
+        "lookups": lookups,
+        "lookups_norm": lookups_norm,
+        "defaults": mapping.get("defaults", {})
+    }
+    # Build fields (in a process pool when RBSI_IMPORT_WORKERS is set)
+    built = map_rows(build_row_field, items, ctx)
+    fields = []
+    for field, flags in built:
+        # Workers return copies: share the lookup's option dicts again, as a sequential build does
+        if flags["lookup"] and "options" in field:
+            field["options"] = list(lookups_norm[flags["lookup"]])
+        summary["fields_with_visibility"] += flags["visibility"]
+        summary["internal_fields"] += flags["internal"]
         fields.append(field)
-        order += 1
         summary["fields_created"] += 1
     
     # Build final schema in KYCP format
@@ -536,23 +585,34 @@ def main():
         "fields": fields
     }
     
+    metrics.stage("validate")
+    if not check_kycp_schema(schema):
+        sys.exit(1)
+
     # Write output
     out_path = Path(args.out) if args.out else (base_data / f"schemas/{journey_key}/schema-kycp.yaml")
     out_path.parent.mkdir(parents=True, exist_ok=True)
     
+    metrics.stage("yaml dump")
     with out_path.open("w", encoding="utf-8") as f:
         yaml.dump(schema, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
+    metrics.stage("conditions report")
+    write_conditions_report(schema, journey_key, parser="import_xlsx_kycp.py")
+    metrics.count("fields.written", len(fields))
+    summary["metrics"] = metrics.summary()
+    metrics.write_trace(journey_key)
     
     # Write summary
     gen_dir = base_data / f"generated/importer-cli/{journey_key}"
     gen_dir.mkdir(parents=True, exist_ok=True)
     
+    exclusions.write(journey_key, gen_dir)
     with (gen_dir / "summary-kycp.json").open("w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2)
     
     print("KYCP Import complete")
     print(f"- Schema: {out_path}")
-    print(f"- Summary: {gen_dir}/summary-kycp.json")
+    print(f"- Summary: {gen_dir}/summary-kycp.json, exclusions.csv")
     print(f"- Fields created: {summary['fields_created']}")
     print(f"- Internal fields: {summary['internal_fields']}")
     print(f"- Fields with visibility: {summary['fields_with_visibility']}")
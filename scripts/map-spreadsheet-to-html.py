@@ -2,29 +2,41 @@
 """
 Map spreadsheet questions to extracted HTML fields
 Creates bidirectional mapping for audit trail
+
+Candidates come from a TF-IDF token index (question_index.py) so only a short
+list per HTML field gets exact SequenceMatcher scoring, and matches are
+assigned one-to-one, best score first. Each field is first compared only
+within blocks of compatible type, first keyword and length band; the whole
+index is used as a fallback when its blocks produce no match. Every text is
+normalized once into a memoized record shared by all of these scorers.
 """
 
 import json
 import pandas as pd
 from pathlib import Path
-from difflib import SequenceMatcher
-import re
+
+from question_index import (
+    QuestionIndex, Blocker, assign_one_to_one, component_family, data_type_family,
+    ngram_shortlist, sequence_ratio, text_record, EMPTY_RECORD, DEFAULT_SHORTLIST
+)
+
+MATCH_THRESHOLD = 0.7
+HIGH_CONFIDENCE = 0.9
+
+def record_for(text):
+    """Memoized normalization record (empty for missing values)"""
+    if text is None or pd.isna(text):
+        return EMPTY_RECORD
+    return text_record(str(text))
 
 def normalize_text(text):
     """Normalize text for comparison"""
-    if pd.isna(text) or text is None:
-        return ""
     # Remove special chars, lowercase, strip whitespace
-    text = str(text).lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    text = ' '.join(text.split())
-    return text
+    return record_for(text).norm
 
 def calculate_similarity(text1, text2):
     """Calculate similarity score between two texts"""
-    norm1 = normalize_text(text1)
-    norm2 = normalize_text(text2)
-    return SequenceMatcher(None, norm1, norm2).ratio()
+    return sequence_ratio(record_for(text1), record_for(text2))
 
 def load_spreadsheet_data(excel_path):
     """Load and process spreadsheet data"""
@@ -64,35 +76,89 @@ def load_html_fields(json_path):
     with open(json_path, 'r') as f:
         return json.load(f)
 
-def find_best_matches(html_fields, spreadsheet_questions):
-    """Find best matches between HTML fields and spreadsheet questions"""
+def spreadsheet_family(question):
+    """Blocking type family from DATA TYPE, falling back to FIELD TYPE"""
+    return data_type_family(question.get('data_type')) or data_type_family(question.get('field_type'))
+
+def score_candidates(html_idx, html_rec, candidates, sp_records, pairs):
+    """Exact-score candidates, keeping pairs above the threshold; returns kept count"""
+    kept = 0
+    for sp_idx in candidates:
+        score = sequence_ratio(html_rec, sp_records[sp_idx])
+        if score > MATCH_THRESHOLD:
+            pairs.append((score, html_idx, sp_idx))
+            kept += 1
+    return kept
+
+def find_best_matches(html_fields, spreadsheet_questions, shortlist_size=DEFAULT_SHORTLIST, stats=None):
+    """Find best matches between HTML fields and spreadsheet questions
     
-    mappings = []
-    unmatched_html = []
-    unmatched_spreadsheet = list(range(len(spreadsheet_questions)))
+    Pass a dict as stats to receive comparison counts for the matching report.
+    """
+    
+    sp_records = [record_for(q.get('question_text')) if q.get('question_text') else EMPTY_RECORD
+                  for q in spreadsheet_questions]
+    sp_with_text = [idx for idx, record in enumerate(sp_records) if record.norm]
+    index = QuestionIndex(sp_records)
+    blocker = Blocker(sp_records, [spreadsheet_family(q) for q in spreadsheet_questions])
     
+    counts = {
+        'html_fields': 0,
+        'spreadsheet_questions': len(sp_with_text),
+        'possible_pairs': 0,
+        'blocked_candidate_pairs': 0,
+        'in_block_comparisons': 0,
+        'fallback_fields': 0,
+        'fallback_comparisons': 0
+    }
+    
+    # Score each HTML field against its in-block shortlist, then the whole
+    # index if nothing in its blocks clears the threshold
+    pairs = []
+    html_with_text = []
     for html_idx, html_field in enumerate(html_fields):
         if not html_field.get('question_text'):
             continue
+        html_with_text.append(html_idx)
         
-        best_match = None
-        best_score = 0
-        best_idx = -1
+        html_rec = record_for(html_field['question_text'])
+        allowed = blocker.candidates(html_rec, component_family(html_field.get('component_type')))
+        counts['blocked_candidate_pairs'] += len(allowed)
         
-        for sp_idx, sp_question in enumerate(spreadsheet_questions):
-            if sp_question.get('question_text'):
-                score = calculate_similarity(
-                    html_field['question_text'],
-                    sp_question['question_text']
-                )
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = sp_question
-                    best_idx = sp_idx
+        in_block = index.shortlist(html_rec, shortlist_size, allowed) if allowed else None
+        if in_block:
+            counts['in_block_comparisons'] += len(in_block)
+            if score_candidates(html_idx, html_rec, in_block, sp_records, pairs):
+                continue
         
-        if best_score > 0.7:  # Threshold for match
-            mapping = {
+        # No shared indexed token at all: shortlist by character trigrams
+        candidates = index.shortlist(html_rec, shortlist_size)
+        if candidates is None:
+            candidates = ngram_shortlist(html_rec, sp_records, sp_with_text, shortlist_size)
+        candidates = [sp_idx for sp_idx in candidates if sp_idx not in (in_block or ())]
+        counts['fallback_fields'] += 1
+        counts['fallback_comparisons'] += len(candidates)
+        score_candidates(html_idx, html_rec, candidates, sp_records, pairs)
+    
+    counts['html_fields'] = len(html_with_text)
+    counts['possible_pairs'] = len(html_with_text) * len(sp_with_text)
+    performed = counts['in_block_comparisons'] + counts['fallback_comparisons']
+    counts['exact_comparisons'] = performed
+    counts['skipped_comparisons'] = counts['possible_pairs'] - performed
+    counts['skipped_pct'] = round(100 * counts['skipped_comparisons'] / counts['possible_pairs'], 2) if counts['possible_pairs'] else 0.0
+    if stats is not None:
+        stats.update(counts)
+    
+    assigned = assign_one_to_one(pairs)
+    
+    mappings = []
+    unmatched_html = []
+    for html_idx in html_with_text:
+        html_field = html_fields[html_idx]
+        if html_idx in assigned:
+            sp_idx, score = assigned[html_idx]
+            best_match = spreadsheet_questions[sp_idx]
+            mappings.append({
                 'html_index': html_field['index'],
                 'html_question': html_field['question_text'],
                 'html_component': html_field['component_type'],
@@ -102,13 +168,9 @@ def find_best_matches(html_fields, spreadsheet_questions):
                 'spreadsheet_question': best_match.get('question_text'),
                 'spreadsheet_data_type': best_match.get('data_type'),
                 'spreadsheet_mandatory': best_match.get('mandatory'),
-                'match_score': round(best_score, 3),
-                'match_confidence': 'HIGH' if best_score > 0.9 else 'MEDIUM'
-            }
-            mappings.append(mapping)
-            
-            if best_idx in unmatched_spreadsheet:
-                unmatched_spreadsheet.remove(best_idx)
+                'match_score': round(score, 3),
+                'match_confidence': 'HIGH' if score > HIGH_CONFIDENCE else 'MEDIUM'
+            })
         else:
             unmatched_html.append({
                 'index': html_field['index'],
@@ -116,19 +178,20 @@ def find_best_matches(html_fields, spreadsheet_questions):
                 'component': html_field['component_type']
             })
     
+    matched_sp = {sp_idx for sp_idx, _ in assigned.values()}
     unmatched_sp_questions = [
         {
             'keyname': spreadsheet_questions[idx].get('keyname'),
             'ref': spreadsheet_questions[idx].get('ref'),
             'question': spreadsheet_questions[idx].get('question_text')
         }
-        for idx in unmatched_spreadsheet
-        if spreadsheet_questions[idx].get('question_text')
+        for idx in sp_with_text
+        if idx not in matched_sp
     ]
     
     return mappings, unmatched_html, unmatched_sp_questions
 
-def generate_mapping_report(mappings, unmatched_html, unmatched_sp, output_path):
+def generate_mapping_report(mappings, unmatched_html, unmatched_sp, output_path, stats=None):
     """Generate markdown mapping report"""
     
     with open(output_path, 'w') as f:
@@ -144,6 +207,13 @@ def generate_mapping_report(mappings, unmatched_html, unmatched_sp, output_path)
         f.write(f"- **High Confidence (>90% match)**: {len(high_conf)}\n")
         f.write(f"- **Medium Confidence (70-90% match)**: {len(mappings) - len(high_conf)}\n\n")
         
+        if stats:
+            f.write("### Matching Statistics\n\n")
+            f.write(f"- **All-pairs comparisons avoided**: {stats['skipped_comparisons']} of {stats['possible_pairs']} ({stats['skipped_pct']}%)\n")
+            f.write(f"- **Candidates inside compatible blocks**: {stats['blocked_candidate_pairs']}\n")
+            f.write(f"- **Exact comparisons in block**: {stats['in_block_comparisons']}\n")
+            f.write(f"- **Fields needing cross-block fallback**: {stats['fallback_fields']} ({stats['fallback_comparisons']} comparisons)\n\n")
+        
         f.write("## Mapped Fields\n\n")
         f.write("| HTML Field | Spreadsheet KEYNAME | Match Score | Component | Data Type |\n")
         f.write("|------------|-------------------|-------------|-----------|------------|\n")
@@ -188,23 +258,27 @@ def main():
     print(f"Loaded {len(html_fields)} HTML fields")
     
     print("Finding matches...")
-    mappings, unmatched_html, unmatched_sp = find_best_matches(html_fields, spreadsheet_questions)
+    stats = {}
+    mappings, unmatched_html, unmatched_sp = find_best_matches(html_fields, spreadsheet_questions, stats=stats)
     
     print("Generating mapping report...")
-    generate_mapping_report(mappings, unmatched_html, unmatched_sp, output_md)
+    generate_mapping_report(mappings, unmatched_html, unmatched_sp, output_md, stats)
     
     # Save JSON mappings
     with open(output_json, 'w') as f:
         json.dump({
             'mappings': mappings,
             'unmatched_html': unmatched_html,
-            'unmatched_spreadsheet': unmatched_sp
+            'unmatched_spreadsheet': unmatched_sp,
+            'stats': stats
         }, f, indent=2)
     
     print(f"\nMapping complete!")
     print(f"- Mapped fields: {len(mappings)}")
     print(f"- Unmatched HTML: {len(unmatched_html)}")
     print(f"- Unmatched spreadsheet: {len(unmatched_sp)}")
+    print(f"- Comparisons: {stats['exact_comparisons']} of {stats['possible_pairs']} pairs "
+          f"({stats['fallback_fields']} fields used cross-block fallback)")
     print(f"- Report: {output_md}")
     print(f"- JSON: {output_json}")
 
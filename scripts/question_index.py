@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Candidate index for fuzzy question matching
+
+text_record() normalizes and tokenizes each distinct text exactly once into a
+memoized TextRecord (normalized string, words, token set, character trigram
+signature) that every scorer below and in the mapping scripts reuses.
+
+QuestionIndex builds a token inverted index (words and adjacent word pairs)
+with TF-IDF weights over one side of a match (e.g. spreadsheet questions) so
+each query (e.g. an HTML question) only gets exact SequenceMatcher scoring
+against a short list of likely candidates instead of every row. Very common
+tokens (above max_df) are left out of the postings; they carry almost no IDF
+weight and would make every lookup scan the whole corpus.
+
+Blocker buckets targets by compatible type family (HTML component vs
+spreadsheet DATA TYPE), first keyword and length band so that a query is
+first compared only within its own blocks; callers fall back to the full
+index when a block yields nothing.
+
+assign_one_to_one() turns scored candidate pairs into a one-to-one mapping,
+highest score first, so two queries never claim the same target.
+
+Usage:
+    from question_index import QuestionIndex, text_record, assign_one_to_one
+
+    targets = [text_record(t) for t in target_texts]
+    query = text_record(query_text)
+
+    index = QuestionIndex(targets)
+    for target_idx in index.shortlist(query, k=8):
+        ...
+
+    blocker = Blocker(targets, target_families)
+    allowed = blocker.candidates(query, family)
+    index.shortlist(query, k=8, allowed=allowed)
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+DEFAULT_SHORTLIST = 8
+DEFAULT_MAX_DF = 0.25   # ignore tokens present in more than this share of targets
+MIN_POSTINGS_CORPUS = 20  # below this size every token is indexed
+MAX_LENGTH_BAND = 6       # word-count bands 0, 1, 2-3, 4-7, 8-15, 16-31, 32+
+
+# Type families used for blocking; None means "compatible with everything"
+COMPONENT_FAMILIES = {
+    'dropdown': 'choice',
+    'radio': 'choice',
+    'checkbox': 'choice',
+    'text_input': 'text',
+    'textarea': 'text',
+    'complex_field': 'complex'
+}
+
+DATA_TYPE_FAMILIES = {
+    'lookup': 'choice',
+    'enum': 'choice',
+    'free text': 'text',
+    'freetext': 'text',
+    'string': 'text',
+    'text': 'text',
+    'number': 'text',
+    'integer': 'text',
+    'decimal': 'text',
+    'date': 'text',
+    'complex': 'complex'
+}
+
+# Question scaffolding skipped when picking a text's first keyword
+BLOCKING_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'do', 'does', 'did', 'has', 'have',
+    'there', 'any', 'what', 'which', 'who', 'where', 'when', 'how', 'please', 'can',
+    'you', 'your', 'will', 'of', 'in', 'for', 'to', 'if', 'this', 'that', 'it'
+})
+
+
+NON_WORD_RE = re.compile(r'[^\w\s]')
+
+
+class TextRecord(NamedTuple):
+    """A text normalized and tokenized once for all scorers"""
+    text: str
+    norm: str                 # lower-cased, punctuation removed, whitespace collapsed
+    words: Tuple[str, ...]
+    tokens: FrozenSet[str]
+    ngrams: FrozenSet[str]    # character trigrams of the padded normalized text
+
+
+def normalize(text: str) -> str:
+    """Lower-case, replace punctuation with spaces and collapse whitespace"""
+    return ' '.join(NON_WORD_RE.sub(' ', text.lower()).split())
+
+
+@lru_cache(maxsize=None)
+def text_record(text: str) -> TextRecord:
+    """Memoized normalization record for a text"""
+    norm = normalize(text)
+    words = tuple(norm.split())
+    padded = f' {norm} '
+    return TextRecord(
+        text=text,
+        norm=norm,
+        words=words,
+        tokens=frozenset(words),
+        ngrams=frozenset(padded[i:i + 3] for i in range(len(padded) - 2)) if norm else frozenset()
+    )
+
+
+EMPTY_RECORD = text_record('')
+
+
+def sequence_ratio(a: TextRecord, b: TextRecord) -> float:
+    """SequenceMatcher ratio between two normalized texts"""
+    return SequenceMatcher(None, a.norm, b.norm).ratio()
+
+
+def ngram_similarity(a: TextRecord, b: TextRecord) -> float:
+    """Dice coefficient of character trigram signatures"""
+    if not a.ngrams or not b.ngrams:
+        return 0.0
+    return 2 * len(a.ngrams & b.ngrams) / (len(a.ngrams) + len(b.ngrams))
+
+
+def features(record: TextRecord) -> Counter:
+    """Word and word-pair counts for a record"""
+    words = record.words
+    counts = Counter(words)
+    counts.update(f'{a} {b}' for a, b in zip(words, words[1:]))
+    return counts
+
+
+class QuestionIndex:
+    """TF-IDF token index over target text records"""
+
+    def __init__(self, records: Iterable[TextRecord], max_df: float = DEFAULT_MAX_DF):
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+
+        token_counts = []
+        df = Counter()
+        for record in records:
+            counts = features(record)
+            token_counts.append(counts)
+            df.update(counts.keys())
+        self.size = len(token_counts)
+
+        limit = self.size * max_df if self.size >= MIN_POSTINGS_CORPUS else self.size
+        self.idf = {
+            token: math.log((1 + self.size) / (1 + n)) + 1.0
+            for token, n in df.items()
+        }
+
+        for idx, counts in enumerate(token_counts):
+            if not counts:
+                continue
+            weights = {token: tf * self.idf[token] for token, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values()))
+            for token, weight in weights.items():
+                if df[token] <= limit:
+                    self.postings[token].append((idx, weight / norm))
+
+    def scores(self, record: TextRecord, allowed: Optional[Set[int]] = None) -> Dict[int, float]:
+        """Cosine scores (over indexed tokens) for every target sharing a token
+
+        With allowed, only those target indexes are scored.
+        """
+        counts = features(record)
+        weights = {token: tf * self.idf.get(token, 0.0) for token, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+        scores: Dict[int, float] = defaultdict(float)
+        for token, weight in weights.items():
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            q = weight / norm
+            if allowed is None:
+                for idx, w in postings:
+                    scores[idx] += q * w
+            else:
+                for idx, w in postings:
+                    if idx in allowed:
+                        scores[idx] += q * w
+        return scores
+
+    def shortlist(self, record: TextRecord, k: int = DEFAULT_SHORTLIST,
+                  allowed: Optional[Set[int]] = None) -> Optional[List[int]]:
+        """Top-k target indexes for a query, or None if nothing shares a token
+
+        None means the index cannot help; callers fall back to ngram_shortlist().
+        """
+        scores = self.scores(record, allowed)
+        if not scores:
+            return None
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [idx for idx, _ in ranked[:k]]
+
+
+def ngram_shortlist(record: TextRecord, targets: List[TextRecord], indexes: Iterable[int],
+                    k: int = DEFAULT_SHORTLIST) -> List[int]:
+    """Top-k targets by trigram similarity, for queries sharing no indexed token"""
+    scored = [(ngram_similarity(record, targets[idx]), idx) for idx in indexes]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [idx for score, idx in scored[:k] if score > 0]
+
+
+def component_family(component_type: Optional[str]) -> Optional[str]:
+    """Type family of an extracted HTML component"""
+    return COMPONENT_FAMILIES.get(component_type or '')
+
+
+def data_type_family(data_type) -> Optional[str]:
+    """Type family of a spreadsheet DATA TYPE value"""
+    if not isinstance(data_type, str):
+        return None
+    return DATA_TYPE_FAMILIES.get(data_type.strip().lower())
+
+
+def first_keyword(record: TextRecord) -> str:
+    """First word of a record that is not question scaffolding"""
+    for word in record.words:
+        if word not in BLOCKING_STOPWORDS:
+            return word
+    return ''
+
+
+def length_band(record: TextRecord) -> int:
+    """Logarithmic word-count band"""
+    return min(len(record.words).bit_length(), MAX_LENGTH_BAND)
+
+
+class Blocker:
+    """Buckets targets by first keyword, type family and length band"""
+
+    def __init__(self, records: Iterable[TextRecord], families: Iterable[Optional[str]]):
+        # keyword -> family -> band -> target indexes
+        self.buckets: Dict[str, Dict[Optional[str], Dict[int, Set[int]]]] = defaultdict(
+            lambda: defaultdict(lambda: defaultdict(set))
+        )
+        for idx, (record, family) in enumerate(zip(records, families)):
+            if record.norm:
+                self.buckets[first_keyword(record)][family][length_band(record)].add(idx)
+
+    def candidates(self, record: TextRecord, family: Optional[str]) -> Set[int]:
+        """Targets in blocks compatible with a query
+
+        Type families must agree unless either side is unknown (None); the
+        first keyword must match; length bands may differ by one.
+        """
+        by_family = self.buckets.get(first_keyword(record))
+        if not by_family:
+            return set()
+        band = length_band(record)
+        families = by_family.keys() if family is None else (family, None)
+
+        result: Set[int] = set()
+        for f in families:
+            bands = by_family.get(f)
+            if not bands:
+                continue
+            for b in (band - 1, band, band + 1):
+                result.update(bands.get(b, ()))
+        return result
+
+
+def assign_one_to_one(pairs: Iterable[Tuple[float, int, int]]) -> Dict[int, Tuple[int, float]]:
+    """Assign each query at most one target and each target at most one query
+
+    pairs are (score, query_idx, target_idx). Pairs are taken in descending
+    score order (ties: earlier query, then earlier target), so every query
+    ends up with its best target not already claimed by a stronger match.
+    Returns {query_idx: (target_idx, score)}.
+    """
+    assigned: Dict[int, Tuple[int, float]] = {}
+    taken = set()
+    for score, query_idx, target_idx in sorted(pairs, key=lambda p: (-p[0], p[1], p[2])):
+        if query_idx in assigned or target_idx in taken:
+            continue
+        assigned[query_idx] = (target_idx, score)
+        taken.add(target_idx)
+    return assigned
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Schema diff: compare two journey schemas field by field.
+
+Fields are matched by key (KYCP `fields[].key`, legacy `items[].id`) through
+hash maps, so the comparison is linear in the number of fields. Each common
+field is compared attribute by attribute; options are diffed by value and
+visibility rules are compared in a canonical, order-independent form.
+
+Reports added, removed and changed fields as JSON and as a standalone HTML
+page (written under data/generated/diffs/<left>-vs-<right>/).
+
+Usage:
+  python scripts/schema_diff.py --left non-lux-lp-2-1 --right non-lux-lp-2-2
+  python scripts/schema_diff.py --left a/schema-kycp.yaml --right b/schema-kycp.yaml --json out.json
+"""
+
+import argparse
+import html
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+# libyaml's loader when available; schema YAML parsing dominates otherwise
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Attributes compared for every common field, in report order
+ATTRIBUTES = ['label', 'type', 'style', 'section', 'help', 'options', 'visibility', 'validation', 'mandatory', 'children']
+
+
+def resolve_base_data_dir() -> Path:
+    app_local = Path('apps/prototype/data')
+    monorepo = Path('data')
+    return app_local if app_local.exists() else monorepo
+
+
+def resolve_schema_path(ref: str) -> Path:
+    """Accept a schema file path or a journey key under data/schemas/"""
+    p = Path(ref)
+    if p.is_file():
+        return p
+    journey_dir = resolve_base_data_dir() / 'schemas' / ref
+    for name in ('schema-kycp.yaml', 'schema.yaml'):
+        candidate = journey_dir / name
+        if candidate.exists():
+            return candidate
+    raise SystemExit(f"Schema not found: {ref}")
+
+
+def load_schema(path: Path) -> Dict:
+    with path.open('r', encoding='utf-8') as f:
+        if path.suffix == '.json':
+            return json.load(f)
+        return yaml.load(f, Loader=YAML_LOADER) or {}
+
+
+def schema_fields(schema: Dict) -> List[Dict]:
+    """Fields of a KYCP (fields[]) or legacy (items[]) schema"""
+    return schema.get('fields') or schema.get('items') or []
+
+
+def field_key(field: Dict) -> Optional[str]:
+    return field.get('key') or field.get('id')
+
+
+def canonical_options(field: Dict) -> Dict[str, str]:
+    """value -> label for KYCP option dicts or legacy option strings"""
+    result = {}
+    for opt in field.get('options') or []:
+        if isinstance(opt, dict):
+            value = str(opt.get('value'))
+            result[value] = str(opt.get('label', value))
+        else:
+            result[str(opt)] = str(opt)
+    return result
+
+
+def canonical_visibility(field: Dict) -> Tuple[str, ...]:
+    """Order-independent visibility rules as readable strings
+
+    KYCP: each rule becomes "A eq x AND B neq y" (OR for any-match rules);
+    the field is visible if any rule passes, so rules are sorted.
+    Legacy: the visibility.all expressions, joined with &&.
+    """
+    vis = field.get('visibility')
+    if isinstance(vis, dict):
+        exprs = vis.get('all') or []
+        return (' && '.join(sorted(str(e) for e in exprs)),) if exprs else ()
+    rules = []
+    for rule in vis or []:
+        conds = sorted(
+            f"{c.get('sourceKey')} {c.get('operator', 'eq')} {c.get('value')}"
+            for c in rule.get('conditions') or []
+        )
+        joiner = ' AND ' if rule.get('allConditionsMustMatch', True) else ' OR '
+        rules.append(joiner.join(conds))
+    return tuple(sorted(set(rules)))
+
+
+def field_signature(field: Dict) -> Dict:
+    """Comparable attribute values for a field"""
+    return {
+        'label': field.get('label'),
+        'type': field.get('type') or field.get('data_type'),
+        'style': field.get('style') or field.get('control'),
+        'section': field.get('_section') or field.get('section'),
+        'help': field.get('help') or field.get('description'),
+        'options': canonical_options(field),
+        'visibility': canonical_visibility(field),
+        'validation': json.dumps(field.get('validation') or {}, sort_keys=True, default=str),
+        'mandatory': bool(field.get('mandatory') or (field.get('validation') or {}).get('required')),
+        'children': tuple(field_key(c) for c in field.get('children') or [] if isinstance(c, dict))
+    }
+
+
+def diff_options(before: Dict[str, str], after: Dict[str, str]) -> Dict:
+    added = [{'value': v, 'label': after[v]} for v in after if v not in before]
+    removed = [{'value': v, 'label': before[v]} for v in before if v not in after]
+    relabeled = [
+        {'value': v, 'before': before[v], 'after': after[v]}
+        for v in before if v in after and before[v] != after[v]
+    ]
+    return {'added': added, 'removed': removed, 'relabeled': relabeled}
+
+
+def diff_visibility(before: Tuple[str, ...], after: Tuple[str, ...]) -> Dict:
+    after_set = set(after)
+    before_set = set(before)
+    return {
+        'added': [r for r in after if r not in before_set],
+        'removed': [r for r in before if r not in after_set]
+    }
+
+
+def index_fields(fields: List[Dict]) -> Tuple[Dict[str, Dict], List[str]]:
+    """key -> field (first occurrence wins) and the list of duplicate keys"""
+    by_key = {}
+    duplicates = []
+    for field in fields:
+        key = field_key(field)
+        if key is None:
+            continue
+        if key in by_key:
+            duplicates.append(key)
+        else:
+            by_key[key] = field
+    return by_key, duplicates
+
+
+def summarize_field(field: Dict) -> Dict:
+    return {
+        'key': field_key(field),
+        'label': field.get('label'),
+        'section': field.get('_section') or field.get('section')
+    }
+
+
+def diff_schemas(left: Dict, right: Dict) -> Dict:
+    """Diff two loaded schemas; returns the JSON report structure"""
+    left_map, left_dupes = index_fields(schema_fields(left))
+    right_map, right_dupes = index_fields(schema_fields(right))
+
+    added = [summarize_field(f) for k, f in right_map.items() if k not in left_map]
+    removed = [summarize_field(f) for k, f in left_map.items() if k not in right_map]
+
+    changed = []
+    by_attribute = {attr: 0 for attr in ATTRIBUTES}
+    unchanged = 0
+    for key, left_field in left_map.items():
+        right_field = right_map.get(key)
+        if right_field is None:
+            continue
+        before = field_signature(left_field)
+        after = field_signature(right_field)
+        if before == after:
+            unchanged += 1
+            continue
+
+        changes = {}
+        for attr in ATTRIBUTES:
+            if before[attr] == after[attr]:
+                continue
+            by_attribute[attr] += 1
+            if attr == 'options':
+                changes[attr] = diff_options(before[attr], after[attr])
+            elif attr == 'visibility':
+                changes[attr] = diff_visibility(before[attr], after[attr])
+            elif attr == 'children':
+                changes[attr] = {'before': list(before[attr]), 'after': list(after[attr])}
+            else:
+                changes[attr] = {'before': before[attr], 'after': after[attr]}
+        changed.append({
+            'key': key,
+            'label': right_field.get('label'),
+            'section': after['section'],
+            'changes': changes
+        })
+
+    return {
+        'summary': {
+            'left_fields': len(left_map),
+            'right_fields': len(right_map),
+            'added': len(added),
+            'removed': len(removed),
+            'changed': len(changed),
+            'unchanged': unchanged,
+            'changed_by_attribute': {k: v for k, v in by_attribute.items() if v},
+            'duplicate_keys': {'left': left_dupes, 'right': right_dupes}
+        },
+        'added': added,
+        'removed': removed,
+        'changed': changed
+    }
+
+
+def esc(value) -> str:
+    return html.escape('' if value is None else str(value), quote=False)
+
+
+def render_change(attr: str, change: Dict) -> str:
+    if attr == 'options':
+        parts = [f"<ins>+ {esc(o['value'])}</ins>" for o in change['added']]
+        parts += [f"<del>- {esc(o['value'])}</del>" for o in change['removed']]
+        parts += [f"~ {esc(o['value'])}: {esc(o['before'])} → {esc(o['after'])}" for o in change['relabeled']]
+        return '<br>'.join(parts)
+    if attr == 'visibility':
+        parts = [f"<ins>+ {esc(r)}</ins>" for r in change['added']]
+        parts += [f"<del>- {esc(r)}</del>" for r in change['removed']]
+        return '<br>'.join(parts)
+    return f"<del>{esc(change['before'])}</del><br><ins>{esc(change['after'])}</ins>"
+
+
+def render_html(report: Dict, left_name: str, right_name: str, timestamp: str) -> str:
+    summary = report['summary']
+    rows = []
+    for field in report['added']:
+        rows.append(f"<tr class=\"added\"><td><code>{esc(field['key'])}</code></td><td>Added</td>"
+                    f"<td>{esc(field['label'])}</td><td>{esc(field['section'])}</td><td></td></tr>")
+    for field in report['removed']:
+        rows.append(f"<tr class=\"removed\"><td><code>{esc(field['key'])}</code></td><td>Removed</td>"
+                    f"<td>{esc(field['label'])}</td><td>{esc(field['section'])}</td><td></td></tr>")
+    for field in report['changed']:
+        details = ''.join(
+            f"<div><strong>{esc(attr)}</strong><br>{render_change(attr, change)}</div>"
+            for attr, change in field['changes'].items()
+        )
+        rows.append(f"<tr><td><code>{esc(field['key'])}</code></td><td>Changed</td>"
+                    f"<td>{esc(field['label'])}</td><td>{esc(field['section'])}</td><td>{details}</td></tr>")
+
+    by_attr = ', '.join(f"{k}: {v}" for k, v in summary['changed_by_attribute'].items()) or 'none'
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8" />
+<title>Diff – {esc(left_name)} → {esc(right_name)} – {esc(timestamp)}</title>
+<style>
+body{{font-family:system-ui,-apple-system,Segoe UI,Roboto; margin:20px}}
+h1{{margin:0 0 12px 0}}
+table{{border-collapse:collapse; width:100%}}
+th,td{{border:1px solid #ddd; padding:6px 8px; vertical-align:top}}
+th{{background:#f7f7f7}}
+code{{background:#f0f0f0; padding:1px 4px; border-radius:4px}}
+ins{{color:#176f2c; text-decoration:none}}
+del{{color:#b42318}}
+tr.added{{background:#f0faf2}}
+tr.removed{{background:#fdf2f1}}
+td div + div{{margin-top:6px}}
+.muted{{color:#666}}
+</style></head><body>
+<h1>Schema Diff – {esc(left_name)} → {esc(right_name)}</h1>
+<p class="muted">Generated: {esc(timestamp)}</p>
+<p>Fields: {summary['left_fields']} → {summary['right_fields']} ·
+Added: {summary['added']} · Removed: {summary['removed']} · Changed: {summary['changed']} ·
+Unchanged: {summary['unchanged']}</p>
+<p class="muted">Changed attributes: {esc(by_attr)}</p>
+<table>
+  <thead><tr><th>Key</th><th>Status</th><th>Label</th><th>Section</th><th>Changes</th></tr></thead>
+  <tbody>
+{chr(10).join(rows)}
+  </tbody>
+</table>
+</body></html>
+"""
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Diff two journey schemas by field key')
+    ap.add_argument('--left', required=True, help='Journey key or schema file (before)')
+    ap.add_argument('--right', required=True, help='Journey key or schema file (after)')
+    ap.add_argument('--json', help='JSON output path (default: data/generated/diffs/<left>-vs-<right>/diff.json)')
+    ap.add_argument('--html', help='HTML output path (default: alongside the JSON)')
+    args = ap.parse_args()
+
+    left_path = resolve_schema_path(args.left)
+    right_path = resolve_schema_path(args.right)
+    left = load_schema(left_path)
+    right = load_schema(right_path)
+    left_name = left.get('key') or left_path.parent.name
+    right_name = right.get('key') or right_path.parent.name
+
+    report = diff_schemas(left, right)
+    timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    report = {
+        'left': {'key': left_name, 'version': left.get('version'), 'path': str(left_path)},
+        'right': {'key': right_name, 'version': right.get('version'), 'path': str(right_path)},
+        'generated': timestamp,
+        **report
+    }
+
+    out_dir = resolve_base_data_dir() / 'generated' / 'diffs' / f"{left_name}-vs-{right_name}"
+    json_path = Path(args.json) if args.json else out_dir / 'diff.json'
+    html_path = Path(args.html) if args.html else json_path.with_suffix('.html')
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    html_path.parent.mkdir(parents=True, exist_ok=True)
+    json_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    html_path.write_text(render_html(report, left_name, right_name, timestamp), encoding='utf-8')
+
+    s = report['summary']
+    print(f"Diff {left_name} → {right_name}")
+    print(f"  Fields: {s['left_fields']} → {s['right_fields']}")
+    print(f"  Added: {s['added']}  Removed: {s['removed']}  Changed: {s['changed']}  Unchanged: {s['unchanged']}")
+    for attr, count in s['changed_by_attribute'].items():
+        print(f"    - {attr}: {count}")
+    print(f"  JSON: {json_path}")
+    print(f"  HTML: {html_path}")
+
+
+if __name__ == '__main__':
+    main()
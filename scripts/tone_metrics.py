@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Readability metrics for the tone of voice analyzer
+
+Tokenizes each text once and derives, in a single pass:
+  - word_count:      number of word tokens
+  - syllables:       total syllables (vowel-group heuristic, cached per word)
+  - reading_ease:    Flesch reading ease (higher = easier, 60+ is plain English)
+  - clause_count:    number of clauses (1 + clause boundaries such as , ; : ( and
+                     subordinating words like "which", "whether", "including")
+  - avg_word_length: mean characters per word
+
+Use compute_batch() for whole schemas: duplicate texts are measured once and
+syllable counts are shared across every label in the batch.
+
+Usage:
+    from tone_metrics import compute_batch, DEFAULT_THRESHOLDS
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+# Defaults mirror the original analyzer heuristics (20/30 word limits, 100 chars).
+# "Complex Sentence" is broader than the original `',' in text and len > 100`:
+# any clause boundary counts, and very clause-heavy short text is flagged too.
+DEFAULT_THRESHOLDS = {
+    'max_words': 20,            # "Too Long" above this (labels and options)
+    'max_help_words': 40,       # "Too Long" above this (help, descriptions, statements)
+    'high_severity_words': 30,  # "Too Long" is High above this
+    'max_clauses': 3,           # "Complex Sentence" above this, regardless of length
+    'complex_min_chars': 100,   # multi-clause text longer than this is "Complex Sentence"
+    'min_reading_ease': 30.0,   # "Hard to Read" below this Flesch score
+    'min_words_for_ease': 8     # reading ease is unstable for very short labels
+}
+
+METRIC_COLUMNS = ['word_count', 'syllables', 'reading_ease', 'clause_count', 'avg_word_length']
+
+# One regex pass finds words, sentence ends and clause boundaries together
+TOKEN_RE = re.compile(r"(?P<word>[A-Za-z]+(?:['’][A-Za-z]+)*|\d+(?:[.,]\d+)*)|(?P<end>[.!?]+)|(?P<clause>[,;:(])")
+VOWEL_GROUP_RE = re.compile(r'[aeiouy]+')
+
+SUBORDINATORS = frozenset({
+    'which', 'who', 'whom', 'whose', 'whether', 'where', 'when', 'while',
+    'because', 'although', 'unless', 'including', 'if'
+})
+
+
+@lru_cache(maxsize=None)
+def count_syllables(word: str) -> int:
+    """Estimate syllables in a single lower-cased word"""
+    if word.isdigit():
+        return 1
+    groups = len(VOWEL_GROUP_RE.findall(word))
+    # Silent trailing 'e' ("provide"), but keep "-le" endings ("single")
+    if word.endswith('e') and not word.endswith('le') and groups > 1:
+        groups -= 1
+    return max(groups, 1)
+
+
+def compute_metrics(text: str) -> Dict:
+    """Compute all readability metrics for one text in a single token pass"""
+    words = 0
+    syllables = 0
+    letters = 0
+    sentences = 0
+    clauses = 1
+    pending_words = False
+
+    for m in TOKEN_RE.finditer(text or ''):
+        word = m.group('word')
+        if word:
+            lower = word.lower()
+            words += 1
+            letters += len(word)
+            syllables += count_syllables(lower)
+            pending_words = True
+            # Subordinators only open a new clause mid-sentence
+            if lower in SUBORDINATORS and words > 1:
+                clauses += 1
+        elif m.group('end'):
+            if pending_words:
+                sentences += 1
+                pending_words = False
+        else:
+            clauses += 1
+
+    if pending_words:
+        sentences += 1
+
+    if not words:
+        return {
+            'word_count': 0,
+            'syllables': 0,
+            'reading_ease': 0.0,
+            'clause_count': 0,
+            'avg_word_length': 0.0
+        }
+
+    sentences = max(sentences, 1)
+    reading_ease = 206.835 - 1.015 * (words / sentences) - 84.6 * (syllables / words)
+
+    return {
+        'word_count': words,
+        'syllables': syllables,
+        'reading_ease': round(reading_ease, 1),
+        'clause_count': clauses,
+        'avg_word_length': round(letters / words, 2)
+    }
+
+
+def compute_batch(texts: Iterable[str]) -> List[Dict]:
+    """Compute metrics for many texts, measuring each distinct string once"""
+    seen: Dict[str, Dict] = {}
+    results = []
+    for text in texts:
+        text = text or ''
+        metrics = seen.get(text)
+        if metrics is None:
+            metrics = compute_metrics(text)
+            seen[text] = metrics
+        results.append(metrics)
+    return results
+
+
+def load_thresholds(config_path: Optional[Path] = None) -> Dict:
+    """Merge thresholds from a JSON config file over the defaults
+
+    The config may hold the thresholds at the top level or under "thresholds".
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if config_path:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        overrides = data.get('thresholds', data)
+        unknown = set(overrides) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Unknown tone thresholds: {', '.join(sorted(unknown))}")
+        thresholds.update(overrides)
+    return thresholds